@@ -0,0 +1,342 @@
+! Micro-benchmark of the well-balanced kernels
+!
+! Times the normal Riemann solver linked in (RPN2_SOURCE in the Makefile) on
+! synthetic slices and src2 on synthetic patches.  The slices and patches
+! mimic the storm (deep basin, moving pressure deficit) and hump (steady state
+! over a Gaussian bump) examples, with a fraction of the cells dry.  Each case
+! is calibrated to run for at least min_time seconds and the fastest of
+! num_trials trials is reported in ns per interface or ns per cell.
+!
+! Usage: xbenchmark [output.json] [solver name]
+program benchmark
+
+    use, intrinsic :: iso_fortran_env, only: int64
+
+    use geoclaw_module, only: grav, dry_tolerance, rho, ambient_pressure
+    use geoclaw_module, only: coordinate_system, sphere_source
+    use geoclaw_module, only: coriolis_forcing, friction_forcing, friction_depth
+    use geoclaw_module, only: manning_coefficient, manning_break, num_manning
+    use storm_module, only: wind_forcing, pressure_forcing
+    use storm_module, only: wind_index, pressure_index
+    use friction_module, only: variable_friction, friction_index
+    use amr_module, only: mcapa, mxnest, hxposs, hyposs
+    use amr_module, only: xlower, xupper, ylower, yupper
+    use splitting_module, only: split_forcing, test_type, fused_source
+    use splitting_module, only: build_metrics
+
+    implicit none
+
+    integer, parameter :: num_eqn = 3, num_waves = 3, num_aux = 5
+    integer, parameter :: num_ghost = 2
+    integer, parameter :: num_trials = 5
+    real(kind=8), parameter :: min_time = 0.05d0
+
+    integer, parameter :: unit = 42
+    character(len=256) :: output_path, solver
+    character(len=8) :: profiles(2) = ["storm   ", "hump    "]
+    real(kind=8) :: wet_fractions(3) = [1.d0, 0.5d0, 0.d0]
+    integer :: slice_sizes(2) = [60, 300]
+    integer :: n, m, k, l
+    logical :: first
+
+    call get_command_argument(1, output_path)
+    if (len_trim(output_path) == 0) then
+        output_path = "benchmark.json"
+    end if
+    call get_command_argument(2, solver)
+    if (len_trim(solver) == 0) then
+        solver = "rpn2"
+    end if
+
+    ! Module state normally read from the data files
+    grav = 9.81d0
+    dry_tolerance = 1.d-3
+    if (.not. allocated(rho)) then
+        allocate(rho(1))
+    end if
+    rho = 1025.d0
+    ambient_pressure = 101.3d3
+    coordinate_system = 1
+    sphere_source = 0
+    coriolis_forcing = .false.
+    friction_forcing = .false.
+    friction_depth = 1.d6
+    num_manning = 1
+    if (.not. allocated(manning_coefficient)) then
+        allocate(manning_coefficient(1), manning_break(1))
+    end if
+    manning_coefficient = 0.025d0
+    manning_break = 1.d10
+    variable_friction = .false.
+    friction_index = 2
+    wind_forcing = .false.
+    pressure_forcing = .true.
+    wind_index = 3
+    pressure_index = 5
+    mcapa = 0
+    test_type = 1
+    fused_source = .false.
+
+    open(unit, file=trim(output_path), status="replace", action="write")
+    write(unit, "(a)") "{"
+    write(unit, "(3a)") '  "solver": "', trim(solver), '",'
+
+    ! Riemann solver on slices
+    write(unit, "(a)") '  "rpn2": ['
+    first = .true.
+    do n = 1, size(slice_sizes)
+        do m = 1, size(profiles)
+            do k = 1, size(wet_fractions)
+                do l = 0, 1
+                    call bench_rpn2(slice_sizes(n), trim(profiles(m)),         &
+                                    wet_fractions(k), l == 1, first)
+                    first = .false.
+                end do
+            end do
+        end do
+    end do
+    write(unit, "(a)") ""
+    write(unit, "(a)") "  ],"
+
+    ! Source terms on patches
+    write(unit, "(a)") '  "src2": ['
+    first = .true.
+    do m = 1, size(profiles)
+        do k = 1, 2
+            do l = 0, 3
+                ! Split forcing off and on, the latter also fused and on a
+                ! lat-long grid
+                call bench_src2(60, 60, trim(profiles(m)), wet_fractions(k),   &
+                                l > 0, l == 2, l == 3, first)
+                first = .false.
+            end do
+        end do
+    end do
+    write(unit, "(a)") ""
+    write(unit, "(a)") "  ]"
+    write(unit, "(a)") "}"
+    close(unit)
+
+    print "(2a)", "Wrote ", trim(output_path)
+
+contains
+
+    ! Seconds elapsed since start
+    real(kind=8) function elapsed(start)
+        implicit none
+        integer(kind=int64), intent(in) :: start
+        integer(kind=int64) :: now, rate
+
+        call system_clock(now, rate)
+        elapsed = real(now - start, kind=8) / real(rate, kind=8)
+
+    end function elapsed
+
+    ! JSON representation of x
+    function number(x) result(string)
+        implicit none
+        real(kind=8), intent(in) :: x
+        character(len=:), allocatable :: string
+        character(len=32) :: buffer
+
+        write(buffer, "(f32.3)") x
+        string = trim(adjustl(buffer))
+
+    end function number
+
+    ! Fill cells 1 - num_ghost:mx + num_ghost of q and aux along a line of
+    ! cells x in [0, 1], cells beyond wet_fraction are dry land
+    subroutine fill_line(profile, wet_fraction, mx, x, q, aux)
+        implicit none
+        character(len=*), intent(in) :: profile
+        real(kind=8), intent(in) :: wet_fraction
+        integer, intent(in) :: mx
+        real(kind=8), intent(in) :: x(1-num_ghost:mx+num_ghost)
+        real(kind=8), intent(out) :: q(num_eqn, 1-num_ghost:mx+num_ghost)
+        real(kind=8), intent(out) :: aux(num_aux, 1-num_ghost:mx+num_ghost)
+
+        integer :: i
+        real(kind=8) :: eta
+
+        aux = 0.d0
+        do i = 1 - num_ghost, mx + num_ghost
+            if (profile == "storm") then
+                ! Deep basin under a moving pressure deficit
+                aux(1, i) = -200.d0
+                aux(pressure_index, i) = ambient_pressure                     &
+                            - 5.d3 * (1.d0 - exp(-0.05d0 / max(abs(x(i) - 0.4d0), 1.d-3)))
+                eta = (ambient_pressure - aux(pressure_index, i)) / (rho(1) * grav)
+                q(1, i) = eta - aux(1, i)
+                q(2, i) = q(1, i) * 0.5d0 * sin(6.d0 * x(i))
+                q(3, i) = q(1, i) * 0.2d0 * cos(4.d0 * x(i))
+            else
+                ! Lake at rest over a bump under a steady pressure bump
+                aux(1, i) = -1.d0 + 0.25d0 * exp(-100.d0 * (x(i) - 0.5d0)**2)
+                aux(pressure_index, i) = ambient_pressure                     &
+                            + 1.d2 * exp(-100.d0 * (x(i) - 0.3d0)**2)
+                q(1, i) = -aux(1, i) - (aux(pressure_index, i) - ambient_pressure) &
+                                        / (rho(1) * grav)
+                q(2:3, i) = 0.d0
+            end if
+            if (x(i) > wet_fraction) then
+                aux(1, i) = 1.d0
+                q(1, i) = 0.5d0 * dry_tolerance
+                q(2:3, i) = 0.d0
+            end if
+            aux(friction_index, i) = 0.025d0
+        end do
+
+    end subroutine fill_line
+
+    ! Time rpn2 on a slice of mx cells
+    subroutine bench_rpn2(mx, profile, wet_fraction, split, first)
+        implicit none
+        integer, intent(in) :: mx
+        character(len=*), intent(in) :: profile
+        real(kind=8), intent(in) :: wet_fraction
+        logical, intent(in) :: split, first
+
+        real(kind=8) :: x(1-num_ghost:mx+num_ghost)
+        real(kind=8) :: q(num_eqn, 1-num_ghost:mx+num_ghost)
+        real(kind=8) :: aux(num_aux, 1-num_ghost:mx+num_ghost)
+        real(kind=8) :: s(num_waves, 1-num_ghost:mx+num_ghost)
+        real(kind=8) :: fwave(num_eqn, num_waves, 1-num_ghost:mx+num_ghost)
+        real(kind=8) :: amdq(num_eqn, 1-num_ghost:mx+num_ghost)
+        real(kind=8) :: apdq(num_eqn, 1-num_ghost:mx+num_ghost)
+        integer :: i, n, trial, reps
+        integer(kind=int64) :: start
+        real(kind=8) :: seconds, best, ns
+
+        do i = 1 - num_ghost, mx + num_ghost
+            x(i) = (i - 0.5d0) / mx
+        end do
+        call fill_line(profile, wet_fraction, mx, x, q, aux)
+        split_forcing = split
+
+        ! Calibrate the number of calls, then keep the fastest trial
+        reps = 1
+        best = huge(1.d0)
+        do trial = 0, num_trials
+            do
+                call system_clock(start)
+                do n = 1, reps
+                    call rpn2(1, mx, num_eqn, num_waves, num_aux, num_ghost,  &
+                              mx, q, q, aux, aux, fwave, s, amdq, apdq)
+                end do
+                seconds = elapsed(start)
+                if (trial > 0 .or. seconds >= min_time) then
+                    exit
+                end if
+                reps = reps * 2
+            end do
+            best = min(best, seconds)
+        end do
+        ns = best * 1.d9 / (real(reps, kind=8) * (mx + 2 * num_ghost - 1))
+
+        if (.not. first) then
+            write(unit, "(a)") ","
+        end if
+        write(unit, "(3a,i0,a,f4.2,3a,i0,3a)", advance="no")                &
+            '    {"case": "', profile, '", "cells": ', mx,                  &
+            ', "wet_fraction": ', wet_fraction,                             &
+            ', "split": ', trim(merge("true ", "false", split)),            &
+            ', "repetitions": ', reps, ', "ns_per_interface": ', number(ns), "}"
+        print "(a8,a,i4,a,f5.2,a,l1,a,f9.2,a)", profile, " mx =", mx,       &
+            " wet =", wet_fraction, " split = ", split, ":", ns, " ns/interface"
+
+    end subroutine bench_rpn2
+
+    ! Time src2 on a patch of mx x my cells
+    subroutine bench_src2(mx, my, profile, wet_fraction, split, fused,     &
+                          lat_long, first)
+        implicit none
+        integer, intent(in) :: mx, my
+        character(len=*), intent(in) :: profile
+        real(kind=8), intent(in) :: wet_fraction
+        logical, intent(in) :: split, fused, lat_long, first
+
+        real(kind=8) :: x(1-num_ghost:mx+num_ghost)
+        real(kind=8) :: q(num_eqn, 1-num_ghost:mx+num_ghost, 1-num_ghost:my+num_ghost)
+        real(kind=8) :: aux(num_aux, 1-num_ghost:mx+num_ghost, 1-num_ghost:my+num_ghost)
+        integer :: i, j, n, trial, reps
+        integer(kind=int64) :: start
+        real(kind=8) :: seconds, best, ns, dx, dy, x_lower, y_lower, dt
+
+        do i = 1 - num_ghost, mx + num_ghost
+            x(i) = (i - 0.5d0) / mx
+        end do
+        do j = 1 - num_ghost, my + num_ghost
+            call fill_line(profile, wet_fraction, mx, x, q(:, :, j), aux(:, :, j))
+        end do
+
+        split_forcing = split
+        fused_source = fused
+        friction_forcing = (profile == "storm")
+        coriolis_forcing = (profile == "storm")
+
+        ! A 20 x 20 degree domain with the patch on its only level
+        if (lat_long) then
+            coordinate_system = 2
+            dx = 20.d0 / mx
+            dy = 20.d0 / my
+            x_lower = -90.d0
+            y_lower = 20.d0
+        else
+            coordinate_system = 1
+            dx = 2.d6 / mx
+            dy = 2.d6 / my
+            x_lower = 0.d0
+            y_lower = 0.d0
+        end if
+        mxnest = 1
+        hxposs(1) = dx
+        hyposs(1) = dy
+        xlower = x_lower
+        ylower = y_lower
+        xupper = x_lower + mx * dx
+        yupper = y_lower + my * dy
+        call build_metrics()
+
+        ! Small time step so that repeated calls barely change the state
+        dt = 1.d-6
+
+        reps = 1
+        best = huge(1.d0)
+        do trial = 0, num_trials
+            do
+                call system_clock(start)
+                do n = 1, reps
+                    call src2(num_eqn, num_ghost, mx, my, x_lower, y_lower,   &
+                              dx, dy, q, num_aux, aux, 0.d0, dt)
+                end do
+                seconds = elapsed(start)
+                if (trial > 0 .or. seconds >= min_time) then
+                    exit
+                end if
+                reps = reps * 2
+            end do
+            best = min(best, seconds)
+        end do
+        ns = best * 1.d9 / (real(reps, kind=8) * mx * my)
+
+        if (.not. first) then
+            write(unit, "(a)") ","
+        end if
+        write(unit, "(3a,i0,a,i0,a,f4.2,7a,i0,3a)", advance="no")           &
+            '    {"case": "', profile, '", "mx": ', mx, ', "my": ', my,     &
+            ', "wet_fraction": ', wet_fraction,                             &
+            ', "split": ', trim(merge("true ", "false", split)),            &
+            ', "fused": ', trim(merge("true ", "false", fused)),            &
+            ', "lat_long": ', trim(merge("true ", "false", lat_long)),      &
+            ', "repetitions": ', reps, ', "ns_per_cell": ', number(ns), "}"
+        print "(a8,a,l1,a,l1,a,l1,a,f5.2,a,f9.2,a)", profile, " split = ",  &
+            split, " fused = ", fused, " lat-long = ", lat_long, " wet =",   &
+            wet_fraction, ":", ns, " ns/cell"
+
+        coordinate_system = 1
+        friction_forcing = .false.
+        coriolis_forcing = .false.
+
+    end subroutine bench_src2
+
+end program benchmark
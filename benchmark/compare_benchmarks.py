@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+r"""Compare two benchmark result files written by xbenchmark
+
+Usage: python compare_benchmarks.py baseline.json results.json [tolerance]
+
+Prints the change of every case and exits with a non-zero status if any case
+is slower than the baseline by more than *tolerance* (default 0.1, i.e. 10%).
+"""
+
+import sys
+import json
+
+# Fields identifying a case, the remaining field holds the timing
+timing_fields = {"rpn2": "ns_per_interface", "src2": "ns_per_cell"}
+
+
+def case_key(kernel, case):
+    r"""Hashable description of *case* without its timing and repetitions"""
+    return (kernel,) + tuple(sorted((name, value)
+                                    for (name, value) in case.items()
+                                    if name not in (timing_fields[kernel],
+                                                    "repetitions")))
+
+
+def load_results(path):
+    r"""Dictionary mapping each case in *path* to its timing"""
+    with open(path, "r") as results_file:
+        results = json.load(results_file)
+    timings = {}
+    for (kernel, field) in timing_fields.items():
+        for case in results.get(kernel, []):
+            timings[case_key(kernel, case)] = case[field]
+    return timings
+
+
+def compare(baseline_path, results_path, tolerance=0.1):
+    r"""Print the relative change of each case, return the regressed cases"""
+    baseline = load_results(baseline_path)
+    results = load_results(results_path)
+
+    regressions = []
+    for (key, timing) in results.items():
+        if key not in baseline or baseline[key] <= 0.0:
+            continue
+        change = timing / baseline[key] - 1.0
+        description = ", ".join(f"{name}={value}" for (name, value) in key[1:])
+        flag = ""
+        if change > tolerance:
+            flag = "  <-- slower"
+            regressions.append(key)
+        print(f"{key[0]} {description}: {baseline[key]:.2f} -> {timing:.2f} "
+              f"({100.0 * change:+.1f}%){flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    tolerance = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    regressions = compare(sys.argv[1], sys.argv[2], tolerance)
+    if len(regressions) > 0:
+        print(f"{len(regressions)} case(s) slower by more than "
+              f"{100.0 * tolerance:.0f}%")
+        sys.exit(1)
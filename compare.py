@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+r"""Frame by frame comparison of split and non-split runs
+
+:class:`FrameComparison` follows two output directories, typically the split
+and non-split runs of one sweep member, and as soon as a frame exists in both
+computes the L1 and L2 norms of the differences of h, hu, hv and eta on the
+level 1 grid and their max norm over every AMR level both frames have.
+Each compared frame appends one record to a time series that can be saved as
+a small ``.npz`` file.  It works the same on finished runs and on runs that
+are still writing frames, so the comparison can follow runs as they go:
+
+    python compare.py split_output non_split_output [tolerance] [series.npz]
+
+follows both directories until neither writes a frame for ``idle_time``
+seconds, printing the differences of each frame, and stops with an error once
+the max norm of the eta difference exceeds *tolerance*.
+:class:`DivergenceMonitor` does the same check as a ``job.monitor`` of
+:class:`sweep.LocalController` against a completed reference run and stops
+the diverging run.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import frames
+
+# Fields compared and their index in q
+fields = {"h": 0, "hu": 1, "hv": 2, "eta": 3}
+norms = ["l1", "l2", "linf"]
+
+
+def common_cells(grid, reference_grid):
+    r"""Data of two :class:`frames.Patch` of one level over their common box
+
+    Returns views of ``grid.q`` and ``reference_grid.q`` holding the cells
+    inside both patches, which may have no cells.
+    """
+    if not np.allclose(grid.delta, reference_grid.delta):
+        raise ValueError(f"Level {grid.level} grids differ in cell size: "
+                         f"{grid.delta} and {reference_grid.delta}.")
+    slices, reference_slices = [slice(None)], [slice(None)]
+    for n in range(2):
+        # First cell of grid in the cells of reference_grid
+        offset = int(round((grid.lower[n] - reference_grid.lower[n])
+                           / grid.delta[n]))
+        start = max(offset, 0)
+        end = max(min(offset + grid.num_cells[n],
+                      reference_grid.num_cells[n]), start)
+        slices.append(slice(start - offset, end - offset))
+        reference_slices.append(slice(start, end))
+    return grid.q[tuple(slices)], reference_grid.q[tuple(reference_slices)]
+
+
+def difference_norms(solution, reference, fields=fields):
+    r"""L1, L2 and max norms of ``solution - reference`` for each field
+
+    The L1 and L2 norms are taken on the level 1 grids, which cover the
+    whole domain, weighted by the cell area.  The max norm is taken over
+    every level both frames have, on the cells covered by both, so that
+    differences confined to refined patches are seen.  Fields beyond the
+    equations written to the frames are skipped.
+    """
+    grid = solution.level_grid()
+    reference_grid = reference.level_grid()
+    if grid.q.shape != reference_grid.q.shape:
+        raise ValueError(f"Frame {solution.frame} grids differ in shape: "
+                         f"{grid.q.shape} and {reference_grid.q.shape}.")
+    area = grid.delta[0] * grid.delta[1]
+
+    levels = sorted(set(patch.level for patch in solution.patches)
+                    & set(patch.level for patch in reference.patches))
+    finer_grids = [common_cells(solution.level_grid(level),
+                                reference.level_grid(level))
+                   for level in levels if level > 1]
+
+    differences = {}
+    for (name, index) in fields.items():
+        if index >= grid.q.shape[0]:
+            continue
+        difference = np.abs(grid.q[index] - reference_grid.q[index])
+        linf = np.nanmax(difference)
+        for (q, reference_q) in finer_grids:
+            finer_difference = np.abs(q[index] - reference_q[index])
+            finer_difference = finer_difference[~np.isnan(finer_difference)]
+            if finer_difference.size > 0:
+                linf = max(linf, np.max(finer_difference))
+        differences[name] = {"l1": float(np.nansum(difference) * area),
+                             "l2": float(np.sqrt(np.nansum(difference**2)
+                                                 * area)),
+                             "linf": float(linf)}
+    return differences
+
+
+class FrameComparison(object):
+    r"""Differences of the frames of *path* from those of *reference_path*
+
+    Call :meth:`update` to compare the frames that appeared in both
+    directories since the last call.  A frame is complete once its
+    ``fort.tXXXX`` file exists, which is written after its data.
+    """
+
+    def __init__(self, path, reference_path, fields=fields):
+        self.path = path
+        self.reference_path = reference_path
+        self.fields = fields
+        self.frames = []
+        self.t = []
+        self.differences = []
+
+    def __str__(self):
+        return (f"FrameComparison of {self.path} against "
+                f"{self.reference_path}: {len(self.frames)} frames")
+
+    def update(self):
+        r"""Compare the new frames present in both directories
+
+        Returns the number of frames compared.
+        """
+        last = self.frames[-1] if len(self.frames) > 0 else -1
+        common = sorted(set(frames.list_frames(self.path))
+                        & set(frames.list_frames(self.reference_path)))
+        num_compared = 0
+        for frame in common:
+            if frame <= last:
+                continue
+            solution = frames.Frame(self.path, frame)
+            reference = frames.Frame(self.reference_path, frame)
+            self.frames.append(frame)
+            self.t.append(solution.t)
+            self.differences.append(difference_norms(solution, reference,
+                                                     self.fields))
+            num_compared += 1
+        return num_compared
+
+    def series(self, field, norm="linf"):
+        r"""Time series of *norm* of the difference of *field*"""
+        return np.array([differences.get(field, {}).get(norm, np.nan)
+                         for differences in self.differences])
+
+    def save(self, path):
+        r"""Save the time series to the ``.npz`` file *path*
+
+        The file holds ``frame``, ``t`` and one array ``<field>_<norm>`` per
+        field and norm.
+        """
+        arrays = {"frame": np.array(self.frames, dtype=np.int32),
+                  "t": np.array(self.t)}
+        for field in self.fields:
+            for norm in norms:
+                arrays[f"{field}_{norm}"] = self.series(field, norm)
+        np.savez(path, **arrays)
+
+    def diverged(self, tolerance, field="eta", norm="linf"):
+        r"""Time of the first frame whose *norm* of *field* exceeds *tolerance*"""
+        for (t, value) in zip(self.t, self.series(field, norm)):
+            if value > tolerance:
+                return t
+        return None
+
+
+class DivergenceMonitor(object):
+    r"""Stop a run once it diverges from the run in *reference_path*
+
+    Used as the ``job.monitor`` of a sweep member, e.g. of the split run with
+    the output of the matching non-split run as *reference_path*.  The run is
+    stopped and fails once *norm* of the difference of *field* exceeds
+    *tolerance* in a frame, see :func:`difference_norms`: the max norm
+    includes the refined patches, the L1 and L2 norms only the level 1 grid.
+    The comparison is kept as ``comparison`` and saved to *series_path* if
+    given.
+
+    The reference run has to be complete, i.e. its output directory has to
+    hold the ``.run_stats`` file the sweep writes after a successful run, so
+    that the frames compared against are never missing or partly written.
+    Run the reference jobs first.
+    """
+
+    success = False
+    reason = "diverged"
+
+    # Written by sweep.LocalController once a run has succeeded
+    complete_file = ".run_stats"
+
+    def __init__(self, reference_path, tolerance, field="eta", norm="linf",
+                       series_path=None, interval=1.0):
+        if not os.path.exists(os.path.join(reference_path,
+                                           self.complete_file)):
+            raise ValueError(f"Reference output {reference_path} is not "
+                             "from a completed run.")
+        self.reference_path = reference_path
+        self.tolerance = tolerance
+        self.field = field
+        self.norm = norm
+        self.series_path = series_path
+        self.interval = interval
+        self.comparison = None
+
+    def reset(self):
+        self.comparison = None
+
+    def parameters(self):
+        return {"reference_path": os.path.abspath(self.reference_path),
+                "tolerance": self.tolerance, "field": self.field,
+                "norm": self.norm}
+
+    def check(self, path):
+        if self.comparison is None:
+            self.comparison = FrameComparison(path, self.reference_path)
+        if self.comparison.update() > 0 and self.series_path is not None:
+            self.comparison.save(self.series_path)
+        return self.comparison.diverged(self.tolerance, self.field, self.norm)
+
+
+def follow(path, reference_path, tolerance=None, series_path=None,
+                 idle_time=60.0, interval=1.0):
+    r"""Compare the frames of two running or finished runs as they appear
+
+    Prints the differences of each frame and returns the
+    :class:`FrameComparison` once no new frame appeared for *idle_time*
+    seconds or the eta difference exceeded *tolerance*.
+    """
+    comparison = FrameComparison(path, reference_path)
+    print(f"{'frame':>5s} {'t':>12s}" + "".join(f" {field + ' linf':>12s}"
+                                                for field in fields))
+    last_change = time.monotonic()
+    while time.monotonic() - last_change < idle_time:
+        start = len(comparison.frames)
+        if comparison.update() > 0:
+            last_change = time.monotonic()
+            for n in range(start, len(comparison.frames)):
+                differences = comparison.differences[n]
+                print(f"{comparison.frames[n]:5d} {comparison.t[n]:12.4e}"
+                      + "".join(f" {differences[field]['linf']:12.4e}"
+                                if field in differences else f" {'':>12s}"
+                                for field in fields))
+            if series_path is not None:
+                comparison.save(series_path)
+            if tolerance is not None \
+                    and comparison.diverged(tolerance) is not None:
+                break
+        else:
+            time.sleep(interval)
+    return comparison
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    tolerance = float(sys.argv[3]) if len(sys.argv) > 3 else None
+    series_path = sys.argv[4] if len(sys.argv) > 4 else None
+    comparison = follow(sys.argv[1], sys.argv[2], tolerance, series_path)
+    if tolerance is not None:
+        t = comparison.diverged(tolerance)
+        if t is not None:
+            sys.exit(f"Diverged at t = {t}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+r"""Resolution ladder convergence studies
+
+A convergence study runs the same job at several refinement ratios, the jobs
+scaling their base grid by ``job.ratio`` in each direction.
+:class:`ConvergenceController` runs the ladder from the coarsest grid up,
+estimating the wall time and memory of each level from the levels already run
+and skipping the levels that would exceed the configured budget.  Once the
+ladder has run, the base grid solution of every level is compared with the
+finest level that completed, averaged onto the coarser grid, and the observed
+order of convergence between consecutive levels is reported.
+"""
+
+import math
+
+import numpy as np
+
+import sweep
+import frames
+
+
+def coarsen(q, factor):
+    r"""Average *q* of shape ``(num_eqn, mx, my)`` over blocks of *factor*²"""
+    num_eqn, mx, my = q.shape
+    if mx % factor != 0 or my % factor != 0:
+        raise ValueError(f"Grid of {mx} x {my} cells cannot be coarsened "
+                         f"by {factor}.")
+    return q.reshape((num_eqn, mx // factor, factor,
+                      my // factor, factor)).mean(axis=(2, 4))
+
+
+def error_norms(difference, delta):
+    r"""L1, L2 and max norms of *difference* on cells of size *delta*"""
+    area = delta[0] * delta[1]
+    return {"l1": float(np.sum(np.abs(difference)) * area),
+            "l2": float(np.sqrt(np.sum(difference**2) * area)),
+            "linf": float(np.max(np.abs(difference)))}
+
+
+def estimate(ratios, values, ratio, exponent):
+    r"""Estimate the cost at *ratio* from the *values* measured at *ratios*
+
+    The cost is modelled as a constant overhead plus a term growing as
+    ``ratio**exponent``, fitted to the last two measurements.  With a single
+    measurement, or if the cost did not grow between the last two, the whole
+    cost is assumed to grow as ``ratio**exponent``.
+    """
+    if len(values) > 1:
+        slope = (values[-1] - values[-2]) / (ratios[-1]**exponent
+                                             - ratios[-2]**exponent)
+        if slope > 0.0:
+            return values[-1] + slope * (ratio**exponent
+                                         - ratios[-1]**exponent)
+    return values[-1] * (ratio / ratios[-1])**exponent
+
+
+class ConvergenceController(sweep.LocalController):
+    r"""Run a resolution ladder of jobs, coarsest first
+
+    *jobs* are the same job at different ``ratio``.  Before each level is run
+    its wall time and peak memory are estimated with :func:`estimate` from the
+    levels below it, the wall time growing as ``ratio**3`` (cells and time
+    steps) and the memory as ``ratio**2`` (cells).  A level whose estimate
+    exceeds ``max_wall_time`` (seconds) or ``max_memory`` (bytes) is skipped
+    along with every finer level.  The estimates are recorded on the jobs as
+    ``job.estimate``.
+
+    After the ladder, ``field`` of the level 1 grid in ``frame`` (the last
+    frame of the finest level by default) of each level is compared with the
+    finest completed level and the errors and observed orders are stored on
+    the jobs as ``job.error`` and ``job.order`` and printed.
+    """
+
+    wall_time_exponent = 3
+    memory_exponent = 2
+
+    def __init__(self, jobs=[], max_wall_time=None, max_memory=None,
+                       field=3, frame=None, **kwargs):
+
+        jobs = sorted(jobs, key=lambda job: job.ratio)
+        super(ConvergenceController, self).__init__(jobs, **kwargs)
+
+        self.max_wall_time = max_wall_time
+        self.max_memory = max_memory
+        self.field = field
+        self.frame = frame
+
+    def __str__(self):
+        output = super(ConvergenceController, self).__str__()
+        output += "\n  Ratios: " + ", ".join(str(job.ratio)
+                                             for job in self.jobs)
+        if self.max_wall_time is not None:
+            output += f"\n  Wall time budget: {self.max_wall_time:.0f} s"
+        if self.max_memory is not None:
+            output += f"\n  Memory budget: {self.max_memory / 2**20:.0f} MiB"
+        return output
+
+    def over_budget(self, job, ratios, wall_times, memories):
+        r"""Reason to skip *job* given the levels run so far, ``None`` if any"""
+        job.estimate = {}
+        if len(ratios) == 0:
+            return None
+        job.estimate["wall_time"] = estimate(ratios, wall_times, job.ratio,
+                                             self.wall_time_exponent)
+        if self.max_wall_time is not None \
+                and job.estimate["wall_time"] > self.max_wall_time:
+            return "over time"
+        if None not in memories:
+            job.estimate["max_memory"] = estimate(ratios, memories, job.ratio,
+                                                  self.memory_exponent)
+            if self.max_memory is not None \
+                    and job.estimate["max_memory"] > self.max_memory:
+                return "over memory"
+        return None
+
+    def run(self):
+        r"""Run the ladder and compute the errors against the finest level
+
+        Returns the paths of each job as :meth:`LocalController.run` does.
+        """
+
+        all_paths = [self.job_paths(job) for job in self.jobs]
+        ratios, wall_times, memories = [], [], []
+        skip = None
+        for (job, paths) in zip(self.jobs, all_paths):
+            # Once a level is skipped or fails every finer level is skipped
+            if skip is None:
+                skip = self.over_budget(job, ratios, wall_times, memories)
+            job.skipped = skip
+            if job.skipped is not None:
+                continue
+
+            self.write_job_data(job, paths)
+            paths["key"] = self.run_key(job, paths) if self.cache else None
+            self.run_job(job, paths)
+            if job.returncode != 0:
+                skip = "skipped"
+                continue
+            run_stats = paths["run_stats"]
+            ratios.append(job.ratio)
+            wall_times.append(run_stats.get("wall_time", job.wall_time))
+            memories.append(run_stats.get("max_memory"))
+
+        self.print_summary()
+        self.print_estimates()
+        self.compute_errors(all_paths)
+        self.print_errors()
+
+        return all_paths
+
+    def compute_errors(self, all_paths):
+        r"""Store the error of each level against the finest completed level"""
+        done = [(job, paths) for (job, paths) in zip(self.jobs, all_paths)
+                             if getattr(job, "returncode", None) == 0]
+        for job in self.jobs:
+            job.error = None
+            job.order = None
+        if len(done) < 2:
+            return
+
+        finest_job, finest_paths = done[-1]
+        self.reference_ratio = finest_job.ratio
+        frame = self.frame
+        if frame is None:
+            frame = frames.list_frames(finest_paths["output"])[-1]
+        finest = frames.Frame(finest_paths["output"], frame).level_grid()
+
+        for (job, paths) in done[:-1]:
+            coarse = frames.Frame(paths["output"], frame).level_grid()
+            factor = finest_job.ratio // job.ratio
+            reference = coarsen(finest.q[self.field:self.field + 1], factor)
+            if reference.shape[1:] != coarse.q.shape[1:]:
+                raise ValueError(f"Grid of ratio {job.ratio} does not match "
+                                 f"the ratio {finest_job.ratio} grid.")
+            job.error = error_norms(coarse.q[self.field] - reference[0],
+                                    coarse.delta)
+
+        for (coarse, fine) in zip(done[:-2], done[1:-1]):
+            coarse, fine = coarse[0], fine[0]
+            fine.order = {}
+            for (norm, error) in fine.error.items():
+                if coarse.error[norm] > 0.0 and error > 0.0:
+                    fine.order[norm] = (math.log(coarse.error[norm] / error)
+                                        / math.log(fine.ratio / coarse.ratio))
+
+    def print_estimates(self):
+        r"""Print the estimated and measured cost of each level"""
+        print("Cost estimates:")
+        for job in self.jobs:
+            estimates = getattr(job, "estimate", {})
+            if "wall_time" not in estimates:
+                continue
+            line = (f"  ratio {job.ratio:>3d}  "
+                    f"{estimates['wall_time']:10.1f} s")
+            if "max_memory" in estimates:
+                line += f"  {estimates['max_memory'] / 2**20:10.1f} MiB"
+            if job.skipped is not None:
+                line += f"  ({job.skipped})"
+            print(line)
+
+    def print_errors(self):
+        r"""Print the error and observed order of each level"""
+        levels = [job for job in self.jobs
+                      if getattr(job, "error", None) is not None]
+        if len(levels) == 0:
+            return
+        norms = ["l1", "l2", "linf"]
+        print(f"Error in field {self.field} against ratio "
+              f"{self.reference_ratio}:")
+        print("  ratio" + "".join(f"  {norm:>10s}  {'order':>5s}"
+                                  for norm in norms))
+        for job in levels:
+            line = f"  {job.ratio:>5d}"
+            for norm in norms:
+                order = (job.order or {}).get(norm)
+                order = "" if order is None else f"{order:5.2f}"
+                line += f"  {job.error[norm]:10.3e}  {order:>5s}"
+            print(line)
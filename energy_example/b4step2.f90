@@ -26,8 +26,11 @@ subroutine b4step2(mbc,mx,my,meqn,q,xlower,ylower,dx,dy,t,dt,maux,aux,actualstep
 
     use storm_module, only: set_storm_fields, pressure_index
 
-    use splitting_module, only: test_type
+    use splitting_module, only: test_type, timing
+    use timing_module, only: timer_start, timer_stop, b4step2_timer
     use energy_module, only: U, R_m, dp
+    use energy_module, only: pressure_table, profile_table, table_dr, table_r_max
+    use energy_module, only: ambient_radius
 
     implicit none
 
@@ -43,9 +46,13 @@ subroutine b4step2(mbc,mx,my,meqn,q,xlower,ylower,dx,dy,t,dt,maux,aux,actualstep
     integer :: index,i,j,k,dummy
     ! real(kind=8) :: h,u,v
 
-    real(kind=8) :: x, y
+    real(kind=8) :: x, y, r, s, z, dist_x, dist_y
     real(kind=8), parameter :: PI = 3.141592654d0
 
+    integer(kind=8) :: start_clock
+
+    if (timing) start_clock = timer_start()
+
     ! Check for NaNs in the solution
     call check4nans(meqn,mbc,mx,my,q,t,1)
 
@@ -68,13 +75,41 @@ subroutine b4step2(mbc,mx,my,meqn,q,xlower,ylower,dx,dy,t,dt,maux,aux,actualstep
     ! Set wind and pressure aux variables for this grid
     ! call set_storm_fields(maux,mbc,mx,my,xlower,ylower,dx,dy,t,aux)
     if (test_type == 1) then
-        do j=1 - mbc, my + mbc    
-            y = ylower + (j - 0.5d0) * dy
-            do i=1 - mbc, mx + mbc
-                x = xlower + (i - 0.5d0) * dx
-                aux(pressure_index, i, j) = ambient_pressure - dp * (1.d0 - exp(-R_m / sqrt((x - U * t)**2 + y**2)))
+        ! Distance from the storm center to the patch including ghost cells
+        dist_x = max(xlower - mbc * dx - U * t, U * t - (xlower + (mx + mbc) * dx), 0.d0)
+        dist_y = max(ylower - mbc * dy, -(ylower + (my + mbc) * dy), 0.d0)
+        if (sqrt(dist_x**2 + dist_y**2) >= ambient_radius) then
+            aux(pressure_index, :, :) = ambient_pressure
+        else if (pressure_table) then
+            do j=1 - mbc, my + mbc
+                y = ylower + (j - 0.5d0) * dy
+                do i=1 - mbc, mx + mbc
+                    x = xlower + (i - 0.5d0) * dx
+                    r = sqrt((x - U * t)**2 + y**2)
+                    if (r < table_r_max) then
+                        s = r / table_dr
+                        k = int(s)
+                        s = s - k
+                        aux(pressure_index, i, j) = ambient_pressure - dp      &
+                            * ((1.d0 - s) * profile_table(k) + s * profile_table(k + 1))
+                    else
+                        ! Series of 1 - exp(-z) for z = R_m / r < 1 / 40
+                        z = R_m / r
+                        aux(pressure_index, i, j) = ambient_pressure - dp * z * (1.d0 - z * (0.5d0 - z / 6.d0))
+                    end if
+                end do
             end do
-        end do
+        else
+            do j=1 - mbc, my + mbc    
+                y = ylower + (j - 0.5d0) * dy
+                do i=1 - mbc, mx + mbc
+                    x = xlower + (i - 0.5d0) * dx
+                    aux(pressure_index, i, j) = ambient_pressure - dp * (1.d0 - exp(-R_m / sqrt((x - U * t)**2 + y**2)))
+                end do
+            end do
+        end if
     end if
 
+    if (timing) call timer_stop(b4step2_timer, start_clock)
+
 end subroutine b4step2
@@ -9,7 +9,7 @@
 ! ******************************************************************
 subroutine conck(level, nvar, naux, time, rest)
 
-    use, intrinsic :: iso_fortran_env, only: real64, real128
+    use, intrinsic :: iso_fortran_env, only: real64, real128, int64
     use ieee_arithmetic
 
     use geoclaw_module, only: rho, g => grav
@@ -17,9 +17,16 @@ subroutine conck(level, nvar, naux, time, rest)
     use amr_module, only: levelptr, store1, storeaux, ndilo, ndihi, ndjlo, ndjhi
     use amr_module, only: alloc, hxposs, hyposs, possk, lstart, node, nghost, outunit
     use amr_module, only: t0, init_mass, init_KE, init_PE, rnode
-    use amr_module, only: cornxlo, cornylo
+    use amr_module, only: cornxlo, cornylo, mcapa, maxlv
 
     use energy_module, only: R_m, press_U => U
+    use energy_module, only: binary_diagnostics, diagnostics_unit
+    use energy_module, only: diagnostics_file
+    use energy_module, only: conck_step_interval, conck_time_interval
+    use energy_module, only: conck_window
+
+    use splitting_module, only: timing
+    use timing_module, only: timer_start, timer_stop, conck_timer
 
     ! Input
     integer, intent(in) :: level, nvar, naux
@@ -27,7 +34,10 @@ subroutine conck(level, nvar, naux, time, rest)
     logical, intent(in) :: rest
 
     ! Locals
-    integer :: mptr, nx, ny, mitot, mjtot
+    integer :: mptr, nx, ny, mitot, mjtot, n, num_patches, k, kaux
+    integer :: i_lo, i_hi, j_lo, j_hi
+    integer, allocatable :: patches(:)
+    real(kind=real128), allocatable :: patch_mass(:), patch_KE(:), patch_PE(:)
     real(kind=8) :: hx, hy, dt
     real(kind=real128) :: mass, energy, KE, PE, x_low, y_low, x, y, h, u, v
 
@@ -37,9 +47,23 @@ subroutine conck(level, nvar, naux, time, rest)
 
     real(kind=real128) :: x_min, y_min, x_max, y_max
 
-    ! Indexing
-    iadd(ivar,i,j) = loc + ivar - 1 + nvar * ((j - 1) * mitot + i - 1)
-    iaddaux(m,i,j) = locaux + m - 1 + naux * (i - 1) + naux * mitot * (j - 1)
+    logical, save :: diagnostics_open = .false.
+    ! Cadence of each level, kept apart so that the sampling of a level does
+    ! not depend on the number of substeps of the finer levels
+    integer, save :: num_calls(maxlv) = 0
+    real(kind=8), save :: last_time(maxlv) = -huge(1.d0)
+
+    integer(kind=int64) :: start_clock
+
+    ! Sampling cadence, the check at the initial time is always done,
+    ! skipped calls are not timed
+    num_calls(level) = num_calls(level) + 1
+    if (abs(time - t0) >= 1e-8) then
+        if (mod(num_calls(level) - 1, max(conck_step_interval, 1)) /= 0) return
+        if (time < last_time(level) + conck_time_interval) return
+    end if
+    if (timing) start_clock = timer_start()
+    last_time(level) = time
 
     x_min = ieee_value(x_min, ieee_positive_inf)
     y_min = ieee_value(y_min, ieee_positive_inf)
@@ -49,12 +73,35 @@ subroutine conck(level, nvar, naux, time, rest)
     hx      = hxposs(level)
     hy      = hyposs(level)
     dt      = possk(level)
-    mass = 0.0_real128
-    KE = 0.0_real128
-    PE = 0.0_real128
 
+    if (mcapa /= 0) then
+        stop "Does not handle capacity..."
+    end if
+
+    ! Gather the patches on this level so they can be spread over threads
+    num_patches = 0
     mptr = lstart(level)
     do while(mptr /= 0)
+        num_patches = num_patches + 1
+        mptr = node(levelptr,mptr)
+    end do
+    allocate(patches(num_patches))
+    allocate(patch_mass(num_patches), patch_KE(num_patches), patch_PE(num_patches))
+    mptr = lstart(level)
+    do n = 1, num_patches
+        patches(n) = mptr
+        mptr = node(levelptr,mptr)
+    end do
+
+    ! Each patch is summed on its own, in the same order regardless of the
+    ! thread that handles it
+    !$OMP PARALLEL DO PRIVATE(n, mptr, loc, locaux, nx, ny, mitot, mjtot) &
+    !$OMP             PRIVATE(x_low, y_low, i, j, k, kaux, x, y, h, b, eta, u, v) &
+    !$OMP             PRIVATE(i_lo, i_hi, j_lo, j_hi) &
+    !$OMP             REDUCTION(min: x_min, y_min) REDUCTION(max: x_max, y_max) &
+    !$OMP             SCHEDULE(DYNAMIC, 1)
+    do n = 1, num_patches
+        mptr   = patches(n)
         loc    = node(store1,mptr)
         locaux = node(storeaux,mptr)
         nx     = node(ndihi,mptr) - node(ndilo,mptr) + 1
@@ -64,45 +111,68 @@ subroutine conck(level, nvar, naux, time, rest)
         x_low = rnode(cornxlo,mptr)-nghost*hx
         y_low = rnode(cornylo,mptr)-nghost*hy
 
-        ! print *, nghost * hx, nghost * hy
-        ! print *, mptr, x_low, y_low, rnode(cornxlo, mptr), rnode(cornylo, mptr)
-
-        if (mcapa == 0) then
-            do j  = nghost+1, mjtot-nghost
-                y = y_low + (j - 0.5_real128) * hy
-                do i  = nghost+1, mitot-nghost
-                    x = x_low + (i - 0.5_real128) * hx
-                    if (max(abs(x - press_U * time), abs(y)) <= R_m) then
-                        h = alloc(iadd(1,i,j))
-                        b = alloc(iaddaux(1,i,j))
-                        eta = h + b
-                        if (h > 1e-3_real128) then
-                            u = alloc(iadd(2,i,j)) / h
-                            v = alloc(iadd(3,i,j)) / h
-                        else
-                            u = 0.0_real128
-                            v = 0.0_real128
-                        end if
-
-                        mass = mass + h
-                        KE = KE + (u**2 + v**2) * h 
-                        PE = PE + eta**2
+        patch_mass(n) = 0.0_real128
+        patch_KE(n) = 0.0_real128
+        patch_PE(n) = 0.0_real128
+
+        i_lo = nghost + 1
+        i_hi = mitot - nghost
+        j_lo = nghost + 1
+        j_hi = mjtot - nghost
+        if (conck_window) then
+            ! Index window of the cells whose centers may lie in the box, the
+            ! box test is still applied to each of them below
+            i_lo = max(i_lo, floor((press_U * time - R_m - x_low) / hx + 0.5_real128))
+            i_hi = min(i_hi, ceiling((press_U * time + R_m - x_low) / hx + 0.5_real128))
+            j_lo = max(j_lo, floor((-R_m - y_low) / hy + 0.5_real128))
+            j_hi = min(j_hi, ceiling((R_m - y_low) / hy + 0.5_real128))
+            if (i_lo > i_hi .or. j_lo > j_hi) cycle
+        end if
+
+        do j  = j_lo, j_hi
+            y = y_low + (j - 0.5_real128) * hy
+            do i  = i_lo, i_hi
+                x = x_low + (i - 0.5_real128) * hx
+                if (max(abs(x - press_U * time), abs(y)) <= R_m) then
+                    k = loc + nvar * ((j - 1) * mitot + i - 1)
+                    kaux = locaux + naux * (i - 1) + naux * mitot * (j - 1)
+                    h = alloc(k)
+                    b = alloc(kaux)
+                    eta = h + b
+                    if (h > 1e-3_real128) then
+                        u = alloc(k + 1) / h
+                        v = alloc(k + 2) / h
                     else
-                        x_min = min(x_min, x)
-                        y_min = min(y_min, y)
-                        x_max = max(x_max, x)
-                        y_max = max(y_max, y)
+                        u = 0.0_real128
+                        v = 0.0_real128
                     end if
-                end do
-            end do
-        else
-            stop "Does not handle capacity..."
-        end if
 
-        mptr = node(levelptr,mptr)
+                    patch_mass(n) = patch_mass(n) + h
+                    patch_KE(n) = patch_KE(n) + (u**2 + v**2) * h 
+                    patch_PE(n) = patch_PE(n) + eta**2
+                else
+                    x_min = min(x_min, x)
+                    y_min = min(y_min, y)
+                    x_max = max(x_max, x)
+                    y_max = max(y_max, y)
+                end if
+            end do
+        end do
     end do
+    !$OMP END PARALLEL DO
     ! print *, x_min, y_min, x_max, y_max
 
+    ! Deterministic reduction in patch order
+    mass = 0.0_real128
+    KE = 0.0_real128
+    PE = 0.0_real128
+    do n = 1, num_patches
+        mass = mass + patch_mass(n)
+        KE = KE + patch_KE(n)
+        PE = PE + patch_PE(n)
+    end do
+    deallocate(patches, patch_mass, patch_KE, patch_PE)
+
     mass = mass * rho(1) * hx * hy
     KE = KE * 0.5_real128 * rho(1) * hx * hy
     PE = PE * 0.5_real128 * rho(1) * g * hx * hy
@@ -119,9 +189,38 @@ subroutine conck(level, nvar, naux, time, rest)
         print *, 'Total E at initial time: ', init_PE + init_KE
     endif
 
-    write(outunit, out_form_1) time, mass, mass - init_mass
-    write(outunit, out_form_2) time, KE, KE - init_KE
-    write(outunit, out_form_3) time, PE, PE - init_PE
+    if (binary_diagnostics) then
+        ! Little-endian records of 8 * 8 bytes, diagnostics_dtype in
+        ! plot_energy.py:
+        !   t (real64), level (int64), mass, KE, PE, mass diff, KE diff and
+        !   PE diff (real64)
+        if (.not. diagnostics_open) then
+            if (rest) then
+                open(unit=diagnostics_unit, file=diagnostics_file,         &
+                     access='stream', form='unformatted', status='unknown', &
+                     position='append', convert='little_endian')
+            else
+                open(unit=diagnostics_unit, file=diagnostics_file,         &
+                     access='stream', form='unformatted', status='replace', &
+                     convert='little_endian')
+            end if
+            diagnostics_open = .true.
+        end if
+        write(diagnostics_unit) real(time, real64), int(level, int64),     &
+                                real(mass, real64), real(KE, real64),      &
+                                real(PE, real64),                          &
+                                real(mass - init_mass, real64),            &
+                                real(KE - init_KE, real64),                &
+                                real(PE - init_PE, real64)
+        ! Keep the records of a run that is stopped or killed
+        flush(diagnostics_unit)
+    else
+        write(outunit, out_form_1) time, mass, mass - init_mass
+        write(outunit, out_form_2) time, KE, KE - init_KE
+        write(outunit, out_form_3) time, PE, PE - init_PE
+    end if
+
+    if (timing) call timer_stop(conck_timer, start_clock)
 
     ! if (abs(totmass - tmass0) > 1d-20) then
     !     print *, "*** mass difference, ", totmass - tmass0,"at t = ", time
@@ -7,6 +7,30 @@ module energy_module
 
     real(kind=8) :: U, R_m, dp
 
+    ! Conservation diagnostics written by conck
+    logical :: binary_diagnostics = .false.
+    integer, parameter :: diagnostics_unit = 67
+    character(len=*), parameter :: diagnostics_file = 'conservation.bin'
+
+    ! Conservation check cadence, counted separately on each level, and
+    ! whether to restrict it to the cells that may lie in the moving box
+    integer :: conck_step_interval = 1
+    real(kind=8) :: conck_time_interval = 0.d0
+    logical :: conck_window = .false.
+
+    ! Tabulated radial pressure profile 1 - exp(-R_m / r) used by b4step2,
+    ! sampled every table_dr out to table_r_max
+    logical :: pressure_table = .false.
+    integer, parameter :: table_resolution = 500
+    integer, parameter :: table_extent = 40
+    real(kind=8) :: table_dr, table_r_max
+    real(kind=8), allocatable :: profile_table(:)
+
+    ! Patches further than ambient_radius from the storm center see a
+    ! pressure deficit below pressure_tolerance and are set to ambient
+    real(kind=8) :: pressure_tolerance = 0.d0
+    real(kind=8) :: ambient_radius = huge(1.d0)
+
 contains
 
     subroutine set_energy(data_file)
@@ -16,6 +40,8 @@ contains
         character(len=*), optional, intent(in) :: data_file
         integer, parameter :: unit = 13
         character(len=200) :: line
+        integer :: k
+        real(kind=8) :: r
 
         if (.not.module_setup) then
 
@@ -29,8 +55,31 @@ contains
             read(unit, *) U
             read(unit, *) R_m
             read(unit, *) dp
+            read(unit, *) binary_diagnostics
+            read(unit, *) conck_step_interval
+            read(unit, *) conck_time_interval
+            read(unit, *) conck_window
+            read(unit, *) pressure_table
+            read(unit, *) pressure_tolerance
 
             close(unit)
+
+            if (pressure_table) then
+                table_dr = R_m / real(table_resolution, kind=8)
+                table_r_max = table_extent * R_m
+                allocate(profile_table(0:table_resolution * table_extent + 1))
+                profile_table(0) = 1.d0
+                do k = 1, ubound(profile_table, 1)
+                    r = k * table_dr
+                    profile_table(k) = 1.d0 - exp(-R_m / r)
+                end do
+            end if
+
+            if (pressure_tolerance >= dp) then
+                ambient_radius = 0.d0
+            else if (pressure_tolerance > 0.d0) then
+                ambient_radius = R_m / (-log(1.d0 - pressure_tolerance / dp))
+            end if
             module_setup = .true.
 
         end if
@@ -1,56 +1,263 @@
 #!/usr/bin/env python
 
 import os
+import re
+import time
+import collections
+import concurrent.futures
+import functools
 
 import numpy as np
-import scipy.integrate as integrate
 import matplotlib.pyplot as plt
 
 import clawpack.geoclaw.surge.plot as surgeplot
 
-def E0(t, rho, g, dp, R_m, U):
-    f = lambda x, y: (1 - np.exp(-R_m / np.sqrt((x - U * t)**2 + y**2)))**2
-    return 0.5 / (rho * g) * dp**2 * integrate.dblquad(f, -R_m, R_m, -R_m, R_m)[0]
+@functools.lru_cache(maxsize=None)
+def quadrature_table(order):
+    r"""Gauss-Legendre nodes and weights on [-1, 1] of the given order"""
+    return np.polynomial.legendre.leggauss(order)
 
-def parse_amr_log(path=None):
+
+def E0_integral(c, order=64, chunk_size=2**22):
+    r"""Scaled energy integral for an array of storm offsets *c*
+
+    Computes
+
+    .. math::
+        \int_{-1}^{1} \int_{-1}^{1} (1 - e^{-1 / \rho})^2 dy dx, \quad
+        \rho = \sqrt{(x - c)^2 + y^2}
+
+    with a tensor Gauss-Legendre rule of the given order for every entry of
+    *c* at once.  The integrand is smooth (all derivatives of
+    :math:`e^{-1/\rho}` vanish at :math:`\rho = 0`) so the rule converges
+    spectrally.  *chunk_size* bounds the number of integrand evaluations held
+    in memory at a time.
+    """
+    nodes, weights = quadrature_table(order)
+    c = np.asarray(c, dtype=float)
+    c_flat = c.reshape(-1)
+    integral = np.empty(c_flat.shape)
+    step = max(1, chunk_size // order**2)
+    for start in range(0, c_flat.size, step):
+        x = nodes[None, :] - c_flat[start:start + step, None]
+        with np.errstate(divide='ignore'):
+            rho = np.sqrt(x[:, :, None]**2 + nodes[None, None, :]**2)
+            f = (1.0 - np.exp(-1.0 / rho))**2
+        integral[start:start + step] = f @ weights @ weights
+    return integral.reshape(c.shape)
+
+
+def E0(t, rho, g, dp, R_m, U, tol=1.49e-8, order=None):
+    r"""Energy of the pressure induced surface in the box of half-width R_m
+
+    *t*, *R_m* and *U* may be arrays and are broadcast against each other.  By
+    default the quadrature order is doubled until the relative change of
+    every integral is below *tol*, the default tolerance of
+    ``scipy.integrate.dblquad``.  If *order* is given that fixed order is used
+    instead.
+    """
+    t, R_m, U = np.broadcast_arrays(t, R_m, U)
+    c = U * t / R_m
+    if order is not None:
+        integral = E0_integral(c, order)
+    else:
+        order = 16
+        integral = E0_integral(c, order)
+        while True:
+            order *= 2
+            refined = E0_integral(c, order)
+            converged = np.all(abs(refined - integral) <= tol * abs(refined))
+            integral = refined
+            if converged or order >= 1024:
+                break
+
+    energy = 0.5 / (rho * g) * dp**2 * R_m**2 * integral
+    if energy.ndim == 0:
+        return float(energy)
+    return energy
+
+# Record of the conservation check written by conck each time it is called
+conservation_dtype = np.dtype([("t", np.float64),
+                               ("mass", np.float64),
+                               ("KE", np.float64),
+                               ("PE", np.float64),
+                               ("mass_diff", np.float64),
+                               ("KE_diff", np.float64),
+                               ("PE_diff", np.float64)])
+
+# Conservation lines written by conck, all with the fixed layout of its
+# formats: "time t = " e12.5 ",  total " <kind> " = " e22.15 "  diff = " e22.15
+_amr_log_line = re.compile(rb"^time t =.*$", re.MULTILINE)
+_amr_log_width = 90
+_amr_log_columns = {"t": (9, 21), "kind": (30, 31), "value": (37, 59),
+                    "diff": (68, 90)}
+_amr_log_fields = [(b"m", "mass", "mass_diff"), (b"K", "KE", "KE_diff"),
+                   (b"P", "PE", "PE_diff")]
+
+
+def _amr_log_column(lines, name):
+    r"""Fixed column *name* of the byte array *lines* as byte strings"""
+    start, stop = _amr_log_columns[name]
+    return np.ascontiguousarray(lines[:, start:stop]).view(
+                                                f"S{stop - start}")[:, 0]
+
+
+def _parse_amr_log_block(block):
+    r"""Columns of the conservation lines in *block* keyed by kind
+
+    The lines are picked out with a regular expression and, as they all have
+    the same width, laid out as rows of a byte array whose fixed columns are
+    converted to floats by numpy at once.
+    """
+    lines = _amr_log_line.findall(block)
+    text = b"".join(lines)
+    if len(text) != _amr_log_width * len(lines):
+        raise ValueError("Invalid conservation line found.")
+    lines = np.frombuffer(text, dtype="S1").reshape((len(lines),
+                                                     _amr_log_width))
+    kinds = _amr_log_column(lines, "kind")
+
+    columns = {}
+    for (kind, value, diff) in _amr_log_fields:
+        rows = lines[kinds == kind]
+        columns[kind] = {name: _amr_log_column(rows, name).astype(float)
+                         for name in ("t", "value", "diff")
+                         if name != "t" or kind == b"m"}
+    if sum(kind_columns["value"].shape[0]
+           for kind_columns in columns.values()) < len(lines):
+        raise ValueError("Invalid type of conservation found.")
+    return columns
+
+
+def _amr_log_chunks(amr_file, follow=False, poll_interval=1.0,
+                          idle_timeout=60.0, chunk_size=2**24):
+    r"""Yield blocks of complete lines of *amr_file*, about *chunk_size* bytes
+
+    If *follow* is set the file is polled every *poll_interval* seconds once
+    its end is reached, and iteration stops after it has not grown for
+    *idle_timeout* seconds.  A partially written last line is held back until
+    it is complete.
+    """
+    partial = b""
+    idle_time = 0.0
+    while True:
+        block = amr_file.read(chunk_size)
+        if len(block) > 0:
+            idle_time = 0.0
+            block = partial + block
+            end = block.rfind(b"\n") + 1
+            partial = block[end:]
+            if end > 0:
+                yield block[:end]
+        elif not follow or idle_time >= idle_timeout:
+            break
+        else:
+            time.sleep(poll_interval)
+            idle_time += poll_interval
+    if len(partial) > 0 and not follow:
+        yield partial
+
+
+def read_amr_log(path=None, follow=False, poll_interval=1.0, idle_timeout=60.0,
+                       max_workers=None):
+    r"""Read the conservation records from a fort.amr file in one pass
+
+    The file is read in blocks that are parsed by :func:`_parse_amr_log_block`
+    in *max_workers* processes (all cores by default), at most two blocks per
+    process being in flight.  The parsed columns are kept per block and copied
+    once into a structured array of ``conservation_dtype`` holding exactly the
+    records found.  If *follow* is set the file is treated as still being
+    written to and parsed as it grows, see :func:`_amr_log_chunks`.  Only
+    complete records (mass, KE and PE) are returned.
+    """
 
     if path is None:
         path = os.path.join(os.getcwd(), "_output", "fort.amr")
     else:
         path = os.path.join(path, "fort.amr")
+    if max_workers is None:
+        max_workers = 1 if follow else (os.cpu_count() or 1)
+
+    blocks = []
+    with open(path, 'rb') as amr_file:
+        chunks = _amr_log_chunks(amr_file, follow, poll_interval,
+                                 idle_timeout)
+        if max_workers == 1:
+            blocks = [_parse_amr_log_block(block) for block in chunks]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers) as pool:
+                pending = collections.deque()
+                for block in chunks:
+                    pending.append(pool.submit(_parse_amr_log_block, block))
+                    if len(pending) >= 2 * max_workers:
+                        blocks.append(pending.popleft().result())
+                while len(pending) > 0:
+                    blocks.append(pending.popleft().result())
+
+    columns = {kind: {name: np.concatenate([block[kind][name]
+                                            for block in blocks]
+                                           + [np.empty(0)])
+                      for name in ("t", "value", "diff")
+                      if name != "t" or kind == b"m"}
+               for (kind, value, diff) in _amr_log_fields}
+    num_records = min(kind_columns["value"].shape[0]
+                      for kind_columns in columns.values())
+    records = np.empty(num_records, dtype=conservation_dtype)
+    records["t"] = columns[b"m"]["t"][:num_records]
+    for (kind, value, diff) in _amr_log_fields:
+        records[value] = columns[kind]["value"][:num_records]
+        records[diff] = columns[kind]["diff"][:num_records]
+    return records
+
+
+def parse_amr_log(path=None, follow=False):
+    r"""Conservation records from fort.amr as a list of arrays
+
+    Returns the arrays ``[t, mass, KE, PE, mass_diff, KE_diff, PE_diff]``, see
+    :func:`read_amr_log`.
+    """
+    records = read_amr_log(path, follow=follow)
+    return [records[name] for name in conservation_dtype.names]
+
+
+# Record written by conck to conservation.bin when binary_diagnostics is set,
+# little-endian as conck opens the file with convert='little_endian'
+diagnostics_dtype = np.dtype([("t", "<f8"),
+                              ("level", "<i8"),
+                              ("mass", "<f8"),
+                              ("KE", "<f8"),
+                              ("PE", "<f8"),
+                              ("mass_diff", "<f8"),
+                              ("KE_diff", "<f8"),
+                              ("PE_diff", "<f8")])
 
-    t = []
-    mass = []
-    KE = []
-    PE = []
-    mass_diff = []
-    KE_diff = []
-    PE_diff = []
-    with open(path, 'r') as amr_file:
-        for line in amr_file:
-            if "time t =" in line:
-                if line.split()[5] == "mass":
-                    t.append(float(line.split()[3].strip(',')))
-                    mass.append(float(line.split()[7]))
-                    mass_diff.append(float(line.split()[10]))
-                elif line.split()[5] == 'KE':
-                    KE.append(float(line.split()[7]))
-                    KE_diff.append(float(line.split()[10]))
-                elif line.split()[5] == 'PE':
-                    PE.append(float(line.split()[7]))
-                    PE_diff.append(float(line.split()[10]))
-                else:
-                    raise ValueError("Invalid type of conservation found.")
-
-    t = np.array(t)
-    mass = np.array(mass)
-    KE = np.array(KE)
-    PE = np.array(PE)
-    mass_diff = np.array(mass_diff)
-    KE_diff = np.array(KE_diff)
-    PE_diff = np.array(PE_diff)
-
-    return [t, mass, KE, PE, mass_diff, KE_diff, PE_diff]
+
+def read_diagnostics(path=None):
+    r"""Memory-map the binary conservation records written by conck
+
+    A trailing record that is still being written is ignored, so this can be
+    called repeatedly on the output of a running simulation.
+    """
+
+    if path is None:
+        path = os.path.join(os.getcwd(), "_output", "conservation.bin")
+    else:
+        path = os.path.join(path, "conservation.bin")
+
+    num_records = os.path.getsize(path) // diagnostics_dtype.itemsize
+    if num_records == 0:
+        return np.empty(0, dtype=diagnostics_dtype)
+    return np.memmap(path, dtype=diagnostics_dtype, mode='r',
+                     shape=(num_records,))
+
+
+def load_conservation(path=None):
+    r"""Conservation records from conservation.bin if present, else fort.amr"""
+    if path is None:
+        path = os.path.join(os.getcwd(), "_output")
+    if os.path.exists(os.path.join(path, "conservation.bin")):
+        return read_diagnostics(path)
+    return read_amr_log(path)
 
 
 def plot_energy(base_path=None):
@@ -66,9 +273,11 @@ def plot_energy(base_path=None):
     U = 0
     T0 = R_m / np.sqrt(g * d)
     dp = eta_0 * rho * g
-    t, mass, KE, PE, mass_diff, KE_diff, PE_diff = parse_amr_log(os.path.join(base_path, "_output"))
+    records = load_conservation(os.path.join(base_path, "_output"))
+    KE = records["KE"]
+    PE = records["PE"]
     
-    t /= T0
+    t = records["t"] / T0
     E = KE + PE
     E_norm = E0(0.0, rho, g, dp, R_m, U)
 
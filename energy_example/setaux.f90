@@ -42,7 +42,8 @@ subroutine setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux)
 
     use adjoint_module, only : adjoint_flagging,innerprod_index
 
-    use splitting_module, only: split_forcing, test_type
+    use splitting_module, only: split_forcing, test_type, timing
+    use timing_module, only: timer_start, timer_stop, setaux_timer
 
     implicit none
 
@@ -59,6 +60,10 @@ subroutine setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux)
     integer :: skipcount,iaux,ilo,jlo
     real(kind=8), parameter :: PI = 3.141592654d0
 
+    integer(kind=8) :: start_clock
+
+    if (timing) start_clock = timer_start()
+
     ! Lat-Long coordinate system in use, check input variables
     if (coordinate_system == 2) then
         if (mcapa /= 2 .or. maux < 3) then
@@ -243,6 +248,8 @@ subroutine setaux(mbc,mx,my,xlow,ylow,dx,dy,maux,aux)
         call set_friction_field(mx, my, mbc, maux, xlow, ylow, dx, dy, aux)
     endif
 
+    if (timing) call timer_stop(setaux_timer, start_clock)
+
 contains
 
     ! Provide wrapper function for providing periodic coordinates
@@ -34,6 +34,8 @@ class SplittingData(data.ClawData):
         # GeoClaw physics parameters
         self.add_attribute('split_forcing', False)
         self.add_attribute('test_type', 'pressure')
+        self.add_attribute('fused_source', False)
+        self.add_attribute('timing', False)
 
     def write(self, data_source='setrun.py', out_file='splitting.data'):
 
@@ -46,6 +48,8 @@ class SplittingData(data.ClawData):
         else:
             self.test_type = 0
         self.data_write('test_type', description="(Pressure or bathy test)")
+        self.data_write('fused_source', description="(Fuse source terms)")
+        self.data_write('timing', description="(Time custom routines)")
         self.close_data_file()
 
 
@@ -60,12 +64,34 @@ class EnergyData(data.ClawData):
         self.add_attribute('R_m', 1.0)
         self.add_attribute('dp', 1.0)
 
+        # Conservation diagnostics
+        self.add_attribute('binary_diagnostics', False)
+        self.add_attribute('conck_step_interval', 1)
+        self.add_attribute('conck_time_interval', 0.0)
+        self.add_attribute('conck_window', False)
+
+        # Pressure field evaluation
+        self.add_attribute('pressure_table', False)
+        self.add_attribute('pressure_tolerance', 0.0)
+
     def write(self, data_source='setrun.py', out_file='energy.data'):
 
         self.open_data_file(out_file, data_source)
         self.data_write('U')
         self.data_write('R_m')
         self.data_write('dp')
+        self.data_write('binary_diagnostics', 
+                        description="(Write conck records to conservation.bin)")
+        self.data_write('conck_step_interval', 
+                        description="(Check conservation every N calls per level)")
+        self.data_write('conck_time_interval', 
+                        description="(Minimum time between checks)")
+        self.data_write('conck_window', 
+                        description="(Only visit cells near the moving box)")
+        self.data_write('pressure_table', 
+                        description="(Interpolate the pressure profile)")
+        self.data_write('pressure_tolerance', 
+                        description="(Deficit below which patches are ambient)")
         self.close_data_file()
 
 # ------------------------------
@@ -115,6 +141,18 @@ def setrun(claw_pkg='geoclaw'):
     rundata.energy_data.U = Fr[2] * np.sqrt(rundata.geo_data.gravity * d)
     rundata.energy_data.R_m = R_m
     rundata.energy_data.dp = eta_0 * rundata.geo_data.rho * rundata.geo_data.gravity
+    # Write conservation checks to fort.amr, True for binary records in
+    # conservation.bin
+    rundata.energy_data.binary_diagnostics = False
+    # Check conservation on every call, only visiting patches near the box
+    rundata.energy_data.conck_step_interval = 1
+    rundata.energy_data.conck_time_interval = 0.0
+    rundata.energy_data.conck_window = True
+    # Evaluate the pressure field exactly, True to interpolate it from a
+    # lookup table, patches are only set to the ambient pressure if
+    # pressure_tolerance > 0
+    rundata.energy_data.pressure_table = False
+    rundata.energy_data.pressure_tolerance = 0.0
 
     rundata.topo_data.basin_depth = -d
     rundata.topo_data.shelf_depth = -d
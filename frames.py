@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+r"""Light-weight readers for GeoClaw output frames
+
+Reading a frame through ``clawpack.pyclaw.solution.Solution`` builds every
+patch, state and grid object of the frame even when only a slice of it is
+needed.  The readers here parse the patch headers from ``fort.tXXXX`` and
+``fort.qXXXX`` and, for binary output, memory-map ``fort.bXXXX`` so that only
+the pages backing the requested cells are ever read from disk.  Patch data is
+returned as NumPy views into the mapped file.  ASCII frames are parsed in one
+pass per patch.
+
+Opened frames are kept in a :class:`FrameCache` keyed on the output path,
+frame number and modification time of the frame so that scripts producing
+several figures from the same output parse each frame only once.
+"""
+
+import os
+import glob
+import collections
+
+import numpy as np
+
+
+def frame_file(path, frame, file_type, file_prefix="fort"):
+    r"""Path to the file of *file_type* ('t', 'q', 'b', 'a') for *frame*"""
+    return os.path.join(path, f"{file_prefix}.{file_type}{str(frame).zfill(4)}")
+
+
+def list_frames(path, file_prefix="fort"):
+    r"""Sorted numbers of the frames in *path* with a ``fort.tXXXX`` file"""
+    frames = []
+    for t_path in glob.glob(os.path.join(path, f"{file_prefix}.t*")):
+        suffix = os.path.basename(t_path)[len(file_prefix) + 2:]
+        if suffix.isdigit():
+            frames.append(int(suffix))
+    return sorted(frames)
+
+
+def read_time_file(path, frame, file_prefix="fort"):
+    r"""Read the ``fort.tXXXX`` file of *frame*
+
+    Returns a dictionary with the time, number of equations, patches and aux
+    fields, number of dimensions, number of ghost cells and the file format.
+    """
+    with open(frame_file(path, frame, "t", file_prefix), "r") as t_file:
+        values = [line.split()[0] for line in t_file if len(line.split()) > 0]
+
+    info = {"t": float(values[0]),
+            "num_eqn": int(values[1]),
+            "num_patches": int(values[2]),
+            "num_aux": int(values[3]),
+            "num_dim": int(values[4]),
+            "num_ghost": 2,
+            "file_format": "ascii"}
+    if len(values) > 5:
+        info["num_ghost"] = int(values[5])
+    if len(values) > 6:
+        info["file_format"] = values[6].lower()
+    elif os.path.exists(frame_file(path, frame, "b", file_prefix)):
+        info["file_format"] = "binary"
+    return info
+
+
+class Patch(object):
+    r"""Single patch of a frame
+
+    ``q`` has shape ``(num_eqn, mx, my)`` and, for binary output, is a view
+    into the memory-mapped data file.  ``aux`` of shape ``(num_aux, mx, my)``
+    is only set once read by :meth:`Frame.read_aux`.
+    """
+
+    def __init__(self, patch_id, level, num_cells, lower, delta, q=None):
+        self.id = patch_id
+        self.level = level
+        self.num_cells = num_cells
+        self.lower = lower
+        self.delta = delta
+        self.q = q
+        self.aux = None
+
+    def __str__(self):
+        return (f"Patch {self.id} (level {self.level}): "
+                f"{self.num_cells[0]} x {self.num_cells[1]} at "
+                f"({self.lower[0]}, {self.lower[1]})")
+
+    @property
+    def upper(self):
+        return [self.lower[n] + self.num_cells[n] * self.delta[n]
+                for n in range(2)]
+
+    @property
+    def centers(self):
+        return [self.lower[n] + (np.arange(self.num_cells[n]) + 0.5)
+                                                              * self.delta[n]
+                for n in range(2)]
+
+    def contains_y(self, y0):
+        return self.lower[1] <= y0 and y0 <= self.upper[1]
+
+    def row_index(self, y0):
+        r"""Index of the row of cells whose centers are within dy / 2 of y0"""
+        y = self.centers[1]
+        return np.where(abs(y - y0) <= self.delta[1] / 2.0)[0][0]
+
+
+def read_patch_headers(q_file, num_patches):
+    r"""Read *num_patches* 2D patch headers from an open ``fort.q`` file
+
+    The data following each header (ASCII output) is skipped.  Returns a list
+    of :class:`Patch` without data.
+    """
+    patches = []
+    for n in range(num_patches):
+        header = []
+        while len(header) < 8:
+            line = q_file.readline()
+            if len(line) == 0:
+                raise IOError(f"Expected {num_patches} patches, found {n}.")
+            if len(line.split()) > 0:
+                header.append(line.split()[0])
+        patches.append(Patch(int(header[0]), int(header[1]),
+                             [int(header[2]), int(header[3])],
+                             [float(header[4]), float(header[5])],
+                             [float(header[6]), float(header[7])]))
+    return patches
+
+
+def read_ascii_patches(q_file, num_patches, num_eqn):
+    r"""Read *num_patches* 2D patches and their data from an ASCII ``fort.q``"""
+    patches = []
+    for n in range(num_patches):
+        patch = read_patch_headers(q_file, 1)[0]
+        mx, my = patch.num_cells
+        lines = []
+        while len(lines) < mx * my:
+            line = q_file.readline()
+            if len(line) == 0:
+                raise IOError(f"Patch {patch.id} is missing data.")
+            if len(line.split()) > 0:
+                lines.append(line)
+        # Rows are written with i varying fastest
+        q = np.array(" ".join(lines).split(), dtype=float)
+        patch.q = q.reshape((my, mx, num_eqn)).transpose((2, 1, 0))
+        patches.append(patch)
+    return patches
+
+
+class Frame(object):
+    r"""Lazily read GeoClaw output frame
+
+    For binary output the data file is memory-mapped when the frame is opened
+    and each :class:`Patch` holds a view into it, for ASCII output the data is
+    parsed when the frame is opened.
+    """
+
+    def __init__(self, path, frame, file_prefix="fort"):
+
+        self.path = path
+        self.frame = frame
+        self.file_prefix = file_prefix
+        info = read_time_file(path, frame, file_prefix)
+        self.t = info["t"]
+        self.num_eqn = info["num_eqn"]
+        self.num_aux = info["num_aux"]
+        self.num_ghost = info["num_ghost"]
+        self.file_format = info["file_format"]
+
+        self._transects = {}
+        self._data = None
+
+        with open(frame_file(path, frame, "q", file_prefix), "r") as q_file:
+            if self.file_format == "ascii":
+                self.patches = read_ascii_patches(q_file, info["num_patches"],
+                                                  self.num_eqn)
+                return
+            self.patches = read_patch_headers(q_file, info["num_patches"])
+
+        self._data = self._map_binary("b")
+        for (patch, q) in zip(self.patches, self._patch_views(self._data,
+                                                              self.num_eqn)):
+            patch.q = q
+
+    def _map_binary(self, file_type):
+        r"""Memory-map the binary file of *file_type* of the frame"""
+        if "binary" not in self.file_format:
+            raise ValueError(f"Unsupported file format {self.file_format}.")
+        dtype = np.float32 if self.file_format == "binary32" else np.float64
+        return np.memmap(frame_file(self.path, self.frame, file_type,
+                                    self.file_prefix), dtype=dtype, mode="r")
+
+    def _patch_views(self, data, num_fields):
+        r"""Views of *data* holding *num_fields* fields for every patch"""
+        # Patches are stored one after another including their ghost cells
+        num_ghost = self.num_ghost
+        views = []
+        start = 0
+        for patch in self.patches:
+            shape = (num_fields, patch.num_cells[0] + 2 * num_ghost,
+                                 patch.num_cells[1] + 2 * num_ghost)
+            end = start + shape[0] * shape[1] * shape[2]
+            values = data[start:end].reshape(shape, order="F")
+            views.append(values[:, num_ghost:-num_ghost, num_ghost:-num_ghost])
+            start = end
+        return views
+
+    def read_aux(self):
+        r"""Read the aux fields of every patch from ``fort.aXXXX``
+
+        Sets ``patch.aux`` of every patch.  The frame must have been written
+        with all aux fields (``output_aux_components = 'all'``) and, unless
+        ``output_aux_onlyonce`` is unset, only the first frame has them.
+        Raises ``IOError`` if the frame has no aux file and ``ValueError`` if
+        the file does not match the patches of the frame.
+        """
+        if self.num_aux == 0:
+            raise ValueError(f"Frame {self.frame} has no aux fields.")
+        mismatch = ValueError(f"Aux file of frame {self.frame} does not "
+                              "match its patches.")
+        if self.file_format == "ascii":
+            with open(frame_file(self.path, self.frame, "a",
+                                 self.file_prefix), "r") as a_file:
+                aux_patches = read_ascii_patches(a_file, len(self.patches),
+                                                 self.num_aux)
+            for (patch, aux_patch) in zip(self.patches, aux_patches):
+                if (aux_patch.level, aux_patch.num_cells, aux_patch.lower) \
+                        != (patch.level, patch.num_cells, patch.lower):
+                    raise mismatch
+            views = [aux_patch.q for aux_patch in aux_patches]
+        else:
+            data = self._map_binary("a")
+            size = sum(self.num_aux * (patch.num_cells[0] + 2 * self.num_ghost)
+                                    * (patch.num_cells[1] + 2 * self.num_ghost)
+                       for patch in self.patches)
+            if data.size != size:
+                raise mismatch
+            views = self._patch_views(data, self.num_aux)
+        for (patch, aux) in zip(self.patches, views):
+            patch.aux = aux
+
+    def __str__(self):
+        return (f"Frame {self.frame} at t = {self.t} with "
+                f"{len(self.patches)} patches ({self.path})")
+
+    @property
+    def nbytes(self):
+        r"""Memory held by the frame, the whole mapped file for binary output"""
+        if self._data is not None:
+            return self._data.nbytes
+        return sum(patch.q.nbytes for patch in self.patches)
+
+    def transect(self, y0=0.0):
+        r"""Row of cells at *y0* from every patch that contains it
+
+        Returns a list of ``(x, q)`` pairs, one per patch, where ``x`` are the
+        cell centers and ``q`` a ``(num_eqn, mx)`` view into the frame data.
+        """
+        if y0 not in self._transects:
+            rows = []
+            for patch in self.patches:
+                if patch.contains_y(y0):
+                    rows.append((patch.centers[0],
+                                 patch.q[:, :, patch.row_index(y0)]))
+            self._transects[y0] = rows
+        return self._transects[y0]
+
+    def level_grid(self, level=1):
+        r"""Patches of *level* assembled into a single :class:`Patch`
+
+        The patches of a level share the same cell size, the returned patch
+        covers their bounding box and cells not covered by any of them are NaN.
+        """
+        patches = [patch for patch in self.patches if patch.level == level]
+        if len(patches) == 0:
+            raise ValueError(f"Frame {self.frame} has no level {level} patches.")
+        delta = patches[0].delta
+        lower = [min(patch.lower[n] for patch in patches) for n in range(2)]
+        upper = [max(patch.upper[n] for patch in patches) for n in range(2)]
+        num_cells = [int(round((upper[n] - lower[n]) / delta[n]))
+                     for n in range(2)]
+
+        q = np.full((self.num_eqn, num_cells[0], num_cells[1]), np.nan)
+        for patch in patches:
+            i, j = [int(round((patch.lower[n] - lower[n]) / delta[n]))
+                    for n in range(2)]
+            q[:, i:i + patch.num_cells[0], j:j + patch.num_cells[1]] = patch.q
+        return Patch(0, level, num_cells, lower, delta, q)
+
+
+def frame_key(path, frame, file_prefix="fort"):
+    r"""Key identifying the current contents of *frame* in *path*"""
+    path = os.path.abspath(path)
+    mtime = os.stat(frame_file(path, frame, "t", file_prefix)).st_mtime_ns
+    return (path, frame, file_prefix, mtime)
+
+
+class FrameCache(object):
+    r"""Least recently used cache of opened frames
+
+    Frames are keyed on ``(path, frame, file_prefix, mtime)`` so a frame that
+    is rewritten on disk is read again.  The least recently used frames are
+    dropped once the frames held take more than *max_bytes*, the most recent
+    frame is always kept.
+    """
+
+    def __init__(self, max_bytes=2**30):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __str__(self):
+        return (f"FrameCache: {len(self)} frames, {self.nbytes} bytes, "
+                f"{self.hits} hits, {self.misses} misses")
+
+    def get(self, path, frame, file_prefix="fort"):
+        key = frame_key(path, frame, file_prefix)
+        if key in self._frames:
+            self.hits += 1
+            self._frames.move_to_end(key)
+            return self._frames[key]
+
+        self.misses += 1
+        # Drop stale versions of this frame
+        for old_key in [old_key for old_key in self._frames
+                                if old_key[:3] == key[:3]]:
+            self.nbytes -= self._frames.pop(old_key).nbytes
+
+        solution = Frame(key[0], frame, file_prefix)
+        self._frames[key] = solution
+        self.nbytes += solution.nbytes
+        while self.nbytes > self.max_bytes and len(self._frames) > 1:
+            self.nbytes -= self._frames.popitem(last=False)[1].nbytes
+        return solution
+
+    def clear(self):
+        self._frames.clear()
+        self.nbytes = 0
+
+
+frame_cache = FrameCache()
+
+
+def load_frame(path, frame, file_prefix="fort"):
+    r"""Open *frame* in *path* through the shared :data:`frame_cache`"""
+    return frame_cache.get(path, frame, file_prefix)
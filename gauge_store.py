@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+r"""Columnar binary store for GeoClaw gauge output
+
+GeoClaw records at each gauge the level, time, q, eta and any
+``aux_out_fields``.  With ``gaugedata.file_format = "binary"`` in setrun, as
+the storm runs use, the records are written as raw floats to
+``gaugeXXXXX.bin`` with only the header in ``gaugeXXXXX.txt``, and
+:func:`read_gauge_binary` maps them without any parsing.  Text gauges, with
+one line per record in ``gaugeXXXXX.txt``, are slow to parse for long runs,
+so :func:`convert_output` converts them once into ``gaugeXXXXX.npz`` files
+next to them.  Either way a gauge is read as one array per column group:
+
+``level`` (int32), ``t`` (float64), ``q`` (records x q fields, float64),
+``eta`` (float64, if recorded) and ``aux`` (records x aux fields, float64, if
+recorded)
+
+along with the gauge ``id``, ``location`` and the numbers of the recorded
+``q_fields`` and ``aux_fields``.  The ``.npz`` arrays are optionally
+compressed.  :class:`GaugeStore` opens the binary or converted gauges of an
+output directory and only reads the columns that are accessed.
+"""
+
+import os
+import re
+import glob
+
+import numpy as np
+
+
+def gauge_files(path, extension="txt"):
+    r"""Gauge files with *extension* in *path* keyed by gauge number"""
+    files = {}
+    for gauge_path in glob.glob(os.path.join(path, f"gauge*.{extension}")):
+        number = os.path.basename(gauge_path)[5:-len(extension) - 1]
+        if number.isdigit():
+            files[int(number)] = gauge_path
+    return files
+
+
+def parse_header(header, num_columns):
+    r"""Gauge information and column layout from the ``#`` lines *header*
+
+    The column line of recent GeoClaw versions (``# level, time, q[ 1 2 3],
+    eta, aux[ 4 5 6]``) gives the recorded fields, otherwise all columns after
+    the time are taken to be q followed by eta.
+    """
+    info = {"id": None, "location": None}
+    for line in header:
+        match = re.search(r"gauge_id=\s*(\d+)", line)
+        if match is not None:
+            info["id"] = int(match.group(1))
+        match = re.search(r"location=\(\s*(\S+)\s+(\S+)\s*\)", line)
+        if match is not None:
+            info["location"] = [float(match.group(n).replace("D", "E"))
+                                for n in (1, 2)]
+
+    q_fields, aux_fields, eta = None, [], True
+    for line in header:
+        match = re.search(r"q\[([\s\d]*)\]", line)
+        if match is not None:
+            q_fields = [int(field) for field in match.group(1).split()]
+            match = re.search(r"aux\[([\s\d]*)\]", line)
+            if match is not None:
+                aux_fields = [int(field) for field in match.group(1).split()]
+            eta = "eta" in line
+    if q_fields is None:
+        q_fields = list(range(1, max((num_columns or 0) - 2, 1)))
+
+    if num_columns is not None and \
+            2 + len(q_fields) + int(eta) + len(aux_fields) != num_columns:
+        raise ValueError(f"Gauge header does not describe {num_columns} "
+                         "columns.")
+    info["q_fields"] = q_fields
+    info["aux_fields"] = aux_fields
+    info["eta"] = eta
+    return info
+
+
+def gauge_columns(path, info, data):
+    r"""Dictionary of the column arrays of the gauge *path*
+
+    *info* is the result of :func:`parse_header` and *data* holds one
+    record per row.  All but the level are views into *data*.
+    """
+    num_q = len(info["q_fields"])
+    columns = {"id": info["id"],
+               "location": np.array(info["location"], dtype=float),
+               "q_fields": np.array(info["q_fields"], dtype=np.int32),
+               "aux_fields": np.array(info["aux_fields"], dtype=np.int32),
+               "level": data[:, 0].astype(np.int32),
+               "t": data[:, 1],
+               "q": data[:, 2:2 + num_q]}
+    column = 2 + num_q
+    if info["eta"]:
+        columns["eta"] = data[:, column]
+        column += 1
+    if len(info["aux_fields"]) > 0:
+        columns["aux"] = data[:, column:]
+    if columns["id"] is None:
+        columns["id"] = int(os.path.basename(path)[5:-4])
+    return columns
+
+
+def read_gauge_binary(path):
+    r"""Read the binary gauge *path* (``gaugeXXXXX.bin``) written by GeoClaw
+
+    The header is read from the text file of the gauge.  The columns are
+    views into the memory-mapped file, a record still being written is left
+    out.
+    """
+    text_path = os.path.splitext(path)[0] + ".txt"
+    with open(text_path, "r") as gauge_file:
+        header = [line for line in gauge_file if line.startswith("#")]
+    info = parse_header(header, None)
+    num_columns = (2 + len(info["q_fields"]) + int(info["eta"])
+                     + len(info["aux_fields"]))
+    binary32 = any("binary32" in line for line in header)
+    dtype = np.float32 if binary32 else np.float64
+
+    record_size = num_columns * np.dtype(dtype).itemsize
+    num_records = os.path.getsize(path) // record_size
+    if num_records == 0:
+        data = np.empty((0, num_columns), dtype=dtype)
+    else:
+        data = np.memmap(path, dtype=dtype, mode="r",
+                         shape=(num_records, num_columns))
+    return gauge_columns(path, info, data)
+
+
+def read_gauge_text(path):
+    r"""Read the text gauge file *path* into a dictionary of column arrays"""
+    header = []
+    num_columns = None
+    with open(path, "r") as gauge_file:
+        for line in gauge_file:
+            if line.startswith("#"):
+                header.append(line)
+            elif len(line.split()) > 0:
+                num_columns = len(line.split())
+                break
+    info = parse_header(header, num_columns)
+    num_q = len(info["q_fields"])
+
+    if num_columns is None:
+        num_columns = 2 + num_q + int(info["eta"]) + len(info["aux_fields"])
+        data = np.empty((0, num_columns))
+    else:
+        # Parse all records at once with numpy's parser
+        data = np.loadtxt(path, comments="#", ndmin=2)
+
+    return gauge_columns(path, info, data)
+
+
+def convert_gauge(path, compress=True):
+    r"""Convert the text gauge *path* to a ``.npz`` file next to it
+
+    The conversion is skipped if the ``.npz`` file is newer than *path*.
+    Returns the path of the ``.npz`` file.
+    """
+    npz_path = os.path.splitext(path)[0] + ".npz"
+    if os.path.exists(npz_path) \
+            and os.path.getmtime(npz_path) >= os.path.getmtime(path):
+        return npz_path
+    columns = read_gauge_text(path)
+    save = np.savez_compressed if compress else np.savez
+    # Write to a temporary file so readers never see a partial store
+    temp_path = npz_path[:-4] + ".tmp.npz"
+    save(temp_path, **columns)
+    os.replace(temp_path, npz_path)
+    return npz_path
+
+
+def convert_output(path, compress=True, remove_text=False):
+    r"""Convert every text gauge in the output directory *path*
+
+    Gauges written in binary need no conversion and are skipped.  Returns
+    the paths of the ``.npz`` files keyed by gauge number.
+    """
+    binary = gauge_files(path, "bin")
+    converted = {}
+    for (gauge, gauge_path) in sorted(gauge_files(path).items()):
+        if gauge in binary:
+            continue
+        converted[gauge] = convert_gauge(gauge_path, compress)
+        if remove_text:
+            os.remove(gauge_path)
+    return converted
+
+
+class Gauge(object):
+    r"""Lazily loaded gauge of a :class:`GaugeStore`
+
+    Columns are accessed as attributes, e.g. ``gauge.t`` or ``gauge.aux``, or
+    through :meth:`load`.  They are read from a ``.npz`` file the first time
+    they are accessed, or are views into a memory-mapped ``.bin`` file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path.endswith(".bin"):
+            self._file = None
+            self._columns = read_gauge_binary(path)
+            self.columns = list(self._columns)
+        else:
+            self._file = np.load(path)
+            self._columns = {}
+            self.columns = list(self._file.files)
+
+    def __str__(self):
+        return f"Gauge {int(self.id)} ({self.path}): {', '.join(self.columns)}"
+
+    def __getattr__(self, name):
+        # Only called for names that are not regular attributes
+        if name.startswith("_") or name not in self.__dict__.get("columns", []):
+            raise AttributeError(name)
+        if name not in self._columns:
+            self._columns[name] = self._file[name]
+        return self._columns[name]
+
+    def load(self, *columns):
+        r"""Dictionary of the requested *columns*"""
+        return {name: getattr(self, name) for name in columns}
+
+    def field(self, number):
+        r"""Time series of q or aux field *number* (1-based as in setrun)"""
+        q_fields = list(self.q_fields)
+        if number in q_fields:
+            return self.q[:, q_fields.index(number)]
+        return self.aux[:, list(self.aux_fields).index(number)]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._columns = {}
+
+
+class GaugeStore(object):
+    r"""Binary or converted gauges of an output directory
+
+    Binary gauges are read directly.  Text gauges that have not been
+    converted yet, or changed since, are converted when the store is opened.
+    """
+
+    def __init__(self, path, compress=True):
+        self.path = path
+        convert_output(path, compress)
+        self._paths = gauge_files(path, "npz")
+        self._paths.update(gauge_files(path, "bin"))
+        self._gauges = {}
+
+    def __str__(self):
+        return f"GaugeStore {self.path}: gauges {self.gauges}"
+
+    @property
+    def gauges(self):
+        return sorted(self._paths.keys())
+
+    def __getitem__(self, gauge):
+        if gauge not in self._gauges:
+            self._gauges[gauge] = Gauge(self._paths[gauge])
+        return self._gauges[gauge]
+
+    def load(self, columns=("t", "q"), gauges=None):
+        r"""Requested *columns* of *gauges* (all by default) keyed by gauge"""
+        if gauges is None:
+            gauges = self.gauges
+        return {gauge: self[gauge].load(*columns) for gauge in gauges}
+
+    def close(self):
+        for gauge in self._gauges.values():
+            gauge.close()
+        self._gauges = {}
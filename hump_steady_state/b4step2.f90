@@ -26,7 +26,8 @@ subroutine b4step2(mbc,mx,my,meqn,q,xlower,ylower,dx,dy,t,dt,maux,aux,actualstep
 
     use storm_module, only: set_storm_fields, pressure_index
 
-    use splitting_module, only: test_type
+    use splitting_module, only: test_type, timing
+    use timing_module, only: timer_start, timer_stop, b4step2_timer
 
     implicit none
 
@@ -45,6 +46,10 @@ subroutine b4step2(mbc,mx,my,meqn,q,xlower,ylower,dx,dy,t,dt,maux,aux,actualstep
     real(kind=8) :: x
     real(kind=8), parameter :: PI = 3.141592654d0
 
+    integer(kind=8) :: start_clock
+
+    if (timing) start_clock = timer_start()
+
     ! Check for NaNs in the solution
     call check4nans(meqn,mbc,mx,my,q,t,1)
 
@@ -75,4 +80,6 @@ subroutine b4step2(mbc,mx,my,meqn,q,xlower,ylower,dx,dy,t,dt,maux,aux,actualstep
         end do
     end if
 
+    if (timing) call timer_stop(b4step2_timer, start_clock)
+
 end subroutine b4step2
@@ -1,21 +1,23 @@
 #!/usr/bin/env python
 
 import os
+import sys
 
 import numpy as np
 import matplotlib.pyplot as plt
 
-import clawpack.pyclaw.solution as sol
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+import frames
 
-def load_solution(path, frame=10, y0=0.0):
-    # Assumes single grid
-    solution = sol.Solution(path=path, frame=frame)
-    q = solution.states[0].q
-    x = solution.states[0].grid.centers[0]
-    y = solution.states[0].grid.centers[1]
-    dy = solution.states[0].grid.delta[1]
-    index = np.where(abs(y - y0) <= dy / 2.0)[0][0]
-    return x, q[:, :, index]
+def load_solution(path, frame=None, y0=0.0):
+    # Assumes single grid, parsed frames are shared between the field plots.
+    # The last frame by default, runs stopped once steady end early
+    if frame is None:
+        frame = frames.list_frames(path)[-1]
+    solution = frames.load_frame(path, frame)
+    patch = solution.patches[0]
+    return patch.centers[0], patch.q[:, :, patch.row_index(y0)]
 
 
 def plot_comparison(base_path, ax, field=3, title=None, dimensional=True,
@@ -1,11 +1,20 @@
 #!/usr/bin/env python
 
 import os
+import sys
+import copy
 import numpy
 import datetime
+import functools
 
 import batch.batch
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+import sweep
+import steady_state
+import well_balance
+
 import clawpack.geoclaw.topotools as topotools
 
 days2seconds = lambda days: days * 60.0**2 * 24.0
@@ -14,10 +23,18 @@ days2seconds = lambda days: days * 60.0**2 * 24.0
 #     return A * numpy.exp(-(x - x0)**2 / sigma**2)
 
 
+@functools.lru_cache(maxsize=None)
+def base_rundata():
+    r"""Run data of setrun.py, built only once"""
+    import setrun
+    return setrun.setrun()
+
+
 class SplitSourceJob(batch.batch.Job):
     r""""""
 
     def __init__(self, split=False, test_type='pressure', dimensional=True,
+                       timing=False, steady_state_tolerance=None,
                        base_path='./'):
 
         super(SplitSourceJob, self).__init__()
@@ -31,12 +48,23 @@ class SplitSourceJob(batch.batch.Job):
         self.prefix = f"{str(self.split_forcing)[0]}_{str(self.dimensional)[0]}_{self.test_type}"
         self.executable = "xgeoclaw"
 
-        # Create base data object
-        import setrun
-        self.rundata = setrun.setrun()
+        # Stop once the gauges change by less than the tolerance per unit time
+        if steady_state_tolerance is not None:
+            self.monitor = steady_state.GaugeMonitor(steady_state_tolerance)
+
+        # Create base data object from the shared one
+        self.rundata = copy.deepcopy(base_rundata())
 
         self.rundata.splitting_data.split_forcing = self.split_forcing
         self.rundata.splitting_data.test_type = self.test_type
+        self.rundata.splitting_data.timing = timing
+
+        # The bathymetry tests are scored with the capacity function of every
+        # frame, see well_balance.WellBalanceMetric
+        if self.test_type == 'bathymetry' \
+                and self.rundata.clawdata.capa_index > 0:
+            self.rundata.clawdata.output_aux_components = 'all'
+            self.rundata.clawdata.output_aux_onlyonce = False
 
         # Dimensional stuff
         if dimensional:
@@ -63,15 +91,41 @@ class SplitSourceJob(batch.batch.Job):
 
 if __name__ == '__main__':
 
+    # Tolerance of the steady state detection, e.g. 1e-8, None to run to tfinal
+    steady_state_tolerance = None
+    # Max eta deviation from the lake at rest allowed in the bathymetry tests,
+    # None to only print the well-balancing errors
+    well_balance_tolerance = None
+
     jobs = []
     for test_type in ['pressure', 'bathymetry']:
         for split in [True, False]:
             for dimensional in [True, False]:
                 jobs.append(SplitSourceJob(split=split, test_type=test_type, 
-                                           dimensional=dimensional))
+                                           dimensional=dimensional,
+                               steady_state_tolerance=steady_state_tolerance))
 
-    controller = batch.batch.BatchController(jobs)
-    controller.wait = True
+    controller = sweep.LocalController(jobs)
     controller.plot = False
     print(controller)
-    controller.run()
+    all_paths = controller.run()
+
+    # The bathymetry tests start from the lake at rest and should stay there
+    failed = []
+    for (job, paths) in zip(jobs, all_paths):
+        if job.test_type != 'bathymetry' or paths.get("returncode") != 0:
+            continue
+        metric = well_balance.WellBalanceMetric(
+                                    sea_level=job.rundata.geo_data.sea_level,
+                                    capa_index=job.rundata.clawdata.capa_index)
+        results = metric.score_output(paths["output"])
+        eta_error = numpy.max(results["eta_linf"], initial=0.0)
+        momentum_error = numpy.max(results["momentum_linf"], initial=0.0)
+        print(f"{job.prefix}: max eta error {eta_error:.3e}, "
+              f"max momentum {momentum_error:.3e} over "
+              f"{results['frame'].shape[0]} frames")
+        if well_balance_tolerance is not None \
+                and eta_error > well_balance_tolerance:
+            failed.append(job.prefix)
+    if len(failed) > 0:
+        sys.exit(f"Not well-balanced: {', '.join(failed)}")
@@ -35,6 +35,8 @@ class SplittingData(data.ClawData):
         # GeoClaw physics parameters
         self.add_attribute('split_forcing', False)
         self.add_attribute('test_type', 0)
+        self.add_attribute('fused_source', False)
+        self.add_attribute('timing', False)
 
     def write(self, data_source='setrun.py', out_file='splitting.data'):
 
@@ -47,6 +49,8 @@ class SplittingData(data.ClawData):
         else:
             self.test_type = 0
         self.data_write('test_type', description="(Pressure or bathy test)")
+        self.data_write('fused_source', description="(Fuse source terms)")
+        self.data_write('timing', description="(Time custom routines)")
         self.close_data_file()
 
 # ------------------------------
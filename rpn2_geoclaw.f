@@ -39,7 +39,8 @@ c
 
       use storm_module, only: pressure_forcing, pressure_index
 
-      use splitting_module, only: split_forcing, test_type
+      use splitting_module, only: split_forcing, test_type, timing
+      use timing_module, only: timer_start, timer_stop, rpn2_timer
 
       implicit none
 
@@ -69,6 +70,10 @@ c
 
       logical rare1,rare2
 
+      integer(kind=8) start_clock
+
+      if (timing) start_clock = timer_start()
+
       ! In case there is no pressure forcing
       pL = 0.d0
       pR = 0.d0
@@ -308,5 +313,7 @@ c============= compute fluctuations=============================================
 !--            enddo
 !--        enddo
 
+      if (timing) call timer_stop(rpn2_timer, start_clock)
+
       return
       end subroutine
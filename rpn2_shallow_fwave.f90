@@ -4,7 +4,8 @@ subroutine rpn2(ixy, maxm, num_eqn, num_waves, num_aux, num_ghost, num_cells, &
     use, intrinsic :: iso_fortran_env, only: real64
 
     use geoclaw_module, only: g => grav, dry_tolerance, rho
-    use splitting_module, only: split_forcing, test_type
+    use splitting_module, only: split_forcing, test_type, timing
+    use timing_module, only: timer_start, timer_stop, rpn2_timer
     use storm_module, only: pressure_forcing, pressure_index
 
     implicit none 
@@ -23,13 +24,17 @@ subroutine rpn2(ixy, maxm, num_eqn, num_waves, num_aux, num_ghost, num_cells, &
     real(kind=D), intent(out) :: apdq(num_eqn,1-num_ghost:maxm+num_ghost)
     
     ! Locals
-    integer :: i, k, normal_index, transverse_index
+    integer :: i, k, n, normal_index, transverse_index, num_wet
+    integer :: wet_index(maxm + 2 * num_ghost)
+    integer(kind=8) :: start_clock
     real(kind=D) :: hl, ul, vl, hr, ur, vr, hbar, uhat, chat, db, dp, split
     real(kind=D) :: phil, phir, dry_state_l, dry_state_r
     real(kind=D) :: R(3,3)
     real(kind=D) :: delta(3), beta(3)
     
     
+    if (timing) start_clock = timer_start()
+
     ! Determine normal and tangential directions
     if (ixy == 1) then
         normal_index = 2
@@ -44,8 +49,22 @@ subroutine rpn2(ixy, maxm, num_eqn, num_waves, num_aux, num_ghost, num_cells, &
 
     split = merge(0.0_real64, 1.0_real64, split_forcing)
 
-    ! Primary loop over each cell
+    ! Compact list of the interfaces with water on at least one side, there
+    ! are no waves at completely dry interfaces
+    num_wet = 0
     do i = 2 - num_ghost, num_cells + num_ghost
+        if (qr(1, i - 1) < dry_tolerance .and. ql(1, i) < dry_tolerance) then
+            s(1:3, i) = 0.0_D
+            fwave(1:3, 1:3, i) = 0.0_D
+        else
+            num_wet = num_wet + 1
+            wet_index(num_wet) = i
+        end if
+    end do
+
+    ! Primary loop over each wet interface
+    do n = 1, num_wet
+        i = wet_index(n)
         
         ! Check for dry states - need merge here to convert to float
         dry_state_l = merge(0.0_D, 1.0_D, qr(1, i - 1) < dry_tolerance)
@@ -126,4 +145,6 @@ subroutine rpn2(ixy, maxm, num_eqn, num_waves, num_aux, num_ghost, num_cells, &
 
     enddo ! End of main loop
 
+    if (timing) call timer_stop(rpn2_timer, start_clock)
+
 end subroutine rpn2
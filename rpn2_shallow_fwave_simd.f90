@@ -0,0 +1,222 @@
+! Structure-of-arrays variant of rpn2_shallow_fwave.f90
+!
+! Computes the same f-waves, speeds and fluctuations as rpn2_shallow_fwave.f90
+! but processes each slice in batches of interfaces: the left and right states
+! are gathered into contiguous arrays, the waves are computed by a branch-free
+! loop over the batch and the results are scattered back into the layout
+! expected by clawpack.  The normal and transverse momenta are selected when
+! gathering and scattering so the eigenvectors are never stored.  Every
+! quantity is evaluated with the same operations in the same order as in
+! rpn2_shallow_fwave.f90 so the results are identical, provided the compiler
+! does not contract operations into FMAs differently in the two (use
+! -ffp-contract=off along with -march=native).  The loop over a batch needs
+! -O3 (or -ftree-vectorize) to be vectorized by gfortran.
+!
+! As in rpn2_shallow_fwave.f90 only the interfaces with water on at least one
+! side are gathered, completely dry interfaces have no waves.  The one
+! exception to identical results is an interface with one side at exactly
+! h = 0: rpn2_shallow_fwave.f90 computes its velocity as 0 / 0 and returns
+! NaN there, while here the velocity of a dry side is computed with a unit
+! depth and is zero, as it is for any other depth below dry_tolerance.
+!
+! Select this solver by setting RPN2_SOURCE in the Makefile.
+subroutine rpn2(ixy, maxm, num_eqn, num_waves, num_aux, num_ghost, num_cells, &
+                ql, qr, auxl, auxr, fwave, s, amdq, apdq)
+
+    use, intrinsic :: iso_fortran_env, only: real32, real64
+
+    use geoclaw_module, only: g => grav, dry_tolerance, rho
+    use splitting_module, only: split_forcing, test_type, timing
+    use timing_module, only: timer_start, timer_stop, rpn2_timer
+    use storm_module, only: pressure_forcing, pressure_index
+
+    implicit none
+
+    integer, parameter :: D = real64
+    integer, parameter :: batch_size = 64
+
+    ! Speed tolerances of rpn2_shallow_fwave.f90, note that the full wave
+    ! tolerance is single precision there
+    real(kind=D), parameter :: full_tolerance = real(1e-14_real32, kind=D)
+    real(kind=D), parameter :: half_tolerance = 1e-14_D
+
+    ! Arguments
+    integer, intent(in) :: ixy, maxm, num_eqn, num_waves, num_ghost, num_aux, num_cells
+    real(kind=D), intent(in) :: ql(num_eqn, 1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(in) :: qr(num_eqn, 1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(in) :: auxl(num_aux, 1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(in) :: auxr(num_aux, 1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(out) :: s(num_waves, 1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(out) :: fwave(num_eqn, num_waves, 1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(out) :: amdq(num_eqn,1-num_ghost:maxm+num_ghost)
+    real(kind=D), intent(out) :: apdq(num_eqn,1-num_ghost:maxm+num_ghost)
+
+    ! Locals
+    integer :: i, m, n, i_start, i_end, normal_index, transverse_index
+    integer :: num_wet, wet_index(maxm + 2 * num_ghost)
+    integer(kind=8) :: start_clock
+    real(kind=D) :: hl, ul, vl, hr, ur, vr, hbar, uhat, chat, db, dp, split
+    real(kind=D) :: phil, phir, dry_state_l, dry_state_r
+    real(kind=D) :: delta(3), beta(3), f(3, 3)
+
+    ! Batch of gathered states (left and right of each interface)
+    real(kind=D) :: h_l(batch_size), hu_l(batch_size), hv_l(batch_size)
+    real(kind=D) :: h_r(batch_size), hu_r(batch_size), hv_r(batch_size)
+    real(kind=D) :: b_jump(batch_size), p_jump(batch_size)
+
+    ! Batch of results, wave index last
+    real(kind=D) :: speed(batch_size, 3), wave(batch_size, 3, 3)
+    real(kind=D) :: amdq_b(batch_size, 3), apdq_b(batch_size, 3)
+
+    if (timing) start_clock = timer_start()
+
+    ! Determine normal and tangential directions
+    if (ixy == 1) then
+        normal_index = 2
+        transverse_index = 3
+    else
+        normal_index = 3
+        transverse_index = 2
+    end if
+
+    ! Interfaces outside of the main loop are zero as in rpn2_shallow_fwave
+    amdq(:, 1 - num_ghost) = 0.0_D
+    apdq(:, 1 - num_ghost) = 0.0_D
+    amdq(:, num_cells + num_ghost + 1:) = 0.0_D
+    apdq(:, num_cells + num_ghost + 1:) = 0.0_D
+
+    split = merge(0.0_real64, 1.0_real64, split_forcing)
+
+    ! Compact list of the interfaces with water on at least one side, there
+    ! are no waves at completely dry interfaces
+    num_wet = 0
+    do i = 2 - num_ghost, num_cells + num_ghost
+        if (qr(1, i - 1) < dry_tolerance .and. ql(1, i) < dry_tolerance) then
+            s(1:3, i) = 0.0_D
+            fwave(1:3, 1:3, i) = 0.0_D
+            amdq(1:3, i) = 0.0_D
+            apdq(1:3, i) = 0.0_D
+        else
+            num_wet = num_wet + 1
+            wet_index(num_wet) = i
+        end if
+    end do
+
+    ! Primary loop over batches of wet interfaces
+    do i_start = 1, num_wet, batch_size
+        i_end = min(i_start + batch_size - 1, num_wet)
+        n = i_end - i_start + 1
+
+        ! Gather states
+        do m = 1, n
+            i = wet_index(i_start + m - 1)
+            h_l(m) = qr(1, i - 1)
+            hu_l(m) = qr(normal_index, i - 1)
+            hv_l(m) = qr(transverse_index, i - 1)
+            h_r(m) = ql(1, i)
+            hu_r(m) = ql(normal_index, i)
+            hv_r(m) = ql(transverse_index, i)
+            b_jump(m) = auxl(1, i) - auxr(1, i - 1)
+            p_jump(m) = auxl(pressure_index, i) - auxr(pressure_index, i - 1)
+        end do
+
+        !$OMP SIMD PRIVATE(hl, ul, vl, hr, ur, vr, hbar, uhat, chat, db, dp, phil, phir, dry_state_l, dry_state_r, delta, beta, f)
+        do m = 1, n
+
+            ! Check for dry states - need merge here to convert to float
+            dry_state_l = merge(0.0_D, 1.0_D, h_l(m) < dry_tolerance)
+            dry_state_r = merge(0.0_D, 1.0_D, h_r(m) < dry_tolerance)
+
+            ! Left states, a dry side is divided by a unit depth so that
+            ! h = 0 does not give 0 / 0
+            hl = h_l(m) * dry_state_l
+            ul = hu_l(m) / merge(h_l(m), 1.0_D, h_l(m) >= dry_tolerance) * dry_state_l
+            vl = hv_l(m) / merge(h_l(m), 1.0_D, h_l(m) >= dry_tolerance) * dry_state_l
+            phil = (0.5_D * g * hl**2 + hl * ul**2) * dry_state_l
+
+            ! Forcing
+            db = b_jump(m) * split
+            dp = p_jump(m) * split
+
+            ! Right states
+            hr = h_r(m) * dry_state_r
+            ur = hu_r(m) / merge(h_r(m), 1.0_D, h_r(m) >= dry_tolerance) * dry_state_r
+            vr = hv_r(m) / merge(h_r(m), 1.0_D, h_r(m) >= dry_tolerance) * dry_state_r
+            phir = (0.5_D * g * hr**2 + hr * ur**2) * dry_state_r
+
+            ! Roe average states (Roe's linearization)
+            hbar = 0.5_D * (hr + hl)
+            uhat = (sqrt(hr) * ur + sqrt(hl) * ul) / (sqrt(hr) + sqrt(hl))
+            chat = sqrt(g * hbar)
+
+            ! Flux differences
+            delta(1) = hr * ur - hl * ul
+            delta(2) = phir - phil + g * hbar * db + hbar * dp / rho(1)
+            delta(3) = hr * ur * vr - hl * ul * vl
+
+            ! Wave speeds
+            speed(m, 1) = min(uhat - chat, ul - sqrt(g * hl))
+            speed(m, 3) = max(uhat + chat, ur + sqrt(g * hr))
+            speed(m, 2) = 0.5_D * (speed(m, 1) + speed(m, 3))
+
+            ! Wave strengths
+            beta(1) = (speed(m, 3) * delta(1) - delta(2)) / (speed(m, 3) - speed(m, 1))
+            beta(3) = (delta(2) - speed(m, 1) * delta(1)) / (speed(m, 3) - speed(m, 1))
+            beta(2) = delta(3) - beta(1) * vl - beta(3) * vr
+
+            ! f-waves, components ordered (depth, normal, transverse)
+            f(1, 1) = beta(1) * 1.0_D
+            f(2, 1) = beta(1) * speed(m, 1)
+            f(3, 1) = beta(1) * vl
+            f(1, 2) = beta(2) * 0.0_D
+            f(2, 2) = beta(2) * 0.0_D
+            f(3, 2) = beta(2) * 1.0_D
+            f(1, 3) = beta(3) * 1.0_D
+            f(2, 3) = beta(3) * speed(m, 3)
+            f(3, 3) = beta(3) * vr
+            wave(m, :, :) = f
+
+            ! Fluctuations, selected with the same tolerances and summed in
+            ! the same order as in rpn2_shallow_fwave
+            amdq_b(m, :) = 0.0_D
+            apdq_b(m, :) = 0.0_D
+            amdq_b(m, :) = amdq_b(m, :) + merge(f(:, 1), 0.0_D, speed(m, 1) < -full_tolerance)
+            apdq_b(m, :) = apdq_b(m, :) + merge(f(:, 1), 0.0_D, speed(m, 1) >  full_tolerance)
+            amdq_b(m, :) = amdq_b(m, :) + merge(0.5_D * f(:, 1), 0.0_D, -half_tolerance < speed(m, 1) &
+                                                                .and. speed(m, 1) < full_tolerance)
+            apdq_b(m, :) = apdq_b(m, :) + merge(0.5_D * f(:, 1), 0.0_D, -half_tolerance < speed(m, 1) &
+                                                                .and. speed(m, 1) < full_tolerance)
+            amdq_b(m, :) = amdq_b(m, :) + merge(f(:, 2), 0.0_D, speed(m, 2) < -full_tolerance)
+            apdq_b(m, :) = apdq_b(m, :) + merge(f(:, 2), 0.0_D, speed(m, 2) >  full_tolerance)
+            amdq_b(m, :) = amdq_b(m, :) + merge(0.5_D * f(:, 2), 0.0_D, -half_tolerance < speed(m, 2) &
+                                                                .and. speed(m, 2) < full_tolerance)
+            apdq_b(m, :) = apdq_b(m, :) + merge(0.5_D * f(:, 2), 0.0_D, -half_tolerance < speed(m, 2) &
+                                                                .and. speed(m, 2) < full_tolerance)
+            amdq_b(m, :) = amdq_b(m, :) + merge(f(:, 3), 0.0_D, speed(m, 3) < -full_tolerance)
+            apdq_b(m, :) = apdq_b(m, :) + merge(f(:, 3), 0.0_D, speed(m, 3) >  full_tolerance)
+            amdq_b(m, :) = amdq_b(m, :) + merge(0.5_D * f(:, 3), 0.0_D, -half_tolerance < speed(m, 3) &
+                                                                .and. speed(m, 3) < full_tolerance)
+            apdq_b(m, :) = apdq_b(m, :) + merge(0.5_D * f(:, 3), 0.0_D, -half_tolerance < speed(m, 3) &
+                                                                .and. speed(m, 3) < full_tolerance)
+        end do
+
+        ! Scatter results
+        do m = 1, n
+            i = wet_index(i_start + m - 1)
+            s(1:3, i) = speed(m, :)
+            fwave(1, 1:3, i) = wave(m, 1, :)
+            fwave(normal_index, 1:3, i) = wave(m, 2, :)
+            fwave(transverse_index, 1:3, i) = wave(m, 3, :)
+            amdq(1, i) = amdq_b(m, 1)
+            amdq(normal_index, i) = amdq_b(m, 2)
+            amdq(transverse_index, i) = amdq_b(m, 3)
+            apdq(1, i) = apdq_b(m, 1)
+            apdq(normal_index, i) = apdq_b(m, 2)
+            apdq(transverse_index, i) = apdq_b(m, 3)
+        end do
+
+    enddo ! End of main loop
+
+    if (timing) call timer_stop(rpn2_timer, start_clock)
+
+end subroutine rpn2
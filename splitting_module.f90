@@ -1,5 +1,7 @@
 module splitting_module
 
+    use timing_module, only: start_timing
+
     implicit none
     save
 
@@ -8,6 +10,17 @@ module splitting_module
     integer :: test_type = 0
     logical :: split_forcing = .false.
 
+    ! Apply all source terms in src2 in a single sweep over each patch
+    logical :: fused_source = .false.
+
+    ! Time the custom routines, see timing_module
+    logical :: timing = .false.
+
+    ! Metric factors of every row of the domain on every level of a lat-long
+    ! grid, used by the split source terms in src2.  They are built with the
+    ! data, before any threads start, and are not allocated when not needed.
+    real(kind=8), allocatable :: row_dx_meters(:, :), row_dy_meters(:, :)
+
 contains
 
     subroutine set_splitting(data_file)
@@ -29,12 +42,54 @@ contains
 
             read(unit, *) split_forcing
             read(unit, *) test_type
+            read(unit, *) fused_source
+            read(unit, *) timing
 
             close(unit)
+            if (timing) call start_timing()
+            if (split_forcing) call build_metrics()
             module_setup = .true.
 
         end if
 
     end subroutine set_splitting
 
+    ! Tabulate the metric factors of every row of the domain on every level,
+    ! they only depend on the latitude of the row.  Any previous tables are
+    ! replaced.  Nothing is built for Cartesian grids or if the level
+    ! spacings are not set yet, src2 then computes the factors itself.
+    subroutine build_metrics()
+
+        use geoclaw_module, only: coordinate_system, spherical_distance
+        use amr_module, only: mxnest, hxposs, hyposs
+        use amr_module, only: domain_ylower => ylower, domain_yupper => yupper
+
+        implicit none
+
+        integer :: m, n, num_rows
+        real(kind=8) :: xm, xc, xp, ym, yc, yp
+
+        if (allocated(row_dx_meters)) deallocate(row_dx_meters, row_dy_meters)
+        if (coordinate_system /= 2 .or. hyposs(mxnest) <= 0.d0) return
+
+        num_rows = nint((domain_yupper - domain_ylower) / hyposs(mxnest))
+        allocate(row_dx_meters(num_rows, mxnest))
+        allocate(row_dy_meters(num_rows, mxnest))
+
+        do m=1,mxnest
+            num_rows = nint((domain_yupper - domain_ylower) / hyposs(m))
+            xm = 0.d0
+            xc = 0.5d0 * hxposs(m)
+            xp = hxposs(m)
+            do n=1,num_rows
+                ym = domain_ylower + (n - 1.d0) * hyposs(m)
+                yc = domain_ylower + (n - 0.5d0) * hyposs(m)
+                yp = domain_ylower + n * hyposs(m)
+                row_dx_meters(n, m) = spherical_distance(xp,yc,xm,yc)
+                row_dy_meters(n, m) = spherical_distance(xc,yp,xc,ym)
+            end do
+        end do
+
+    end subroutine build_metrics
+
 end module splitting_module
\ No newline at end of file
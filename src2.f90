@@ -15,7 +15,12 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
 
     use friction_module, only: variable_friction, friction_index
 
-    use splitting_module, only: split_forcing, test_type
+    use splitting_module, only: split_forcing, test_type, fused_source
+    use splitting_module, only: timing, row_dx_meters, row_dy_meters
+    use timing_module, only: timer_start, timer_stop, src2_timer
+
+    use amr_module, only: mxnest, hxposs, hyposs
+    use amr_module, only: domain_ylower => ylower, domain_yupper => yupper
 
     implicit none
     
@@ -30,13 +35,19 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
     ! Locals
     integer :: i, j, nman
     real(kind=8) :: h, hu, hv, gamma, dgamma, y, fdt, a(2,2), coeff
-    real(kind=8) :: xm, xc, xp, ym, yc, yp, dx_meters, dy_meters
+    real(kind=8) :: xc, yc, dx_meters, dy_meters
     real(kind=8) :: u, v, hu0, hv0
     real(kind=8) :: tau, wind_speed, theta, phi, psi, P_gradient(2), S(2)
     real(kind=8) :: Ddt, sloc(2)
     real(kind=8) :: tanyR, huv, huu, hvv
 
     real(kind=8) :: b_gradient(2)
+    logical :: sphere_forcing, split_pressure, split_bathy
+
+    ! Level and first row of this patch in the metric tables
+    integer :: level, row_offset
+
+    integer(kind=8) :: start_clock
 
     ! Algorithm parameters
 
@@ -44,6 +55,8 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
     ! friction source term
     real(kind=8), parameter :: depth_tolerance = 1.0d-30
 
+    if (timing) start_clock = timer_start()
+
     ! ----------------------------------------------------------------
     ! Spherical geometry source term(s)
     !
@@ -52,30 +65,52 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
     ! rundata.geo_data.sphere_source can now be set in setrun.py
     ! Set sphere_source = 0 to omit source terms for backward compatibility
     ! sphere_source = 1 should become the default?
+    sphere_forcing = (coordinate_system == 2) .and. (sphere_source > 0)
+
+    ! Need storm location and direction for sector based wind drag
+    if (wind_forcing) then
+        sloc = storm_location(t)
+        theta = storm_direction(t)
+    endif
+
+    ! Split atmospheric pressure and bathymetry source terms
+    split_pressure = pressure_forcing .and. split_forcing .and. test_type == 1
+    split_bathy = split_forcing .and. test_type == 2
+
+    ! Locate this patch's rows in the metric tables, built by set_splitting
+    level = 0
+    if (split_forcing .and. allocated(row_dx_meters)) then
+        call find_level(level, row_offset)
+    end if
+
+    ! Fused source terms ---------------------------------------------
+    ! Apply every source term to a cell before moving on to the next one,
+    ! each term only reads the cell itself and aux so the result is the same
+    ! as applying the terms one after the other below
+    if (fused_source) then
+        do j=1,my
+            call row_coefficients(j)
+            do i=1,mx
+                if (sphere_forcing) call sphere_source_term(i, j)
+                if (friction_forcing) call friction_source_term(i, j)
+                if (coriolis_forcing) call coriolis_source_term(i, j)
+                if (wind_forcing) call wind_source_term(i, j)
+                if (split_pressure) call pressure_source_term(i, j)
+                if (split_bathy) call bathy_source_term(i, j)
+            enddo
+        enddo
+        call finish_timing()
+        return
+    endif
 
-    if ((coordinate_system == 2) .and. (sphere_source > 0)) then
+    if (sphere_forcing) then
         ! add in spherical source term in mass equation 
         ! if sphere_source in [1,2],
         ! and also in momentum equations if sphere_source == 2
         do j=1,my
-            y = ylower + (j - 0.5d0) * dy
-            tanyR = tan(y*DEG2RAD) / earth_radius
+            call row_coefficients(j)
             do i=1,mx
-                if (q(1,i,j) > dry_tolerance) then
-                    ! source term in mass equation:
-                    q(1,i,j) = q(1,i,j) + dt * tanyR * q(3,i,j)
-
-                    if (sphere_source == 2) then
-                        ! Momentum source terms that drop out if linearized:
-                        ! These seem to have very little effect for
-                        ! practical problems
-                        huv = q(2,i,j)*q(3,i,j)/q(1,i,j)
-                        huu = q(2,i,j)*q(2,i,j)/q(1,i,j)
-                        hvv = q(3,i,j)*q(3,i,j)/q(1,i,j)
-                        q(2,i,j) = q(2,i,j) + dt * tanyR * 2.d0*huv
-                        q(3,i,j) = q(3,i,j) + dt * tanyR * (hvv - huu)
-                    endif
-                endif
+                call sphere_source_term(i, j)
             enddo
         enddo
     endif
@@ -85,30 +120,7 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
     if (friction_forcing) then
         do j=1,my
             do i=1,mx
-                ! Extract appropriate momentum
-                if (q(1,i,j) < depth_tolerance) then
-                    q(2:3,i,j) = 0.d0
-                else
-                    ! Apply friction source term only if in shallower water
-                    if (q(1,i,j) <= friction_depth) then
-                        if (.not.variable_friction) then
-                            do nman = num_manning, 1, -1
-                                if (aux(1,i,j) .lt. manning_break(nman)) then
-                                    coeff = manning_coefficient(nman)
-                                endif
-                            enddo
-                        else
-                            coeff = aux(friction_index,i,j)
-                        endif
-                        
-                        ! Calculate source term
-                        gamma = sqrt(q(2,i,j)**2 + q(3,i,j)**2) * g     &   
-                              * coeff**2 / (q(1,i,j)**(7.d0/3.d0))
-                        dgamma = 1.d0 + dt * gamma
-                        q(2, i, j) = q(2, i, j) / dgamma
-                        q(3, i, j) = q(3, i, j) / dgamma
-                    endif
-                endif
+                call friction_source_term(i, j)
             enddo
         enddo
     endif
@@ -119,18 +131,9 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
     !       lead to slow downs.
     if (coriolis_forcing) then
         do j=1,my
-            y = ylower + (j - 0.5d0) * dy
-            fdt = coriolis(y) * dt ! Calculate f dependent on coordinate system
-
-            ! Calculate matrix components
-            a(1,1) = 1.d0 - 0.5d0 * fdt**2 + fdt**4 / 24.d0
-            a(1,2) =  fdt - fdt**3 / 6.d0
-            a(2,1) = -fdt + fdt**3 / 6.d0
-            a(2,2) = a(1,1)
-
+            call row_coefficients(j)
             do i=1,mx
-                q(2,i,j) = q(2, i, j) * a(1,1) + q(3, i, j) * a(1,2)
-                q(3,i,j) = q(2, i, j) * a(2,1) + q(3, i, j) * a(2,2)
+                call coriolis_source_term(i, j)
             enddo
         enddo
     endif
@@ -138,26 +141,10 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
 
     ! wind -----------------------------------------------------------
     if (wind_forcing) then
-        ! Need storm location and direction for sector based wind drag
-        sloc = storm_location(t)
-        theta = storm_direction(t)
         do j=1,my
-            yc = ylower + (j - 0.5d0) * dy
+            call row_coefficients(j)
             do i=1,mx
-                xc = xlower + (i - 0.5d0) * dx
-                if (q(1,i,j) > dry_tolerance) then
-                    psi = atan2(yc - sloc(2), xc - sloc(1))
-                    if (theta > psi) then
-                        phi = (2.d0 * pi - theta + psi) * RAD2DEG
-                    else
-                        phi = (psi - theta) * RAD2DEG 
-                    endif
-                    wind_speed = sqrt(aux(wind_index,i,j)**2        &
-                                    + aux(wind_index+1,i,j)**2)
-                    tau = wind_drag(wind_speed, phi) * rho_air * wind_speed / rho(1)
-                    q(2,i,j) = q(2,i,j) + dt * tau * aux(wind_index,i,j)
-                    q(3,i,j) = q(3,i,j) + dt * tau * aux(wind_index+1,i,j)
-                endif
+                call wind_source_term(i, j)
             enddo
         enddo
     endif
@@ -165,86 +152,252 @@ subroutine src2(meqn,mbc,mx,my,xlower,ylower,dx,dy,q,maux,aux,t,dt)
 
     ! Atmosphere Pressure --------------------------------------------
     ! Handled here in this version
-    if (pressure_forcing .and. split_forcing .and. test_type == 1) then
+    if (split_pressure) then
         do j=1,my  
-            ym = ylower + (j - 1.d0) * dy
-            yc = ylower + (j - 0.5d0) * dy
-            yp = ylower + j * dy
+            call row_coefficients(j)
             do i=1,mx  
-                xm = xlower + (i - 1.d0) * dx
-                xc = xlower + (i - 0.5d0) * dx
-                xp = xlower + i * dx
-                
-                if (coordinate_system == 2) then
-                    ! Convert distance in lat-long to meters
-                    dx_meters = spherical_distance(xp,yc,xm,yc)
-                    dy_meters = spherical_distance(xc,yp,xc,ym)
-                else
-                    dx_meters = dx
-                    dy_meters = dy
-                endif
-
-                ! Extract depths
-                h = q(1,i,j)
-
-                ! Calculate gradient of Pressure
-                P_gradient = 0.d0
-                ! if (abs(xp - 0.5) < 0.1) then
-                !     P_gradient(1) = -2.5d0 * PI * g * rho(1) * sin(PI * (xp - 0.5d0) / 0.1d0)
-                ! end if
-                P_gradient(1) = (aux(pressure_index,i+1,j) &
-                               - aux(pressure_index,i-1,j)) / (2.d0 * dx_meters)
-                P_gradient(2) = (aux(pressure_index,i,j+1) &
-                               - aux(pressure_index,i,j-1)) / (2.d0 * dy_meters)
-
-                ! Modify momentum
-                if (h > dry_tolerance) then
-                    q(2, i, j) = q(2, i, j) - dt * h * P_gradient(1) / rho(1)
-                    q(3, i, j) = q(3, i, j) - dt * h * P_gradient(2) / rho(1)
-                end if
+                call pressure_source_term(i, j)
             enddo
         enddo
     endif
 
     ! Handle bathy source term here
-    if (split_forcing .and. test_type == 2) then
+    if (split_bathy) then
         do j=1,my  
-            ym = ylower + (j - 1.d0) * dy
-            yc = ylower + (j - 0.5d0) * dy
-            yp = ylower + j * dy
+            call row_coefficients(j)
             do i=1,mx  
-                xm = xlower + (i - 1.d0) * dx
-                xc = xlower + (i - 0.5d0) * dx
-                xp = xlower + i * dx
-
-                if (coordinate_system == 2) then
-                    ! Convert distance in lat-long to meters
-                    dx_meters = spherical_distance(xp,yc,xm,yc)
-                    dy_meters = spherical_distance(xc,yp,xc,ym)
+                call bathy_source_term(i, j)
+            end do
+        end do
+    end if
+
+    call finish_timing()
+
+contains
+
+    ! Stop the src2 timer, the summary is written when the run ends
+    subroutine finish_timing()
+        implicit none
+
+        if (timing) call timer_stop(src2_timer, start_clock)
+
+    end subroutine finish_timing
+
+    ! Quantities shared by the cells of row j needed by the enabled terms
+    subroutine row_coefficients(j)
+        implicit none
+
+        integer, intent(in) :: j
+
+        y = ylower + (j - 0.5d0) * dy
+        yc = y
+        if (sphere_forcing) then
+            tanyR = tan(y*DEG2RAD) / earth_radius
+        endif
+        if (coriolis_forcing) then
+            fdt = coriolis(y) * dt ! Calculate f dependent on coordinate system
+
+            ! Calculate matrix components
+            a(1,1) = 1.d0 - 0.5d0 * fdt**2 + fdt**4 / 24.d0
+            a(1,2) =  fdt - fdt**3 / 6.d0
+            a(2,1) = -fdt + fdt**3 / 6.d0
+            a(2,2) = a(1,1)
+        endif
+        if (split_pressure .or. split_bathy) then
+            call row_metrics(j, dx_meters, dy_meters)
+        endif
+
+    end subroutine row_coefficients
+
+    subroutine sphere_source_term(i, j)
+        implicit none
+
+        integer, intent(in) :: i, j
+
+        if (q(1,i,j) > dry_tolerance) then
+            ! source term in mass equation:
+            q(1,i,j) = q(1,i,j) + dt * tanyR * q(3,i,j)
+
+            if (sphere_source == 2) then
+                ! Momentum source terms that drop out if linearized:
+                ! These seem to have very little effect for
+                ! practical problems
+                huv = q(2,i,j)*q(3,i,j)/q(1,i,j)
+                huu = q(2,i,j)*q(2,i,j)/q(1,i,j)
+                hvv = q(3,i,j)*q(3,i,j)/q(1,i,j)
+                q(2,i,j) = q(2,i,j) + dt * tanyR * 2.d0*huv
+                q(3,i,j) = q(3,i,j) + dt * tanyR * (hvv - huu)
+            endif
+        endif
+
+    end subroutine sphere_source_term
+
+    subroutine friction_source_term(i, j)
+        implicit none
+
+        integer, intent(in) :: i, j
+
+        ! Extract appropriate momentum
+        if (q(1,i,j) < depth_tolerance) then
+            q(2:3,i,j) = 0.d0
+        else
+            ! Apply friction source term only if in shallower water
+            if (q(1,i,j) <= friction_depth) then
+                if (.not.variable_friction) then
+                    do nman = num_manning, 1, -1
+                        if (aux(1,i,j) .lt. manning_break(nman)) then
+                            coeff = manning_coefficient(nman)
+                        endif
+                    enddo
                 else
-                    dx_meters = dx
-                    dy_meters = dy
+                    coeff = aux(friction_index,i,j)
                 endif
+                
+                ! Calculate source term
+                gamma = sqrt(q(2,i,j)**2 + q(3,i,j)**2) * g     &   
+                      * coeff**2 / (q(1,i,j)**(7.d0/3.d0))
+                dgamma = 1.d0 + dt * gamma
+                q(2, i, j) = q(2, i, j) / dgamma
+                q(3, i, j) = q(3, i, j) / dgamma
+            endif
+        endif
+
+    end subroutine friction_source_term
+
+    subroutine coriolis_source_term(i, j)
+        implicit none
+
+        integer, intent(in) :: i, j
+
+        q(2,i,j) = q(2, i, j) * a(1,1) + q(3, i, j) * a(1,2)
+        q(3,i,j) = q(2, i, j) * a(2,1) + q(3, i, j) * a(2,2)
+
+    end subroutine coriolis_source_term
+
+    subroutine wind_source_term(i, j)
+        implicit none
+
+        integer, intent(in) :: i, j
+
+        xc = xlower + (i - 0.5d0) * dx
+        if (q(1,i,j) > dry_tolerance) then
+            psi = atan2(yc - sloc(2), xc - sloc(1))
+            if (theta > psi) then
+                phi = (2.d0 * pi - theta + psi) * RAD2DEG
+            else
+                phi = (psi - theta) * RAD2DEG 
+            endif
+            wind_speed = sqrt(aux(wind_index,i,j)**2        &
+                            + aux(wind_index+1,i,j)**2)
+            tau = wind_drag(wind_speed, phi) * rho_air * wind_speed / rho(1)
+            q(2,i,j) = q(2,i,j) + dt * tau * aux(wind_index,i,j)
+            q(3,i,j) = q(3,i,j) + dt * tau * aux(wind_index+1,i,j)
+        endif
+
+    end subroutine wind_source_term
+
+    subroutine pressure_source_term(i, j)
+        implicit none
 
-                h = q(1, i, j)
-                b_gradient = 0.d0
-                ! if (abs(xp - 0.5d0) < 0.1d0) then
-                !     b_gradient(1) = -2.5d0 * PI * sin(PI * (xp - 0.5d0) / 0.1d0)
-                ! end if
-                ! b_gradient(1) = (bathy(xp, yc) - bathy(xm, yc)) / (2.d0 * dx_meters)
-                ! b_gradient(2) = (bathy(xc, yp) - bathy(xc, ym)) / (2.d0 * dy_meters)
-                b_gradient(1) = (aux(1,i+1,j) - aux(1,i-1,j)) / (2.d0 * dx_meters)
-                b_gradient(2) = (aux(1,i,j+1) - aux(1,i,j-1)) / (2.d0 * dy_meters)
-
-                if (h > dry_tolerance) then
-                    q(2, i, j) = q(2, i, j) - dt * g * h * b_gradient(1)
-                    q(3, i, j) = q(3, i, j) - dt * g * h * b_gradient(2)
+        integer, intent(in) :: i, j
+
+        ! Extract depths
+        h = q(1,i,j)
+
+        ! Calculate gradient of Pressure
+        P_gradient = 0.d0
+        ! if (abs(xp - 0.5) < 0.1) then
+        !     P_gradient(1) = -2.5d0 * PI * g * rho(1) * sin(PI * (xp - 0.5d0) / 0.1d0)
+        ! end if
+        P_gradient(1) = (aux(pressure_index,i+1,j) &
+                       - aux(pressure_index,i-1,j)) / (2.d0 * dx_meters)
+        P_gradient(2) = (aux(pressure_index,i,j+1) &
+                       - aux(pressure_index,i,j-1)) / (2.d0 * dy_meters)
+
+        ! Modify momentum
+        if (h > dry_tolerance) then
+            q(2, i, j) = q(2, i, j) - dt * h * P_gradient(1) / rho(1)
+            q(3, i, j) = q(3, i, j) - dt * h * P_gradient(2) / rho(1)
+        end if
+
+    end subroutine pressure_source_term
+
+    subroutine bathy_source_term(i, j)
+        implicit none
+
+        integer, intent(in) :: i, j
+
+        h = q(1, i, j)
+        b_gradient = 0.d0
+        ! if (abs(xp - 0.5d0) < 0.1d0) then
+        !     b_gradient(1) = -2.5d0 * PI * sin(PI * (xp - 0.5d0) / 0.1d0)
+        ! end if
+        ! b_gradient(1) = (bathy(xp, yc) - bathy(xm, yc)) / (2.d0 * dx_meters)
+        ! b_gradient(2) = (bathy(xc, yp) - bathy(xc, ym)) / (2.d0 * dy_meters)
+        b_gradient(1) = (aux(1,i+1,j) - aux(1,i-1,j)) / (2.d0 * dx_meters)
+        b_gradient(2) = (aux(1,i,j+1) - aux(1,i,j-1)) / (2.d0 * dy_meters)
+
+        if (h > dry_tolerance) then
+            q(2, i, j) = q(2, i, j) - dt * g * h * b_gradient(1)
+            q(3, i, j) = q(3, i, j) - dt * g * h * b_gradient(2)
+        end if
+
+    end subroutine bathy_source_term
+
+    ! Metric factors of row j of this patch, dx and dy unless on a lat-long
+    ! grid where they are looked up from the tables (or computed if the patch
+    ! does not match a level)
+    subroutine row_metrics(j, dx_meters, dy_meters)
+        implicit none
+
+        integer, intent(in) :: j
+        real(kind=8), intent(out) :: dx_meters, dy_meters
+
+        real(kind=8) :: xm, xc, xp, ym, yc, yp
+
+        if (coordinate_system /= 2) then
+            dx_meters = dx
+            dy_meters = dy
+        else if (level > 0) then
+            dx_meters = row_dx_meters(row_offset + j, level)
+            dy_meters = row_dy_meters(row_offset + j, level)
+        else
+            ym = ylower + (j - 1.d0) * dy
+            yc = ylower + (j - 0.5d0) * dy
+            yp = ylower + j * dy
+            xm = xlower
+            xc = xlower + 0.5d0 * dx
+            xp = xlower + dx
+            dx_meters = spherical_distance(xp,yc,xm,yc)
+            dy_meters = spherical_distance(xc,yp,xc,ym)
+        end if
+
+    end subroutine row_metrics
+
+    ! Level whose spacing matches this patch and the offset of the patch's
+    ! first row in that level's table, level = 0 if there is none
+    subroutine find_level(level, row_offset)
+        implicit none
+
+        integer, intent(out) :: level, row_offset
+
+        integer :: m, num_rows
+
+        level = 0
+        row_offset = 0
+        do m=1,mxnest
+            if (abs(dx - hxposs(m)) <= 1.d-12 * dx .and.                  &
+                abs(dy - hyposs(m)) <= 1.d-12 * dy) then
+                num_rows = nint((domain_yupper - domain_ylower) / hyposs(m))
+                row_offset = nint((ylower - domain_ylower) / dy)
+                if (row_offset >= 0 .and. row_offset + my <= num_rows) then
+                    level = m
                 end if
-            end do
+                return
+            end if
         end do
-    end if
 
-contains
+    end subroutine find_level
 
     real(kind=8) pure function bathy(x, y) result(topo)
         implicit none
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+r"""Steady state detection for running simulations
+
+A monitor is polled by :class:`sweep.LocalController` while a job runs (see
+``job.monitor``).  :meth:`SteadyStateMonitor.check` reads whatever the run
+wrote to its output directory since the last poll and returns the simulation
+time at which the solution was found to be steady, after which the run is
+stopped.  Two measures of the change per unit time are available:
+
+:class:`GaugeMonitor`
+    the change of every value recorded at every gauge over a trailing window
+    of simulation time,
+:class:`FrameMonitor`
+    the global residual ``max |q(t_n) - q(t_n-1)| / (t_n - t_n-1)`` between
+    consecutive output frames on the level 1 grid.
+
+GeoClaw buffers gauge output and writes it at least at every output time, so
+both monitors see the solution at the resolution of the output frames or
+better.
+"""
+
+import os
+import glob
+import bisect
+
+import numpy as np
+
+import frames
+
+
+class SteadyStateMonitor(object):
+    r"""Base class of the steady state monitors
+
+    The solution is steady once the change per unit time returned by
+    :meth:`rate` is below *tolerance* at a time of at least *min_time*.
+    """
+
+    # A run stopped by the monitor has its answer
+    success = True
+    reason = "steady"
+
+    def __init__(self, tolerance=1e-6, min_time=0.0, interval=1.0):
+        self.tolerance = tolerance
+        self.min_time = min_time
+        # Wall clock seconds between polls
+        self.interval = interval
+        self.reset()
+
+    def __str__(self):
+        return (f"{type(self).__name__}: tolerance {self.tolerance}, "
+                f"steady at t = {self.steady_time}")
+
+    def reset(self):
+        r"""Forget everything read, called before each run"""
+        self.steady_time = None
+
+    def parameters(self):
+        r"""Settings deciding when the run is stopped, part of the run's key"""
+        return {"tolerance": self.tolerance, "min_time": self.min_time}
+
+    def rate(self, path):
+        r"""Latest time and change per unit time in *path*, ``None`` if unknown"""
+        raise NotImplementedError("Monitors have to implement rate.")
+
+    def check(self, path):
+        r"""Time the output in *path* became steady, ``None`` if it is not"""
+        if self.steady_time is None:
+            latest = self.rate(path)
+            if latest is not None:
+                t, rate = latest
+                if t >= self.min_time and rate < self.tolerance:
+                    self.steady_time = t
+        return self.steady_time
+
+
+class GaugeMonitor(SteadyStateMonitor):
+    r"""Watch the change of the gauge records over *window* of simulation time
+
+    Only the gauges numbered in *gauges* are watched if given, all columns of a
+    gauge file after the time (q, eta and the aux fields) are compared.
+    """
+
+    def __init__(self, tolerance=1e-6, window=1.0, gauges=None, **kwargs):
+        self.window = window
+        self.gauges = gauges
+        super(GaugeMonitor, self).__init__(tolerance, **kwargs)
+
+    def parameters(self):
+        parameters = super(GaugeMonitor, self).parameters()
+        parameters["window"] = self.window
+        parameters["gauges"] = None if self.gauges is None \
+                                    else sorted(self.gauges)
+        return parameters
+
+    def reset(self):
+        super(GaugeMonitor, self).reset()
+        self._offsets = {}
+        self._times = {}
+        self._values = {}
+
+    def gauge_files(self, path):
+        r"""Gauge files in *path* keyed by gauge number"""
+        gauge_files = {}
+        for gauge_path in glob.glob(os.path.join(path, "gauge*.txt")):
+            number = os.path.basename(gauge_path)[5:-4]
+            if number.isdigit() and (self.gauges is None
+                                     or int(number) in self.gauges):
+                gauge_files[int(number)] = gauge_path
+        return gauge_files
+
+    def read_gauge(self, gauge, gauge_path):
+        r"""Append the complete lines written to *gauge_path* since last read"""
+        with open(gauge_path, "r") as gauge_file:
+            gauge_file.seek(self._offsets.get(gauge, 0))
+            lines = gauge_file.readlines()
+        # Leave a line that is still being written for the next read
+        if len(lines) > 0 and not lines[-1].endswith("\n"):
+            lines.pop()
+        self._offsets[gauge] = (self._offsets.get(gauge, 0)
+                                + sum(len(line) for line in lines))
+
+        times = self._times.setdefault(gauge, [])
+        values = self._values.setdefault(gauge, [])
+        for line in lines:
+            if line.startswith("#") or len(line.split()) < 3:
+                continue
+            # Columns are level, t and the recorded values
+            record = np.array(line.split()[1:], dtype=float)
+            times.append(record[0])
+            values.append(record[1:])
+
+    def rate(self, path):
+        latest_time = None
+        max_rate = 0.0
+        for (gauge, gauge_path) in self.gauge_files(path).items():
+            self.read_gauge(gauge, gauge_path)
+            times = self._times[gauge]
+            values = self._values[gauge]
+            if len(times) == 0:
+                return None
+            start = bisect.bisect_right(times, times[-1] - self.window) - 1
+            if start < 0:
+                return None
+            max_rate = max(max_rate, np.max(np.abs(values[-1] - values[start]))
+                                     / (times[-1] - times[start]))
+            # Records before the window are no longer needed
+            del times[:start], values[:start]
+            latest_time = times[-1] if latest_time is None \
+                                    else min(latest_time, times[-1])
+        if latest_time is None:
+            return None
+        return latest_time, max_rate
+
+
+class FrameMonitor(SteadyStateMonitor):
+    r"""Watch the global residual of q between consecutive output frames
+
+    The time file of a frame is written after its data, so a frame is read
+    once its ``fort.tXXXX`` exists.
+    """
+
+    def reset(self):
+        super(FrameMonitor, self).reset()
+        self._frame = None
+        self._t = None
+        self._q = None
+        self._rate = None
+
+    def rate(self, path):
+        for frame in frames.list_frames(path):
+            if self._frame is not None and frame <= self._frame:
+                continue
+            solution = frames.Frame(path, frame)
+            q = np.array(solution.level_grid().q)
+            if self._q is not None and q.shape == self._q.shape \
+                                   and solution.t > self._t:
+                self._rate = (np.nanmax(np.abs(q - self._q))
+                              / (solution.t - self._t))
+            self._frame, self._t, self._q = frame, solution.t, q
+        if self._rate is None:
+            return None
+        return self._t, self._rate
@@ -2,19 +2,60 @@
 
 import os
 import sys
+import concurrent.futures
 
 import numpy as np
 import matplotlib.pyplot as plt
 
-import clawpack.pyclaw.solution as sol
 import clawpack.geoclaw.surge.plot as surgeplot
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+import frames
+
+# Frame and resolution compared
+frame = 8
+ratio = 1
+
+# Fields of the figures, negative fields are velocities
+figure_fields = [0, 3, 1, -1]
+
+
+def output_path(base_path, split, depth):
+    return os.path.join(base_path, f"{str(split)[0]}_n{ratio}_d{abs(depth)}_output")
+
+
+def field_values(q, field):
+    r"""Values of *field* in the transect *q*, velocities for negative fields"""
+    if field < 0:
+        return np.where(q[0, :] >1e-3, q[abs(field), :] / q[0, :], np.zeros(q.shape[1]))
+    return q[field, :]
+
+
+def extract_transects(path, fields=figure_fields, y0=0.0):
+    r"""Read *fields* along *y0* and the storm position from one output
+
+    Returns the list of ``(x, {field: values})`` of the patches crossing
+    *y0* and the storm track at the compared frame.  The values of the
+    conserved fields are views into the frame, only velocities are computed,
+    so callers must copy them before modifying them.
+    """
+    solution = frames.load_frame(path, frame)
+    transects = [(x, {field: field_values(q, field) for field in fields})
+                 for (x, q) in solution.transect(y0)]
+    track = surgeplot.track_data(os.path.join(path, "fort.track"))
+    return transects, track.get_track(frame)
+
+
 def plot_comparison(base_path, ax, depth, y0=0.0, field=3, limits=None, 
                                           ylabel=None, title=None, 
-                                          style=['rx-', 'k-'], legend=False):
-    
-    frame = 8
-    ratio = 1
+                                          style=['rx-', 'k-'], legend=False,
+                                          transects=None):
+    r"""Plot *field* of the split and non-split runs at *depth* on *ax*
+
+    *transects* maps each split value to the result of
+    :func:`extract_transects`, the outputs are read if it is not given.
+    """
 
     compute_limits = False
     if limits is None:
@@ -26,33 +67,24 @@ def plot_comparison(base_path, ax, depth, y0=0.0, field=3, limits=None,
     plot_item = [None, None]
     item_label = ["split", "non-split"]
     for (i, split) in enumerate([True, False]):
-        # Load solution
-        path = os.path.join(base_path, f"{str(split)[0]}_n{ratio}_d{abs(depth)}_output")
-        solution = sol.Solution(path=path, frame=frame, file_format='binary')
+        # Load solution, frames are shared between calls for each field
+        if transects is None:
+            split_transects, track_data = extract_transects(
+                          output_path(base_path, split, depth), [field], y0)
+        else:
+            split_transects, track_data = transects[split]
         
-        # Plot all states
-        for state in solution.states:
-            if state.grid.lower[1] <= y0 and y0 <= state.grid.upper[1]:
-                x = state.grid.centers[0]
-                y = state.grid.centers[1]
-                dy = state.grid.delta[1]
-                index = np.where(abs(y - y0) <= dy / 2.0)[0][0]
-                q = state.q[:, :, index]
-
-                if field < 0:
-                    values = np.where(q[0, :] >1e-3, q[abs(field), :] / q[0, :], np.zeros(q.shape[1]))
-                else:
-                    values = q[field, :]
-                plot_item[i], = ax.plot(x, values, style[i], markersize=5, label=item_label[i])
-
-
-                if compute_limits:
-                    limits[0] = min(np.min(values), limits[0])
-                    limits[1] = max(np.max(values), limits[1])
+        # Plot all patches crossing y0
+        for (x, values) in split_transects:
+            values = values[field]
+            plot_item[i], = ax.plot(x, values, style[i], markersize=5, label=item_label[i])
+
+
+            if compute_limits:
+                limits[0] = min(np.min(values), limits[0])
+                limits[1] = max(np.max(values), limits[1])
 
     # Plot storm center
-    track = surgeplot.track_data(os.path.join(path, "fort.track"))
-    track_data = track.get_track(frame)
     ax.plot([track_data[0], track_data[0]], limits, 'b--')
 
     # Fix up common x-axis
@@ -73,40 +105,28 @@ def plot_comparison(base_path, ax, depth, y0=0.0, field=3, limits=None,
     return ax
 
 
-if __name__ == '__main__':
-    base_path = os.path.expandvars(os.path.join("${DATA_PATH}", 
-                                                "well-balanced-pressure",
-                                                "storm"))
-    if len(sys.argv) > 1:
-        depth = int(sys.argv[-1])
-        if depth == 100:
-            x_mom_limits = (-2, 2.5)
-            x_vel_limits = (-0.014, 0.02)
-        else:
-            x_mom_limits = None
-            x_vel_limits = None
-
-    else:
-        depth = 500
-        x_mom_limits = (-5, 2)
-        x_vel_limits = (-0.01, 0.003)
+def plot_depth(base_path, depth, x_mom_limits=None, x_vel_limits=None,
+                                  transects=None):
+    r"""Save the comparison figures of *depth*"""
 
     fig, ax = plt.subplots(1, 1, layout='constrained')
     plot_comparison(base_path, ax, depth, field=0, limits=(depth - 0.25, depth + 1),
                                     title="Depth Comparison", 
-                                    ylabel=r"$h$ (m)")
+                                    ylabel=r"$h$ (m)", transects=transects)
     fig.savefig(f"storm_{depth}_depth.pdf")
 
     fig, ax = plt.subplots(1, 1, layout='constrained')
     plot_comparison(base_path, ax, depth, field=3, limits=(-0.25, 1), 
                                     title="Surface Comparison", 
-                                    ylabel=r"$\eta$ (m)", legend=True)
+                                    ylabel=r"$\eta$ (m)", legend=True,
+                                    transects=transects)
     fig.savefig(f"storm_{depth}_surface.pdf")
     
     fig, ax = plt.subplots(1, 1, layout='constrained')
     plot_comparison(base_path, ax, depth, field=1, limits=x_mom_limits, 
                                    title="X-Momentum Comparison", 
-                                   ylabel=r"$hu$ ($m^2/s$)")
+                                   ylabel=r"$hu$ ($m^2/s$)",
+                                   transects=transects)
     fig.savefig(f"storm_{depth}_xmomentum.pdf")
 
     # fig, ax = plt.subplots(1, 1, layout='constrained')
@@ -118,7 +138,8 @@ if __name__ == '__main__':
     fig, ax = plt.subplots(1, 1, layout='constrained')
     plot_comparison(base_path, ax, depth, field=-1,  limits=x_vel_limits, 
                                    title="X-Velocity Comparison", 
-                                   ylabel=r"$u$ ($m/s$)")
+                                   ylabel=r"$u$ ($m/s$)",
+                                   transects=transects)
     fig.savefig(f"storm_{depth}_xvelocity.pdf")
 
     # fig, ax = plt.subplots(1, 1, layout='constrained')
@@ -127,4 +148,55 @@ if __name__ == '__main__':
     #                                ylabel=r"$v$ ($m/s$)")
     # fig.savefig(f"storm_{depth}_yvelocity.pdf")
 
-    # plt.show()
\ No newline at end of file
+    plt.close("all")
+
+
+def depth_limits(depth):
+    r"""Momentum and velocity limits of the figures of *depth*"""
+    if depth == 100:
+        return (-2, 2.5), (-0.014, 0.02)
+    return None, None
+
+
+def plot_depths(base_path, depths, max_workers=None):
+    r"""Save the figures of every depth in *depths*
+
+    Each output directory is read once, in parallel across processes, for
+    all the fields of the figures, which are then drawn from memory.
+    """
+    keys = [(split, depth) for depth in depths for split in [True, False]]
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as pool:
+        results = pool.map(extract_transects,
+                           [output_path(base_path, split, depth)
+                            for (split, depth) in keys])
+        transects = dict(zip(keys, results))
+
+    for depth in depths:
+        plot_depth(base_path, depth, *depth_limits(depth),
+                   transects={split: transects[split, depth]
+                              for split in [True, False]})
+
+
+if __name__ == '__main__':
+    base_path = os.path.expandvars(os.path.join("${DATA_PATH}", 
+                                                "well-balanced-pressure",
+                                                "storm"))
+    if len(sys.argv) > 1 and sys.argv[1] == "all":
+        # Every depth of the sweep, or those given after "all"
+        depths = [int(depth) for depth in sys.argv[2:]]
+        if len(depths) == 0:
+            depths = [50, 100, 200]
+        plot_depths(base_path, depths)
+        sys.exit(0)
+
+    if len(sys.argv) > 1:
+        depth = int(sys.argv[-1])
+        x_mom_limits, x_vel_limits = depth_limits(depth)
+    else:
+        depth = 500
+        x_mom_limits = (-5, 2)
+        x_vel_limits = (-0.01, 0.003)
+
+    plot_depth(base_path, depth, x_mom_limits, x_vel_limits)
+
+    # plt.show()
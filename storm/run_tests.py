@@ -1,25 +1,44 @@
 #!/usr/bin/env python
 
 import os
+import sys
+import copy
 import numpy
 import datetime
+import functools
 
 import batch.batch
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+import sweep
+import convergence
+import compare
+
 import clawpack.geoclaw.topotools as topotools
 
 days2seconds = lambda days: days * 60.0**2 * 24.0
 
+
+@functools.lru_cache(maxsize=None)
+def base_rundata():
+    r"""Run data of setrun.py, built and its storm file written only once"""
+    import setrun
+    return setrun.setrun()
+
+
 class SplitSourceJob(batch.batch.Job):
     r""""""
 
-    def __init__(self, split=False, ratio=1, depth=1000, base_path='./'):
+    def __init__(self, split=False, ratio=1, depth=1000, timing=False,
+                       spinup_time=None, base_path='./'):
 
         super(SplitSourceJob, self).__init__()
 
         self.split_forcing = split
         self.ratio = ratio
         self.depth = depth
+        self.spinup_time = spinup_time
 
         self.type = "well-balanced-pressure"
         self.name = "storm"
@@ -27,11 +46,11 @@ class SplitSourceJob(batch.batch.Job):
         self.executable = "xgeoclaw"
 
 
-        # Create base data object
-        import setrun
-        self.rundata = setrun.setrun()
+        # Create base data object from the shared one
+        self.rundata = copy.deepcopy(base_rundata())
 
         self.rundata.splitting_data.split_forcing = self.split_forcing
+        self.rundata.splitting_data.timing = timing
         self.rundata.clawdata.num_cells[0] = 300 * self.ratio
         self.rundata.clawdata.num_cells[1] = 200 * self.ratio
         self.rundata.topo_data.basin_depth = float(-self.depth)
@@ -53,13 +72,56 @@ class SplitSourceJob(batch.batch.Job):
 
 if __name__ == '__main__':
 
+    if len(sys.argv) > 1 and sys.argv[1] == "convergence":
+        # Resolution ladder, optionally within a wall time budget per run:
+        #   python run_tests.py convergence [depth] [max_hours]
+        depth = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        max_wall_time = None
+        if len(sys.argv) > 3:
+            max_wall_time = float(sys.argv[3]) * 3600.0
+        for split in [True, False]:
+            jobs = [SplitSourceJob(split=split, ratio=ratio, depth=depth)
+                    for ratio in [1, 2, 4, 8]]
+            controller = convergence.ConvergenceController(jobs,
+                                                 max_wall_time=max_wall_time)
+            print(controller)
+            controller.run()
+        sys.exit(0)
+
     jobs = []
     for split in [True, False]:
         for depth in [50, 100, 200]:
+            # Pass spinup_time=0.0 to run the storm ramp-up from t0 once and
+            # restart from it every job whose data before t = 0 is the same,
+            # split and non-split jobs each have their own spin-up
             jobs.append(SplitSourceJob(split=split, depth=depth))
 
-    controller = batch.batch.BatchController(jobs)
-    controller.wait = True
-    controller.plot = True
-    print(controller)
-    controller.run()
+    # Stop a split run once its surface differs from the non-split run by
+    # more than this (m) in any frame, None to run every job to the end
+    divergence_tolerance = None
+
+    controllers = [sweep.LocalController(jobs)]
+    if divergence_tolerance is not None:
+        # The non-split references have to be complete before the split runs
+        # compare against them, so they run first
+        references = [job for job in jobs if not job.split_forcing]
+        controllers = [sweep.LocalController(references),
+                       sweep.LocalController([job for job in jobs
+                                                  if job.split_forcing])]
+
+    all_paths = []
+    for controller in controllers:
+        controller.plot = True
+        if divergence_tolerance is not None and controller is controllers[1]:
+            for job in controller.jobs:
+                reference = [paths for (other, paths)
+                                   in zip(references, all_paths)
+                                   if other.depth == job.depth][0]
+                if reference.get("returncode") != 0:
+                    continue
+                job.monitor = compare.DivergenceMonitor(
+                    reference["output"], divergence_tolerance,
+                    series_path=os.path.join(controller.job_paths(job)["job"],
+                                             f"{job.prefix}_comparison.npz"))
+        print(controller)
+        all_paths.extend(controller.run())
@@ -15,7 +15,6 @@ import shutil
 import numpy as np
 
 import clawpack.clawutil.data as data
-from clawpack.geoclaw.surge.storm import Storm
 import clawpack.clawutil as clawutil
 import clawpack.geoclaw.units as units
 
@@ -28,6 +27,82 @@ def days2seconds(days):
 scratch_dir = os.path.join(os.environ["CLAW"], "geoclaw", "scratch")
 
 
+def synthetic_storms(t, speed=15.0 / 3.6, heading=0.0, y0=0.0,
+                        max_wind_speed=64.0, min_pressure=940e2,
+                        storm_radius=300e3, ambient_pressure=101.3e3,
+                        ramp_time=days2seconds(1)):
+    r"""Forecasts of an ensemble of synthetic storms at the times *t*
+
+    The storms move in a straight line at *speed* (m/s) in the direction
+    *heading* (radians from the x-axis) through (0, *y0*) at t = 0.  The max
+    wind radius follows the C0 polynomial in the max wind speed and the
+    central pressure drops from *ambient_pressure* to *min_pressure* over
+    *ramp_time* before t = 0.  Every parameter is either a scalar or an array
+    with one value per storm, scalars are shared by all storms.
+
+    Returns a dictionary of arrays of shape (num_storms, num_forecasts), and
+    (num_storms, num_forecasts, 2) for ``eye_location``.
+    """
+    t = np.asarray(t, dtype=float)
+    parameters = [np.atleast_1d(value).astype(float)
+                  for value in (speed, heading, y0, max_wind_speed,
+                                min_pressure, storm_radius, ambient_pressure,
+                                ramp_time)]
+    num_storms = np.broadcast_shapes(*[value.shape
+                                       for value in parameters])[0]
+    shape = (num_storms, t.shape[0])
+
+    # One row per storm, one column per forecast
+    (speed, heading, y0, max_wind_speed, min_pressure, storm_radius,
+     ambient_pressure, ramp_time) = \
+                [np.broadcast_to(value, (num_storms,))[:, np.newaxis]
+                 for value in parameters]
+
+    eye_location = np.empty(shape + (2,))
+    eye_location[..., 0] = speed * np.cos(heading) * t
+    eye_location[..., 1] = y0 + speed * np.sin(heading) * t
+
+    max_wind_speed = np.broadcast_to(max_wind_speed, shape).copy()
+    C0 = 218.3784
+    max_wind_radius = (C0 - 1.2014 * max_wind_speed
+                          + (max_wind_speed / 10.9884) ** 2
+                          - (max_wind_speed / 35.3052) ** 3
+                          - 145.5090 * np.cos(eye_location[..., 1] * 0.0174533)
+                      ) * 1e3
+
+    c = ramp_time
+    ramp = np.where(t < 0.0, -2 / c**3 * t**3 - 3 / c**2 * t**2 + 1,
+                             np.ones(shape))
+    central_pressure = ambient_pressure - (ambient_pressure - min_pressure) * ramp
+
+    return {"t": np.broadcast_to(t, shape).copy(),
+            "eye_location": eye_location,
+            "max_wind_speed": max_wind_speed,
+            "max_wind_radius": max_wind_radius,
+            "central_pressure": central_pressure,
+            "storm_radius": np.broadcast_to(storm_radius, shape).copy()}
+
+
+def write_storms(paths, storms, time_offset=0.0):
+    r"""Write the storms returned by :func:`synthetic_storms` to *paths*
+
+    The files use the layout of ``Storm.write(path, file_format="geoclaw")``,
+    each file is formatted in a single operation from the stacked columns.
+    """
+    columns = np.stack((storms["t"], storms["eye_location"][..., 0],
+                        storms["eye_location"][..., 1],
+                        storms["max_wind_speed"], storms["max_wind_radius"],
+                        storms["central_pressure"], storms["storm_radius"]),
+                       axis=-1)
+    num_forecasts = columns.shape[1]
+    header = f"{num_forecasts}\n{time_offset}\n\n"
+    forecasts = ("%20.8e" * 7 + "\n") * num_forecasts
+    for (path, values) in zip(paths, columns):
+        with open(path, "w") as storm_file:
+            storm_file.write(header
+                             + forecasts % tuple(values.ravel().tolist()))
+
+
 class SplittingData(data.ClawData):
     r""""""
 
@@ -37,6 +112,8 @@ class SplittingData(data.ClawData):
         # GeoClaw physics parameters
         self.add_attribute("split_forcing", False)
         self.add_attribute("test_type", 0)
+        self.add_attribute("fused_source", False)
+        self.add_attribute("timing", False)
 
     def write(self, data_source="setrun.py", out_file="splitting.data"):
 
@@ -49,6 +126,8 @@ class SplittingData(data.ClawData):
         else:
             self.test_type = 0
         self.data_write("test_type", description="(Pressure or bathy test)")
+        self.data_write("fused_source", description="(Fuse source terms)")
+        self.data_write("timing", description="(Time custom routines)")
         self.close_data_file()
 
 
@@ -343,6 +422,9 @@ def setrun(claw_pkg="geoclaw"):
     # Force the gauges to also record the wind and pressure fields
     rundata.gaugedata.aux_out_fields = [4, 5, 6]
 
+    # Write the gauge records in binary, read by gauge_store.GaugeStore
+    rundata.gaugedata.file_format = "binary"
+
     # ------------------------------------------------------------------
     # GeoClaw specific parameters:
     # ------------------------------------------------------------------
@@ -416,41 +498,15 @@ def setgeo(rundata):
     data.display_landfall_time = True
     data.storm_file = os.path.join(os.getcwd(), "synthetic.storm")
 
-    # Construct synthetic storm
-    storm = Storm()
-    storm.time_offset = 0.0
+    # Construct synthetic storm, moving at the km/h average for the Atlantic
+    # basin with a constant max wind speed and a central pressure ramped
+    # down over the day before t = 0, an ensemble of one storm.  Extent of
+    # storm set to 300 km.
     num_forecasts = 12
-    storm.t = np.linspace(rundata.clawdata.t0, rundata.clawdata.tfinal, num_forecasts)
-
-    def ramp_function(t):
-        c = days2seconds(1)
-        return np.where(
-            t < 0.0, -2 / c**3 * t**3 - 3 / c**2 * t**2 + 1, np.ones(t.shape)
-        )
-
-    def storm_x(t):
-        """Position of storm eye, based on km/h average for Atlantic basin."""
-        return 15.0 / 3.6 * t
+    t = np.linspace(rundata.clawdata.t0, rundata.clawdata.tfinal, num_forecasts)
+    forecasts = synthetic_storms(t, storm_radius=300e3,
+                                 ambient_pressure=geo_data.ambient_pressure)
 
-    storm.eye_location = np.array([[storm_x(t), 0.0] for t in storm.t])
-    storm.max_wind_speed = np.array([64.0 for t in storm.t])
-
-    # Max Wind Radius
-    C0 = 218.3784
-    storm.max_wind_radius = np.empty(num_forecasts)
-    for n, t in enumerate(storm.t):
-        storm.max_wind_radius[n] = (
-            C0
-            - 1.2014 * storm.max_wind_speed[n]
-            + (storm.max_wind_speed[n] / 10.9884) ** 2
-            - (storm.max_wind_speed[n] / 35.3052) ** 3
-            - 145.5090 * np.cos(storm.eye_location[n, 1] * 0.0174533)
-        ) * 1e3
-
-    # Constant central pressure
-    storm.central_pressure = geo_data.ambient_pressure - (
-        geo_data.ambient_pressure - 940e2) * ramp_function(storm.t)
-    
     # Add central pressure - From Kossin, J. P. WAF 2015
     # a = -0.0025
     # b = -0.36
@@ -461,16 +517,16 @@ def setgeo(rundata):
     #             + b * storm.max_wind_speed[n] + c)
     # storm.central_pressure = units.convert(storm.central_pressure, "mbar", 'Pa')
 
-    # Extent of storm set to 300 km
-    storm.storm_radius = 300e3 * np.ones(num_forecasts)
-
     # Write out storm
-    storm.write(data.storm_file, file_format="geoclaw")
+    write_storms([data.storm_file], forecasts, time_offset=0.0)
 
     # Pressure source term splitting
     rundata.add_data(SplittingData(), "splitting_data")
     rundata.splitting_data.split_forcing = False
     rundata.splitting_data.test_type = "pressure"
+    # Single sweep over each patch for all source terms, no faster in the
+    # src2 benchmark so the separate sweeps stay the default
+    rundata.splitting_data.fused_source = False
 
     return rundata
     # end of function setgeo
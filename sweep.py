@@ -0,0 +1,706 @@
+#!/usr/bin/env python
+r"""Local execution of the well-balanced pressure sweeps
+
+The sweeps in the example directories are lists of ``batch.batch.Job``
+objects.  :class:`LocalController` is a drop-in replacement for
+``batch.batch.BatchController`` that lays the runs out in the same
+``${DATA_PATH}/<type>/<name>/<prefix>_{data,output,plots,log.txt}`` structure
+but runs as many of them at once as the machine can hold given the number of
+OpenMP threads each job uses.  A job whose data files, storm file and
+executable are unchanged since its last successful run is not rerun; its
+existing output directory is reused instead.  Runs with the ``timing`` flag set
+in ``splitting.data`` report the time spent in each custom routine, which is
+attached to the job.
+
+Jobs that set ``spinup_time`` share the part of the simulation before it: the
+spin-up data of each job (see :meth:`LocalController.spinup_job`) is hashed,
+every distinct spin-up is run once up to ``spinup_time`` and checkpointed,
+and each job is then restarted from a copy of its spin-up's checkpoint and
+output, so that its frames are numbered as in a run from the start.
+
+The data directories of the jobs are written in parallel by forked worker
+processes before any job runs, and the storm file of a job is symlinked into
+its data directory rather than copied or regenerated.
+"""
+
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import tempfile
+import hashlib
+import shutil
+import signal
+import subprocess
+import threading
+import multiprocessing
+import concurrent.futures
+
+import batch.batch
+
+
+def available_cores():
+    r"""Number of cores this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def max_concurrent_jobs(omp_num_threads=1, num_cores=None):
+    r"""Number of jobs that fit on *num_cores* with *omp_num_threads* each"""
+    if num_cores is None:
+        num_cores = available_cores()
+    return max(1, num_cores // max(1, int(omp_num_threads)))
+
+
+def hash_file(path, hash_obj=None, block_size=2**20):
+    r"""Update *hash_obj* (a new sha256 by default) with the contents of *path*"""
+    if hash_obj is None:
+        hash_obj = hashlib.sha256()
+    with open(path, "rb") as data_file:
+        for block in iter(lambda: data_file.read(block_size), b""):
+            hash_obj.update(block)
+    return hash_obj
+
+
+def read_timing(path):
+    r"""Read a ``routine_timing.txt`` summary written by ``timing_module``
+
+    Returns a dictionary mapping each timed routine to a dictionary with its
+    number of ``calls`` and the ``seconds`` spent in it, or ``None`` if
+    *path* does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    timing = {}
+    with open(path, "r") as timing_file:
+        for line in timing_file:
+            if line.startswith("#") or len(line.split()) < 3:
+                continue
+            routine, calls, seconds = line.split()[:3]
+            timing[routine] = {"calls": int(calls), "seconds": float(seconds)}
+    return timing
+
+
+# Controller and (job, paths) pairs inherited by forked data writers
+_pending_writes = None
+
+
+def _write_pending(index):
+    r"""Write the data of the pending run *index* in a forked worker"""
+    controller, runs = _pending_writes
+    controller.write_job_data(*runs[index])
+
+
+def latest_checkpoint(path):
+    r"""Most recently written ``fort.chk*`` file in *path*, ``None`` if none"""
+    checkpoints = glob.glob(os.path.join(path, "fort.chk*"))
+    if len(checkpoints) == 0:
+        return None
+    return max(checkpoints, key=os.path.getmtime)
+
+
+def output_times(clawdata):
+    r"""Output times after ``t0`` of *clawdata* (output styles 1 and 2)"""
+    if clawdata.output_style == 1:
+        num_output_times = clawdata.num_output_times
+        return [clawdata.t0 + (clawdata.tfinal - clawdata.t0) * n
+                                                        / num_output_times
+                for n in range(1, num_output_times + 1)]
+    if clawdata.output_style == 2:
+        return list(clawdata.output_times)
+    raise ValueError(f"Output style {clawdata.output_style} has no output "
+                     "times.")
+
+
+class SpinUpJob(batch.batch.Job):
+    r"""Shared beginning of the runs of one or more jobs
+
+    Runs *rundata* from its initial time to *spinup_time* and checkpoints
+    there, writing the frames the full run writes up to *spinup_time*, which
+    must be one of its output times.  The output is laid out next to the
+    jobs' output as ``spinup_<key>_{data,output,log.txt}``.
+    """
+
+    def __init__(self, job, rundata, spinup_time):
+
+        super(SpinUpJob, self).__init__()
+
+        self.type = job.type
+        self.name = job.name
+        self.prefix = "spinup"
+        self.executable = job.executable
+        self.spinup_time = spinup_time
+        self.plot = False
+
+        self.rundata = rundata
+        clawdata = self.rundata.clawdata
+        times = output_times(clawdata)
+        tolerance = 1e-9 * max(1.0, abs(clawdata.tfinal - clawdata.t0))
+        if not any(abs(t - spinup_time) <= tolerance for t in times):
+            raise ValueError(f"Spin-up time {spinup_time} is not an output "
+                             "time of the run.")
+        clawdata.restart = False
+        clawdata.tfinal = spinup_time
+        clawdata.output_style = 2
+        clawdata.output_times = [t for t in times
+                                   if t < spinup_time - tolerance]
+        clawdata.output_times.append(spinup_time)
+        clawdata.num_output_times = len(clawdata.output_times)
+        clawdata.checkpt_style = 1
+
+    def __str__(self):
+        output = super(SpinUpJob, self).__str__()
+        output += f"\n  Spin-up to t = {self.spinup_time}"
+        return output
+
+
+class LocalController(batch.batch.BatchController):
+    r"""Run a list of jobs concurrently on the local machine
+
+    Each job is given ``omp_num_threads`` OpenMP threads and at most
+    ``max_jobs`` jobs run at once (by default as many as fit on the available
+    cores).  The output of each job is streamed line by line into its log file
+    and, if ``stream`` is set, echoed to the terminal prefixed by the job's
+    prefix.  The wall time of every job is recorded on the job as
+    ``job.wall_time`` and summarized once all jobs have finished.
+
+    If ``cache`` is set, a key hashing the job's data directory (which holds
+    everything written by ``write_data_objects()``, including
+    ``splitting.data`` and ``energy.data``), the storm file it refers to, the
+    executable and the job's monitor and its ``parameters()`` is stored in the
+    output directory after a successful run.  A later run with the same key
+    reuses that output instead of running again.
+
+    If the run wrote a routine timing summary it is read into ``job.timing``
+    (see :func:`read_timing`) and printed after the job summary.  The peak
+    resident memory of each run (in bytes) is recorded as ``job.max_memory``.
+    The wall time and memory of the run that produced an output directory are
+    kept in it and returned as ``paths["run_stats"]`` even when the output is
+    reused.
+
+    A job may carry a ``monitor``, a separate one for each job, that is
+    polled every ``monitor.interval`` seconds while the job runs: ``reset()``
+    is called before the run and ``check(output_path)`` returns the
+    simulation time at which to stop the run, or ``None``.  ``parameters()``
+    returns the settings that decide where the run stops.  The time a run
+    was stopped at is recorded as ``job.stop_time``.  A run stopped by a
+    monitor with ``success`` set, such as the steady state monitors of
+    :mod:`steady_state`, counts as successful and the time is also recorded
+    as ``job.steady_time``.  Otherwise the run fails with the monitor's
+    ``reason`` as its return code (see :mod:`compare`).
+
+    A job with a ``spinup_time`` attribute that is not ``None`` is restarted
+    from the checkpoint of a spin-up run shared with every other job that has
+    the same spin-up data.  The spin-up run data is ``job.spinup_rundata()``
+    if the job defines it and a copy of ``job.rundata`` otherwise, stopped at
+    ``spinup_time``, which must be one of the job's output times.  The
+    output of the job starts with the frames of its spin-up.
+    """
+
+    cache_file = ".run_key"
+    stats_file = ".run_stats"
+    timing_file = "routine_timing.txt"
+
+    def __init__(self, jobs=[], omp_num_threads=None, max_jobs=None):
+
+        super(LocalController, self).__init__(jobs)
+
+        if omp_num_threads is None:
+            omp_num_threads = int(os.environ.get("OMP_NUM_THREADS", 1))
+        self.omp_num_threads = omp_num_threads
+        self.max_jobs = max_jobs
+        self.stream = True
+        self.cache = True
+
+        self.runclaw_cmd = "python $CLAW/clawutil/src/python/clawutil/runclaw.py"
+        self.plotclaw_cmd = "python $CLAW/visclaw/src/python/visclaw/plotclaw.py"
+        self.base_path = os.path.expandvars(os.path.expanduser(
+                                        os.environ.get("DATA_PATH", os.getcwd())))
+
+        self.spinups = []
+
+        self._print_lock = threading.Lock()
+
+    def __str__(self):
+        output = super(LocalController, self).__str__()
+        output += f"\n  OMP threads per job: {self.omp_num_threads}\n"
+        output += f"  Concurrent jobs: {self.num_workers}"
+        return output
+
+    @property
+    def num_workers(self):
+        num_workers = max_concurrent_jobs(self.omp_num_threads)
+        if self.max_jobs is not None:
+            num_workers = min(num_workers, self.max_jobs)
+        return max(1, min(num_workers, len(self.jobs)))
+
+    def job_paths(self, job):
+        r"""Paths used by *job*, mirroring ``batch.batch.BatchController``"""
+        if len(job.type) > 0:
+            job_path = os.path.join(self.base_path, job.type, job.name)
+        else:
+            job_path = os.path.join(self.base_path, job.name)
+        job_path = os.path.abspath(job_path)
+        return {"job": job_path,
+                "data": os.path.join(job_path, f"{job.prefix}_data"),
+                "output": os.path.join(job_path, f"{job.prefix}_output"),
+                "plots": os.path.join(job_path, f"{job.prefix}_plots"),
+                "log": os.path.join(job_path, f"{job.prefix}_log.txt")}
+
+    def spinup_job(self, job):
+        r"""The :class:`SpinUpJob` *job* starts from, ``None`` if it has none"""
+        spinup_time = getattr(job, "spinup_time", None)
+        if spinup_time is None:
+            return None
+        if hasattr(job, "spinup_rundata"):
+            rundata = job.spinup_rundata()
+        else:
+            rundata = copy.deepcopy(job.rundata)
+        return SpinUpJob(job, rundata, spinup_time)
+
+    def write_spinup_data(self, spinup, written):
+        r"""Write the data of *spinup* and name it after the data's hash
+
+        The data is staged to compute its key and only kept for the first
+        spin-up with that key in *written*, the set of keys already written.
+        Returns the paths of the spin-up with its ``key``.
+        """
+        job_path = self.job_paths(spinup)["job"]
+        os.makedirs(job_path, exist_ok=True)
+        staging = {"data": tempfile.mkdtemp(prefix=".spinup_", dir=job_path)}
+        temp_path = os.getcwd()
+        os.chdir(staging["data"])
+        try:
+            spinup.write_data_objects()
+        finally:
+            os.chdir(temp_path)
+        key = self.run_key(spinup, staging)
+
+        spinup.prefix = f"spinup_{key[:12]}"
+        paths = self.job_paths(spinup)
+        if key in written:
+            shutil.rmtree(staging["data"])
+        else:
+            if os.path.exists(paths["data"]):
+                shutil.rmtree(paths["data"])
+            os.rename(staging["data"], paths["data"])
+            written.add(key)
+        paths["key"] = key
+        return paths
+
+    def fork_from_spinup(self, job, paths, spinup_paths):
+        r"""Set *job* up to restart from the checkpoint in *spinup_paths*
+
+        The spin-up wrote the frame at the restart time, so the job does not
+        write it again.  Returns ``False`` if the spin-up did not produce a
+        checkpoint.
+        """
+        checkpoint = latest_checkpoint(spinup_paths["output"])
+        if spinup_paths.get("returncode", 1) != 0 or checkpoint is None:
+            return False
+        job.rundata.clawdata.restart = True
+        job.rundata.clawdata.restart_file = os.path.basename(checkpoint)
+        job.rundata.clawdata.output_t0 = False
+        paths["checkpoint"] = checkpoint
+        paths["spinup_key"] = spinup_paths["key"]
+        return True
+
+    def copy_spinup_output(self, paths):
+        r"""Start the output in *paths* with the output of its spin-up
+
+        The frames, gauges and storm track written before the restart and
+        the checkpoint the run restarts from, with its time file, are
+        copied.  Other checkpoints and the spin-up's own run files are not.
+        """
+        if os.path.exists(paths["output"]):
+            shutil.rmtree(paths["output"])
+        os.makedirs(paths["output"])
+        checkpoint = paths["checkpoint"]
+        spinup_output = os.path.dirname(checkpoint)
+        restart_files = [checkpoint, checkpoint.replace("fort.chk", "fort.tck")]
+        for name in sorted(os.listdir(spinup_output)):
+            path = os.path.join(spinup_output, name)
+            if (name.startswith(".") or name == self.timing_file
+                    or not os.path.isfile(path)):
+                continue
+            if (name.startswith(("fort.chk", "fort.tck"))
+                    and path not in restart_files):
+                continue
+            shutil.copy2(path, paths["output"])
+
+    def write_job_data(self, job, paths):
+        r"""Write the data files for *job* into a clean data directory
+
+        The job's storm file, if any, is symlinked into the data directory and
+        the job's surge data refers to the link.
+        """
+        surge_data = getattr(job.rundata, "surge_data", None)
+        storm_file = getattr(surge_data, "storm_file", None)
+        if storm_file is not None and os.path.exists(storm_file):
+            # Resolve before a link left in the data directory is removed
+            storm_file = os.path.realpath(storm_file)
+        else:
+            storm_file = None
+
+        os.makedirs(paths["job"], exist_ok=True)
+        if os.path.exists(paths["data"]):
+            shutil.rmtree(paths["data"])
+        os.makedirs(paths["data"])
+
+        if storm_file is not None:
+            link = os.path.join(paths["data"], os.path.basename(storm_file))
+            os.symlink(storm_file, link)
+            surge_data.storm_file = link
+
+        temp_path = os.getcwd()
+        os.chdir(paths["data"])
+        try:
+            job.write_data_objects()
+        finally:
+            os.chdir(temp_path)
+
+    def write_data(self, runs):
+        r"""Write the data of the ``(job, paths)`` pairs in *runs*
+
+        The runs are split between forked worker processes, one per available
+        core, which inherit the jobs so that only indices are sent to them.
+        """
+        global _pending_writes
+        num_writers = min(available_cores(), len(runs))
+        if num_writers < 2 or "fork" not in multiprocessing.get_all_start_methods():
+            for (job, paths) in runs:
+                self.write_job_data(job, paths)
+            return
+
+        _pending_writes = (self, runs)
+        try:
+            context = multiprocessing.get_context("fork")
+            with concurrent.futures.ProcessPoolExecutor(num_writers,
+                                                mp_context=context) as pool:
+                list(pool.map(_write_pending, range(len(runs))))
+        finally:
+            _pending_writes = None
+
+        # Mirror the storm file links made in the workers
+        for (job, paths) in runs:
+            surge_data = getattr(job.rundata, "surge_data", None)
+            storm_file = getattr(surge_data, "storm_file", None)
+            if storm_file is not None:
+                link = os.path.join(paths["data"], os.path.basename(storm_file))
+                if os.path.islink(link):
+                    surge_data.storm_file = link
+
+    def run_key(self, job, paths):
+        r"""Content hash identifying the run described by *job*'s data"""
+        key = hashlib.sha256()
+        for name in sorted(os.listdir(paths["data"])):
+            path = os.path.join(paths["data"], name)
+            if os.path.isfile(path):
+                key.update(name.encode())
+                hash_file(path, key)
+
+        storm_file = getattr(getattr(job.rundata, "surge_data", None),
+                             "storm_file", None)
+        if storm_file is not None and os.path.isfile(storm_file):
+            key.update(b"storm")
+            hash_file(storm_file, key)
+
+        if paths.get("spinup_key") is not None:
+            key.update(b"spinup")
+            key.update(paths["spinup_key"].encode())
+
+        # A monitored run may have been stopped early, so its output is only
+        # reused by a run with the same monitor
+        monitor = getattr(job, "monitor", None)
+        if monitor is not None:
+            key.update(b"monitor")
+            key.update(type(monitor).__name__.encode())
+            key.update(repr(sorted(monitor.parameters().items())).encode())
+
+        executable = os.path.abspath(os.path.expandvars(job.executable))
+        key.update(b"executable")
+        if os.path.isfile(executable):
+            hash_file(executable, key)
+        else:
+            key.update(job.executable.encode())
+
+        return key.hexdigest()
+
+    def cached(self, paths):
+        r"""Check whether the output in *paths* was produced with ``paths["key"]``"""
+        key_path = os.path.join(paths["output"], self.cache_file)
+        if not os.path.exists(key_path):
+            return False
+        with open(key_path, "r") as key_file:
+            return key_file.read().strip() == paths["key"]
+
+    def _echo(self, job, line):
+        with self._print_lock:
+            sys.stdout.write(f"[{job.prefix}] {line}")
+            sys.stdout.flush()
+
+    def _execute(self, job, cmd, log_file, env, output=None):
+        r"""Run *cmd*, streaming its output into *log_file*
+
+        If *output* is given and the job has a ``monitor`` it watches
+        *output* while *cmd* runs.  Returns the return code, 0 if the monitor
+        stopped the run, and the peak resident memory in bytes of *cmd* and
+        the processes it waited for.
+        """
+        monitor = getattr(job, "monitor", None) if output is not None else None
+        # A monitored run gets its own process group so all of it is stopped
+        process = subprocess.Popen(cmd, shell=True, env=env, text=True,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, bufsize=1,
+                                   start_new_session=monitor is not None)
+        if monitor is not None:
+            monitor.reset()
+            job.stop_time = None
+            finished = threading.Event()
+            watcher = threading.Thread(target=self._watch,
+                                       args=(job, process, output, finished))
+            watcher.start()
+
+        for line in process.stdout:
+            log_file.write(line)
+            log_file.flush()
+            if self.stream:
+                self._echo(job, line)
+
+        if monitor is not None:
+            finished.set()
+            watcher.join()
+        # Reap the process ourselves to get its resource usage, ru_maxrss is
+        # in kilobytes on Linux
+        status, usage = os.wait4(process.pid, 0)[1:]
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if monitor is not None and job.stop_time is not None:
+            returncode = 0 if monitor.success else monitor.reason
+            return returncode, usage.ru_maxrss * 1024
+        return process.returncode, usage.ru_maxrss * 1024
+
+    def _watch(self, job, process, output, finished):
+        r"""Stop *process* once ``job.monitor`` returns a time for *output*"""
+        monitor = job.monitor
+        while not finished.wait(monitor.interval):
+            try:
+                stop_time = monitor.check(output)
+            except (OSError, ValueError):
+                # Output files still being written
+                continue
+            if stop_time is not None:
+                job.stop_time = stop_time
+                if self.stream:
+                    self._echo(job, f"{monitor.reason.capitalize()} at "
+                                    f"t = {stop_time}, stopping\n")
+                try:
+                    os.killpg(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    # The run ended between the poll and the kill, the
+                    # monitor's verdict on its output still holds
+                    pass
+                return
+
+    def run_job(self, job, paths):
+        r"""Run a single job whose data has already been written"""
+
+        env = os.environ.copy()
+        env["OMP_NUM_THREADS"] = str(self.omp_num_threads)
+
+        if job.rundata.clawdata.restart:
+            restart, overwrite = "T", "F"
+        else:
+            restart, overwrite = "F", "T"
+        run_cmd = " ".join((self.runclaw_cmd, job.executable, paths["output"],
+                            overwrite, restart, paths["data"]))
+        plot_cmd = " ".join((self.plotclaw_cmd, paths["output"],
+                             paths["plots"], getattr(job, "setplot", "setplot")))
+
+        plot = self.plot and getattr(job, "plot", True)
+
+        job.cached = self.cache and self.cached(paths)
+        if job.cached:
+            # Keep the log of the run that produced the output
+            if self.stream:
+                self._echo(job, f"Reusing {paths['output']}\n")
+            job.wall_time = 0.0
+            job.returncode = 0
+            job.timing = read_timing(os.path.join(paths["output"],
+                                                  self.timing_file))
+            run_stats = self.read_run_stats(paths)
+            job.max_memory = run_stats.get("max_memory")
+            job.steady_time = run_stats.get("steady_time")
+            if plot:
+                with open(paths["log"], "a") as log_file:
+                    log_file.write(plot_cmd + "\n")
+                    log_file.flush()
+                    self._execute(job, plot_cmd, log_file, env)
+            paths["wall_time"] = job.wall_time
+            paths["returncode"] = job.returncode
+            paths["timing"] = job.timing
+            paths["run_stats"] = run_stats
+            return paths
+
+        if paths.get("checkpoint") is not None:
+            self.copy_spinup_output(paths)
+
+        with open(paths["log"], "w") as log_file:
+            log_file.write(str(job) + "\n")
+            log_file.write(run_cmd + "\n")
+            log_file.flush()
+
+            start = time.perf_counter()
+            returncode, job.max_memory = self._execute(job, run_cmd,
+                                                       log_file, env,
+                                                       paths["output"])
+            job.wall_time = time.perf_counter() - start
+            job.returncode = returncode
+            log_file.write(f"Wall time: {job.wall_time:.2f} s\n")
+            log_file.write(f"Peak memory: {job.max_memory / 2**20:.1f} MiB\n")
+            job.timing = read_timing(os.path.join(paths["output"],
+                                                  self.timing_file))
+
+            job.steady_time = None
+            if getattr(job, "monitor", None) is not None and returncode == 0 \
+                    and job.monitor.success:
+                # The run may have finished between two polls
+                job.steady_time = job.monitor.check(paths["output"])
+                if job.steady_time is not None:
+                    log_file.write(f"Steady at t = {job.steady_time}\n")
+
+            run_stats = {"wall_time": job.wall_time,
+                         "max_memory": job.max_memory,
+                         "steady_time": job.steady_time}
+            if returncode == 0:
+                with open(os.path.join(paths["output"], self.stats_file),
+                          "w") as stats_file:
+                    json.dump(run_stats, stats_file)
+            if returncode == 0 and paths.get("key") is not None:
+                with open(os.path.join(paths["output"], self.cache_file),
+                          "w") as key_file:
+                    key_file.write(paths["key"] + "\n")
+
+            if plot and returncode == 0:
+                log_file.write(plot_cmd + "\n")
+                log_file.flush()
+                self._execute(job, plot_cmd, log_file, env)
+
+        paths["wall_time"] = job.wall_time
+        paths["returncode"] = job.returncode
+        paths["timing"] = job.timing
+        paths["run_stats"] = run_stats
+        return paths
+
+    def read_run_stats(self, paths):
+        r"""Wall time and memory of the run that wrote the output in *paths*"""
+        stats_path = os.path.join(paths["output"], self.stats_file)
+        if not os.path.exists(stats_path):
+            return {}
+        with open(stats_path, "r") as stats_file:
+            return json.load(stats_file)
+
+    def run(self):
+        r"""Write all data and run the jobs concurrently
+
+        Returns a list of dictionaries, one per job in the order given, with
+        the paths used along with the job's wall time and return code.
+        """
+
+        start = time.perf_counter()
+
+        # Run each distinct spin-up once
+        spinups = {}
+        spinup_keys = []
+        written = set()
+        for job in self.jobs:
+            spinup = self.spinup_job(job)
+            if spinup is None:
+                spinup_keys.append(None)
+                continue
+            paths = self.write_spinup_data(spinup, written)
+            if paths["key"] not in spinups:
+                spinups[paths["key"]] = (spinup, paths)
+            spinup_keys.append(paths["key"])
+        self.spinups = [spinup for (spinup, paths) in spinups.values()]
+        self._run_jobs(spinups.values())
+
+        all_paths = []
+        runs = []
+        for (job, spinup_key) in zip(self.jobs, spinup_keys):
+            paths = self.job_paths(job)
+            all_paths.append(paths)
+            if spinup_key is not None:
+                if not self.fork_from_spinup(job, paths,
+                                             spinups[spinup_key][1]):
+                    job.wall_time = 0.0
+                    job.returncode = "spin-up"
+                    paths["returncode"] = job.returncode
+                    continue
+            runs.append((job, paths))
+
+        self.write_data(runs)
+        for (job, paths) in runs:
+            paths["key"] = self.run_key(job, paths) if self.cache else None
+        self._run_jobs(runs)
+
+        total_time = time.perf_counter() - start
+
+        self.print_summary(total_time)
+        self.print_timing()
+
+        return all_paths
+
+    def _run_jobs(self, runs):
+        r"""Run the ``(job, paths)`` pairs in *runs* concurrently"""
+        with concurrent.futures.ThreadPoolExecutor(self.num_workers) as pool:
+            futures = [pool.submit(self.run_job, job, paths)
+                       for (job, paths) in runs]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+
+    def print_summary(self, total_time=None):
+        r"""Print the wall time and status of each spin-up and job"""
+        print("Job summary:")
+        for job in self.spinups + self.jobs:
+            wall_time = getattr(job, "wall_time", None)
+            returncode = getattr(job, "returncode", None)
+            if getattr(job, "skipped", None) is not None:
+                status = job.skipped
+                wall_time = 0.0
+            elif wall_time is None:
+                status = "not run"
+                wall_time = 0.0
+            elif getattr(job, "cached", False):
+                status = "cached"
+            elif returncode == 0 and getattr(job, "steady_time", None) is not None:
+                status = f"steady {job.steady_time:.3g}"
+            elif returncode == 0:
+                status = "done"
+            else:
+                status = f"failed ({returncode})"
+            print(f"  {job.prefix:>24s}  {status:>12s}  {wall_time:10.1f} s")
+        if total_time is not None:
+            print(f"  {'total':>24s}  {'':>12s}  {total_time:10.1f} s")
+
+    def print_timing(self):
+        r"""Print the seconds spent in each timed routine of each job"""
+        timed_jobs = [job for job in self.jobs
+                          if getattr(job, "timing", None) is not None]
+        if len(timed_jobs) == 0:
+            return
+        routines = []
+        for job in timed_jobs:
+            routines.extend(routine for routine in job.timing
+                                    if routine not in routines)
+        print("Routine timing (s):")
+        print(f"  {'':>24s}" + "".join(f"  {routine:>10s}"
+                                        for routine in routines))
+        for job in timed_jobs:
+            seconds = [job.timing.get(routine, {}).get("seconds", 0.0)
+                       for routine in routines]
+            print(f"  {job.prefix:>24s}" + "".join(f"  {value:10.2f}"
+                                                    for value in seconds))
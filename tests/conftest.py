@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules under test live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
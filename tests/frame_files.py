@@ -0,0 +1,74 @@
+r"""Writers for small synthetic GeoClaw output frames used by the tests"""
+
+import os
+
+import numpy as np
+
+import frames
+
+
+def write_frame(path, frame, patches, t=0.0, file_format="ascii",
+                      num_ghost=2, aux=None, num_aux=None):
+    r"""Write *patches* as *frame* of the output in *path*
+
+    *patches* is a list of ``(level, lower, delta, q)`` with ``q`` of shape
+    ``(num_eqn, mx, my)``.  *aux*, if given, holds the aux fields of every
+    patch in the same layout and is written to ``fort.aXXXX``, *num_aux* is
+    the number of aux fields of the run if no aux fields are written.
+    """
+    os.makedirs(path, exist_ok=True)
+    num_eqn = patches[0][3].shape[0]
+    if aux is not None:
+        num_aux = aux[0].shape[0]
+    elif num_aux is None:
+        num_aux = 0
+    with open(frames.frame_file(path, frame, "t"), "w") as t_file:
+        t_file.write(f"{t} time\n{num_eqn} meqn\n{len(patches)} ngrids\n"
+                     f"{num_aux} naux\n2 ndim\n{num_ghost} nghost\n"
+                     f"{file_format}\n")
+
+    with open(frames.frame_file(path, frame, "q"), "w") as q_file:
+        for (n, patch) in enumerate(patches):
+            q_file.write(header(n + 1, *patch))
+            if file_format == "ascii":
+                q_file.write(ascii_values(patch[3]))
+    if aux is not None and file_format == "ascii":
+        with open(frames.frame_file(path, frame, "a"), "w") as a_file:
+            for (n, (patch, values)) in enumerate(zip(patches, aux)):
+                a_file.write(header(n + 1, *patch[:3], values))
+                a_file.write(ascii_values(values))
+
+    if file_format != "ascii":
+        dtype = np.float32 if file_format == "binary32" else np.float64
+        write_binary(frames.frame_file(path, frame, "b"),
+                     [patch[3] for patch in patches], num_ghost, dtype)
+        if aux is not None:
+            write_binary(frames.frame_file(path, frame, "a"), aux, num_ghost,
+                         dtype)
+
+
+def header(patch_id, level, lower, delta, q):
+    mx, my = q.shape[1:]
+    return (f"{patch_id} grid_number\n{level} AMR_level\n{mx} mx\n{my} my\n"
+            f"{lower[0]} xlow\n{lower[1]} ylow\n{delta[0]} dx\n{delta[1]} dy\n"
+            "\n")
+
+
+def ascii_values(q):
+    r"""Rows of cells with i varying fastest"""
+    lines = []
+    for j in range(q.shape[2]):
+        for i in range(q.shape[1]):
+            lines.append(" ".join(repr(float(value)) for value in q[:, i, j]))
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def write_binary(path, arrays, num_ghost, dtype):
+    r"""Patches including ghost cells, one after another, in Fortran order"""
+    with open(path, "wb") as data_file:
+        for q in arrays:
+            padded = np.pad(q, ((0, 0), (num_ghost, num_ghost),
+                                (num_ghost, num_ghost)),
+                            constant_values=-1.0)
+            data_file.write(padded.astype(dtype).ravel(order="F").tobytes())
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import compare
+import frames
+from frame_files import write_frame
+
+
+def sample_patches(offset=0.0, fine_offset=0.0, fine_lower=(1.0, 1.0)):
+    coarse = np.ones((4, 4, 3)) + offset
+    fine = np.ones((4, 4, 4)) + fine_offset
+    return [(1, (0.0, 0.0), (1.0, 1.0), coarse),
+            (2, fine_lower, (0.5, 0.5), fine)]
+
+
+def frames_of(tmp_path, solution_patches, reference_patches):
+    write_frame(tmp_path / "solution", 0, solution_patches)
+    write_frame(tmp_path / "reference", 0, reference_patches)
+    return (frames.Frame(tmp_path / "solution", 0),
+            frames.Frame(tmp_path / "reference", 0))
+
+
+def test_difference_norms(tmp_path):
+    solution, reference = frames_of(tmp_path, sample_patches(0.5),
+                                    sample_patches())
+    differences = compare.difference_norms(solution, reference)
+    assert set(differences) == set(compare.fields)
+    for field in compare.fields:
+        assert differences[field]["l1"] == pytest.approx(0.5 * 12)
+        assert differences[field]["l2"] == pytest.approx(np.sqrt(0.25 * 12))
+        assert differences[field]["linf"] == pytest.approx(0.5)
+
+
+def test_difference_on_refined_patch(tmp_path):
+    solution, reference = frames_of(tmp_path, sample_patches(fine_offset=0.7),
+                                    sample_patches())
+    differences = compare.difference_norms(solution, reference)
+    assert differences["eta"]["l1"] == 0.0
+    assert differences["eta"]["linf"] == pytest.approx(0.7)
+
+
+def test_difference_of_shifted_patches(tmp_path):
+    # Only the overlap of level 2 patches at different places is compared
+    solution_patches = sample_patches(fine_lower=(1.5, 1.0))
+    solution_patches[1][3][:, -1, :] = 3.0
+    solution, reference = frames_of(tmp_path, solution_patches,
+                                    sample_patches())
+    differences = compare.difference_norms(solution, reference)
+    assert differences["h"]["linf"] == 0.0
+
+    solution_patches[1][3][:, 0, :] = 3.0
+    solution, reference = frames_of(tmp_path, solution_patches,
+                                    sample_patches())
+    assert compare.difference_norms(solution, reference)["h"]["linf"] \
+                                                        == pytest.approx(2.0)
+
+
+def test_frame_comparison(tmp_path):
+    for frame in range(3):
+        write_frame(tmp_path / "solution", frame, sample_patches(0.1 * frame),
+                    t=float(frame))
+        write_frame(tmp_path / "reference", frame, sample_patches(),
+                    t=float(frame))
+    comparison = compare.FrameComparison(tmp_path / "solution",
+                                         tmp_path / "reference")
+    assert comparison.update() == 3
+    assert comparison.update() == 0
+    np.testing.assert_allclose(comparison.series("eta"), [0.0, 0.1, 0.2])
+    assert comparison.diverged(0.15) == 2.0
+    assert comparison.diverged(0.5) is None
+
+    comparison.save(tmp_path / "series.npz")
+    series = np.load(tmp_path / "series.npz")
+    np.testing.assert_array_equal(series["frame"], [0, 1, 2])
+    np.testing.assert_allclose(series["eta_linf"], [0.0, 0.1, 0.2])
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pytest
+
+import frames
+from frame_files import write_frame
+
+
+def sample_patches(num_eqn=4):
+    r"""Level 1 grid of 4 x 3 cells with a level 2 patch over 2 x 2 of them"""
+    coarse = np.arange(num_eqn * 4 * 3, dtype=float).reshape((num_eqn, 4, 3))
+    fine = -np.arange(num_eqn * 4 * 4, dtype=float).reshape((num_eqn, 4, 4))
+    return [(1, (0.0, 0.0), (1.0, 1.0), coarse),
+            (2, (1.0, 1.0), (0.5, 0.5), fine)]
+
+
+@pytest.mark.parametrize("file_format", ["ascii", "binary64", "binary32"])
+def test_read_frame(tmp_path, file_format):
+    patches = sample_patches()
+    write_frame(tmp_path, 3, patches, t=1.5, file_format=file_format)
+
+    solution = frames.Frame(tmp_path, 3)
+    assert solution.t == 1.5
+    assert solution.num_eqn == 4
+    assert solution.file_format == file_format
+    assert len(solution.patches) == 2
+    for (patch, (level, lower, delta, q)) in zip(solution.patches, patches):
+        assert patch.level == level
+        assert patch.num_cells == list(q.shape[1:])
+        assert patch.lower == list(lower)
+        assert patch.delta == list(delta)
+        np.testing.assert_array_equal(patch.q, q)
+    assert frames.list_frames(tmp_path) == [3]
+
+
+def test_binary_frame_is_mapped(tmp_path):
+    write_frame(tmp_path, 0, sample_patches(), file_format="binary64")
+    solution = frames.Frame(tmp_path, 0)
+    assert solution.nbytes == os.path.getsize(frames.frame_file(tmp_path, 0,
+                                                                "b"))
+
+
+@pytest.mark.parametrize("file_format", ["ascii", "binary64"])
+def test_transect_and_level_grid(tmp_path, file_format):
+    patches = sample_patches()
+    write_frame(tmp_path, 0, patches, file_format=file_format)
+    solution = frames.Frame(tmp_path, 0)
+
+    rows = solution.transect(1.25)
+    assert len(rows) == 2
+    np.testing.assert_allclose(rows[0][0], [0.5, 1.5, 2.5, 3.5])
+    np.testing.assert_array_equal(rows[0][1], patches[0][3][:, :, 1])
+    np.testing.assert_allclose(rows[1][0], [1.25, 1.75, 2.25, 2.75])
+    np.testing.assert_array_equal(rows[1][1], patches[1][3][:, :, 0])
+
+    grid = solution.level_grid(2)
+    assert grid.num_cells == [4, 4]
+    np.testing.assert_array_equal(grid.q, patches[1][3])
+    with pytest.raises(ValueError):
+        solution.level_grid(3)
+
+
+@pytest.mark.parametrize("file_format", ["ascii", "binary64"])
+def test_read_aux(tmp_path, file_format):
+    patches = sample_patches()
+    aux = [np.full((2,) + q.shape[1:], float(n + 1))
+           for (n, (_, _, _, q)) in enumerate(patches)]
+    write_frame(tmp_path, 0, patches, file_format=file_format, aux=aux)
+    write_frame(tmp_path, 1, patches, file_format=file_format, num_aux=2)
+
+    solution = frames.Frame(tmp_path, 0)
+    solution.read_aux()
+    for (patch, values) in zip(solution.patches, aux):
+        np.testing.assert_array_equal(patch.aux, values)
+    with pytest.raises(IOError):
+        frames.Frame(tmp_path, 1).read_aux()
+
+
+def test_read_aux_of_other_layout(tmp_path):
+    patches = sample_patches()
+    moved = patches[:1] + [(2, (0.0, 0.0), (0.5, 0.5), patches[1][3])]
+    aux = [np.ones((1,) + q.shape[1:]) for (_, _, _, q) in moved]
+    write_frame(tmp_path, 0, moved, aux=aux)
+    write_frame(tmp_path / "regridded", 0, patches, num_aux=1)
+    (tmp_path / "regridded" / "fort.a0000").write_bytes(
+                                        (tmp_path / "fort.a0000").read_bytes())
+
+    with pytest.raises(ValueError):
+        frames.Frame(tmp_path / "regridded", 0).read_aux()
+
+
+def test_frame_cache(tmp_path):
+    write_frame(tmp_path, 0, sample_patches(), file_format="binary64")
+    cache = frames.FrameCache()
+    first = cache.get(tmp_path, 0)
+    assert cache.get(tmp_path, 0) is first
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
@@ -0,0 +1,127 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("clawpack.geoclaw.surge.plot")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "energy_example"))
+import plot_energy
+
+
+def midpoint_E0_integral(c, num_cells=2000):
+    r"""E0 integral by the midpoint rule on a uniform grid"""
+    nodes = -1.0 + (np.arange(num_cells) + 0.5) * 2.0 / num_cells
+    x, y = np.meshgrid(nodes - c, nodes, indexing="ij")
+    with np.errstate(divide="ignore"):
+        f = (1.0 - np.exp(-1.0 / np.sqrt(x**2 + y**2)))**2
+    return np.sum(f) * (2.0 / num_cells)**2
+
+
+@pytest.mark.parametrize("c", [0.0, 0.3, 1.0, 2.5])
+def test_E0_integral(c):
+    assert plot_energy.E0_integral(c) == pytest.approx(
+                                        midpoint_E0_integral(c), rel=1e-5)
+
+
+def test_E0_integral_chunks():
+    c = np.linspace(0.0, 3.0, 7).reshape((7, 1))
+    np.testing.assert_allclose(plot_energy.E0_integral(c, chunk_size=100),
+                               plot_energy.E0_integral(c))
+    assert plot_energy.E0_integral(c).shape == (7, 1)
+
+
+def test_E0():
+    rho, g, dp, R_m = 1025.0, 9.81, 400.0, 10e3
+    scale = 0.5 / (rho * g) * dp**2 * R_m**2
+    E = plot_energy.E0(0.0, rho, g, dp, R_m, 0.0)
+    assert isinstance(E, float)
+    assert E == pytest.approx(scale * midpoint_E0_integral(0.0), rel=1e-5)
+
+    # Arrays of times and speeds are broadcast and match scalar calls
+    t = np.array([0.0, 100.0, 1000.0])
+    U = np.array([[0.0], [5.0]])
+    energy = plot_energy.E0(t, rho, g, dp, R_m, U)
+    assert energy.shape == (2, 3)
+    for (i, speed) in enumerate(U[:, 0]):
+        for (j, time) in enumerate(t):
+            assert energy[i, j] == pytest.approx(
+                        plot_energy.E0(time, rho, g, dp, R_m, speed), rel=1e-8)
+    np.testing.assert_allclose(plot_energy.E0(t, rho, g, dp, R_m, 5.0,
+                                              order=256), energy[1], rtol=1e-8)
+
+
+def fortran_e(x, width, digits):
+    r"""*x* in the Fortran format ``e<width>.<digits>``, two digit exponents"""
+    if x == 0.0:
+        mantissa, exponent = "0" * digits, 0
+    else:
+        value = f"{abs(x):.{digits - 1}E}"
+        mantissa = value[0] + value[2:value.index("E")]
+        exponent = int(value[value.index("E") + 1:]) + 1
+    sign = "-" if x < 0.0 else ""
+    return f"{sign}0.{mantissa}E{exponent:+03d}".rjust(width)
+
+
+def conservation_lines(t, values):
+    r"""Lines written by conck for one check with *values* (value, diff) of
+    mass, KE and PE"""
+    return "".join(f"time t = {fortran_e(t, 12, 5)},  total {kind} = "
+                   f"{fortran_e(value, 22, 15)}  diff = "
+                   f"{fortran_e(diff, 22, 15)}\n"
+                   for (kind, (value, diff)) in zip(["mass", "KE  ", "PE  "],
+                                                     values))
+
+
+def sample_records(num_records=50):
+    records = np.empty(num_records, dtype=plot_energy.conservation_dtype)
+    records["t"] = np.arange(num_records) * 0.25
+    for (n, name) in enumerate(plot_energy.conservation_dtype.names[1:]):
+        records[name] = np.round(np.sin(np.arange(num_records) + n) * 1e3, 6)
+    return records
+
+
+def write_amr_log(path, records, extra=""):
+    with open(os.path.join(path, "fort.amr"), "w") as amr_file:
+        for record in records:
+            amr_file.write("  regridding at level 1\n")
+            amr_file.write(conservation_lines(record["t"],
+                                    [(record["mass"], record["mass_diff"]),
+                                     (record["KE"], record["KE_diff"]),
+                                     (record["PE"], record["PE_diff"])]))
+        amr_file.write(extra)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_read_amr_log(tmp_path, max_workers):
+    records = sample_records()
+    write_amr_log(tmp_path, records)
+
+    parsed = plot_energy.read_amr_log(tmp_path, max_workers=max_workers)
+    assert parsed.dtype == plot_energy.conservation_dtype
+    for name in plot_energy.conservation_dtype.names:
+        np.testing.assert_allclose(parsed[name], records[name], rtol=1e-12)
+
+    columns = plot_energy.parse_amr_log(tmp_path)
+    np.testing.assert_array_equal(columns[1], parsed["mass"])
+
+
+def test_read_amr_log_incomplete(tmp_path):
+    records = sample_records(3)
+    # A check whose KE and PE lines were not written yet
+    write_amr_log(tmp_path, records, conservation_lines(1.0, [(1.0, 0.0)]))
+    parsed = plot_energy.read_amr_log(tmp_path, max_workers=1)
+    np.testing.assert_array_equal(parsed["t"], records["t"])
+
+    # and a line still being written by a running simulation
+    with open(os.path.join(tmp_path, "fort.amr"), "a") as amr_file:
+        amr_file.write("time t = ")
+    parsed = plot_energy.read_amr_log(tmp_path, follow=True, idle_timeout=0.0)
+    np.testing.assert_array_equal(parsed["t"], records["t"])
+
+
+def test_read_amr_log_empty(tmp_path):
+    write_amr_log(tmp_path, [])
+    assert plot_energy.read_amr_log(tmp_path, max_workers=1).shape == (0,)
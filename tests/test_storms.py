@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("clawpack.clawutil.data")
+pytest.importorskip("clawpack.geoclaw.units")
+os.environ.setdefault("CLAW", "")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "storm"))
+import setrun
+
+fields = ["t", "eye_location", "max_wind_speed", "max_wind_radius",
+          "central_pressure", "storm_radius"]
+
+
+def test_single_storm():
+    t = np.linspace(-setrun.days2seconds(1), setrun.days2seconds(1), 9)
+    storms = setrun.synthetic_storms(t, speed=5.0, heading=np.pi / 2.0)
+    for field in fields:
+        assert storms[field].shape[:2] == (1, 9)
+    assert storms["eye_location"].shape == (1, 9, 2)
+    np.testing.assert_allclose(storms["eye_location"][0, :, 1], 5.0 * t)
+    np.testing.assert_allclose(storms["eye_location"][0, :, 0], 0.0,
+                               atol=1e-8 * np.max(abs(t)))
+
+    # The central pressure drops from ambient to min over the ramp
+    pressure = storms["central_pressure"][0]
+    assert pressure[0] == pytest.approx(101.3e3)
+    np.testing.assert_allclose(pressure[4:], 940e2)
+    assert np.all(np.diff(pressure) <= 0.0)
+
+
+def test_ensemble():
+    t = np.linspace(-setrun.days2seconds(1), setrun.days2seconds(1), 9)
+    parameters = {"speed": np.array([2.0, 4.0, 6.0]),
+                  "y0": 1e3,
+                  "min_pressure": np.array([930e2, 940e2, 950e2]),
+                  "ambient_pressure": np.array([101e3, 101.3e3, 102e3]),
+                  "ramp_time": np.array([1.0, 2.0, 3.0]) * 86400.0}
+    storms = setrun.synthetic_storms(t, **parameters)
+    for field in fields:
+        assert storms[field].shape[:2] == (3, 9)
+
+    # Every storm matches the storm built from its own parameters
+    for n in range(3):
+        storm_parameters = {name: value[n] if np.ndim(value) > 0 else value
+                            for (name, value) in parameters.items()}
+        storm = setrun.synthetic_storms(t, **storm_parameters)
+        for field in fields:
+            np.testing.assert_allclose(storms[field][n], storm[field][0])
+
+
+def test_ensemble_sizes_must_match():
+    with pytest.raises(ValueError):
+        setrun.synthetic_storms([0.0, 1.0], speed=[1.0, 2.0],
+                                ramp_time=[1.0, 2.0, 3.0])
+
+
+def test_write_storms(tmp_path):
+    t = np.linspace(-86400.0, 86400.0, 5)
+    storms = setrun.synthetic_storms(t, speed=[3.0, 4.0])
+    paths = [os.path.join(tmp_path, f"storm_{n}.storm") for n in range(2)]
+    setrun.write_storms(paths, storms, time_offset=10.0)
+
+    for (n, path) in enumerate(paths):
+        with open(path, "r") as storm_file:
+            assert storm_file.readline().strip() == "5"
+            assert float(storm_file.readline()) == 10.0
+        columns = np.loadtxt(path, skiprows=3)
+        assert columns.shape == (5, 7)
+        np.testing.assert_allclose(columns[:, 0], t)
+        np.testing.assert_allclose(columns[:, 1:3],
+                                   storms["eye_location"][n], rtol=1e-8)
+        np.testing.assert_allclose(columns[:, 5],
+                                   storms["central_pressure"][n], rtol=1e-8)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import frames
+import well_balance
+from frame_files import write_frame
+
+
+def lake_at_rest(sea_level=0.0, depth=10.0):
+    r"""Level 1 grid of 4 x 4 cells with a level 2 patch over 2 x 2 of them"""
+    patches = []
+    for (level, lower, delta, num_cells) in [(1, (0.0, 0.0), (1.0, 1.0), 4),
+                                             (2, (1.0, 1.0), (0.5, 0.5), 4)]:
+        q = np.zeros((4, num_cells, num_cells))
+        q[0] = depth
+        q[3] = sea_level
+        patches.append((level, lower, delta, q))
+    return patches
+
+
+def test_uncovered_area(tmp_path):
+    write_frame(tmp_path, 0, lake_at_rest())
+    geometry = well_balance.Geometry(frames.Frame(tmp_path, 0).patches)
+    assert not geometry.capacity
+    assert geometry.area.shape == (12 + 16,)
+    assert np.sum(geometry.area) == pytest.approx(16.0)
+
+
+def test_lake_at_rest(tmp_path):
+    patches = lake_at_rest()
+    write_frame(tmp_path, 0, patches)
+    patches[1][3][3, 0, 0] = 0.25
+    patches[1][3][1, 0, 0] = -2.0
+    write_frame(tmp_path, 1, patches)
+
+    results = well_balance.WellBalanceMetric().score_output(tmp_path)
+    np.testing.assert_array_equal(results["frame"], [0, 1])
+    np.testing.assert_allclose(results["eta_linf"], [0.0, 0.25])
+    np.testing.assert_allclose(results["eta_l1"], [0.0, 0.25 * 0.25 / 16.0])
+    np.testing.assert_allclose(results["momentum_linf"], [0.0, 2.0])
+
+
+def test_dry_cells(tmp_path):
+    patches = lake_at_rest()
+    patches[0][3][0, 0, 0] = 0.0
+    patches[0][3][3, 0, 0] = 5.0
+    write_frame(tmp_path, 0, patches)
+    score = well_balance.WellBalanceMetric().score(frames.Frame(tmp_path, 0))
+    assert score["eta"]["linf"] == 0.0
+
+
+def test_capacity(tmp_path):
+    patches = lake_at_rest()
+    patches[0][3][3, 0, 0] = 1.0
+    aux = [np.stack((np.zeros(q.shape[1:]), np.full(q.shape[1:], 2.0)))
+           for (_, _, _, q) in patches]
+    aux[0][1, 0, 0] = 4.0
+    write_frame(tmp_path, 0, patches, aux=aux)
+    write_frame(tmp_path, 1, patches, num_aux=2)
+
+    metric = well_balance.WellBalanceMetric(capa_index=2)
+    score = metric.score(frames.Frame(tmp_path, 0))
+    assert score["capacity"]
+    assert score["area"] == pytest.approx(2.0 * 16.0 + 2.0)
+    assert score["eta"]["l1"] == pytest.approx(4.0 / 34.0)
+
+    # Frames without aux output fall back to the cell areas
+    score = well_balance.WellBalanceMetric(capa_index=2).score(
+                                                    frames.Frame(tmp_path, 1))
+    assert not score["capacity"]
+    assert score["area"] == pytest.approx(16.0)
+    assert score["eta"]["l1"] == pytest.approx(1.0 / 16.0)
@@ -0,0 +1,193 @@
+! Wall-clock timers for the project's custom routines
+!
+! Enabled by the timing flag in splitting.data.  Each instrumented routine
+! reads the clock on entry and adds the elapsed ticks and one call to its
+! timer on exit.  Timers are shared by all OpenMP threads, so with more than
+! one thread the times are summed over threads.  The summary is written to
+! timing_file in the output directory once, when the run ends: start_timing
+! registers write_timing to be called at exit, and a run stopped by SIGTERM
+! (e.g. by a sweep monitor) writes it from check_stop before ending.
+!
+! The SIGTERM handler only sets a flag, acted on by check_stop from the next
+! timer_stop.  Outside parallel regions, e.g. in conck at the end of a step,
+! the run writes the summary and stops.  A thread inside a parallel region
+! cannot stop the run safely, it writes the summary and then ends the process
+! with the default action of SIGTERM, as if the handler had not been set.
+module timing_module
+
+    use, intrinsic :: iso_fortran_env, only: int64
+    use, intrinsic :: iso_c_binding, only: c_int, c_bool, c_funptr, c_funloc
+    use, intrinsic :: iso_c_binding, only: c_null_funptr
+    !$ use omp_lib, only: omp_in_parallel
+
+    implicit none
+    save
+
+    integer, parameter :: num_timers = 5
+    integer, parameter :: rpn2_timer = 1
+    integer, parameter :: src2_timer = 2
+    integer, parameter :: b4step2_timer = 3
+    integer, parameter :: setaux_timer = 4
+    integer, parameter :: conck_timer = 5
+    character(len=8), parameter :: timer_names(num_timers) =                &
+                    ["rpn2    ", "src2    ", "b4step2 ", "setaux  ", "conck   "]
+
+    integer(kind=int64) :: timer_ticks(num_timers) = 0
+    integer(kind=int64) :: timer_calls(num_timers) = 0
+
+    character(len=*), parameter :: timing_file = 'routine_timing.txt'
+    integer, parameter :: timing_unit = 68
+
+    ! Clock count when timing started and whether the summary was written
+    integer(kind=int64) :: run_start_clock = 0
+    logical :: summary_written = .false.
+
+    ! Set by the SIGTERM handler, only a flag can be set safely there
+    integer(kind=c_int), parameter :: SIGTERM = 15
+    logical(kind=c_bool), volatile :: stop_requested = .false.
+
+    interface
+        integer(kind=c_int) function c_atexit(handler) bind(c, name="atexit")
+            import :: c_int, c_funptr
+            type(c_funptr), value :: handler
+        end function c_atexit
+
+        type(c_funptr) function c_signal(signum, handler) bind(c, name="signal")
+            import :: c_int, c_funptr
+            integer(kind=c_int), value :: signum
+            type(c_funptr), value :: handler
+        end function c_signal
+
+        integer(kind=c_int) function c_raise(signum) bind(c, name="raise")
+            import :: c_int
+            integer(kind=c_int), value :: signum
+        end function c_raise
+    end interface
+
+contains
+
+    ! Start the run's clock and arrange for the summary to be written when
+    ! the run ends, normally or by SIGTERM
+    subroutine start_timing()
+
+        implicit none
+
+        integer(kind=c_int) :: status
+        type(c_funptr) :: previous
+
+        call system_clock(run_start_clock)
+        status = c_atexit(c_funloc(write_timing_at_exit))
+        previous = c_signal(SIGTERM, c_funloc(request_stop))
+
+    end subroutine start_timing
+
+    subroutine write_timing_at_exit() bind(c)
+
+        implicit none
+
+        call write_timing()
+
+    end subroutine write_timing_at_exit
+
+    subroutine request_stop(signum) bind(c)
+
+        implicit none
+
+        integer(kind=c_int), value :: signum
+
+        stop_requested = .true.
+
+    end subroutine request_stop
+
+    ! Current clock count, to be passed to timer_stop
+    integer(kind=int64) function timer_start() result(start)
+
+        implicit none
+
+        call system_clock(start)
+
+    end function timer_start
+
+    ! Add the time since start and one call to timer
+    subroutine timer_stop(timer, start)
+
+        implicit none
+
+        integer, intent(in) :: timer
+        integer(kind=int64), intent(in) :: start
+
+        integer(kind=int64) :: now
+
+        call system_clock(now)
+        !$OMP ATOMIC
+        timer_ticks(timer) = timer_ticks(timer) + (now - start)
+        !$OMP ATOMIC
+        timer_calls(timer) = timer_calls(timer) + 1
+
+        if (stop_requested) call check_stop()
+
+    end subroutine timer_stop
+
+    ! End a run asked to stop by SIGTERM after writing the summary
+    subroutine check_stop()
+
+        implicit none
+
+        logical :: in_parallel
+        integer(kind=c_int) :: status
+        type(c_funptr) :: previous
+
+        if (.not. stop_requested) return
+
+        !$OMP CRITICAL (timing_output)
+        call write_timing()
+        !$OMP END CRITICAL (timing_output)
+
+        in_parallel = .false.
+        !$ in_parallel = omp_in_parallel()
+        if (.not. in_parallel) then
+            ! Exit status of a process terminated by SIGTERM
+            stop 143
+        end if
+        previous = c_signal(SIGTERM, c_null_funptr)
+        status = c_raise(SIGTERM)
+
+    end subroutine check_stop
+
+    ! Write the calls and seconds spent in each routine, only the first call
+    ! writes the summary
+    subroutine write_timing()
+
+        implicit none
+
+        integer :: n
+        integer(kind=int64) :: rate, now, ticks, calls
+        real(kind=8) :: seconds
+
+        if (summary_written) return
+        summary_written = .true.
+
+        call system_clock(now, count_rate=rate)
+
+        open(unit=timing_unit, file=timing_file, status='replace', action='write')
+        write(timing_unit, "('# wall time ',f16.6,' s')")                     &
+                    real(now - run_start_clock, kind=8) / real(rate, kind=8)
+        write(timing_unit, "('# routine',7x,'calls',9x,'seconds',6x,'us/call')")
+        do n = 1, num_timers
+            ! Other threads may still be timing when a run is stopped
+            !$OMP ATOMIC READ
+            ticks = timer_ticks(n)
+            !$OMP ATOMIC READ
+            calls = timer_calls(n)
+            if (calls > 0) then
+                seconds = real(ticks, kind=8) / real(rate, kind=8)
+                write(timing_unit, "(a8,i14,f16.6,f13.3)") timer_names(n),   &
+                            calls, seconds,                                  &
+                            1.d6 * seconds / real(calls, kind=8)
+            end if
+        end do
+        close(timing_unit)
+
+    end subroutine write_timing
+
+end module timing_module
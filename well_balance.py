@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+r"""Well-balancing error of GeoClaw output
+
+Measures how far every frame of a run is from a reference state, by default
+the lake at rest with the surface at ``sea_level`` and no momentum.  The
+deviation of eta (field 3 of the output) and of the momentum (fields 1 and 2)
+is taken over the cells of all AMR patches that are not covered by a patch of
+the next finer level, so that every point of the domain is counted once at
+its finest resolution.  Each cell is weighted by its area, ``dx * dy`` times
+the capacity function ``aux[capa_index]`` on lat-long grids, and dry cells
+are left out of the eta deviation.  The capacity function is read from the
+aux output of the frame, frames without a matching aux file (e.g. with
+``output_aux_onlyonce`` set) fall back to ``dx * dy``.
+
+The cells of all patches of a frame are gathered into flat arrays and the
+norms are computed in one pass over them.  The geometry (cell centers, areas
+and coverage) only depends on the patch layout and is reused for consecutive
+frames with the same layout.
+
+    python well_balance.py output_path [output_path ...]
+
+prints the norms of every frame of each output directory.
+"""
+
+import sys
+
+import numpy as np
+
+import frames
+
+norms = ["l1", "l2", "linf"]
+
+
+def uncovered_mask(patch, finer_patches):
+    r"""Cells of *patch* that are not covered by any of *finer_patches*
+
+    The cells covered by each finer patch are a product of a range of rows
+    and a range of columns, so the coverage count of every cell is the matrix
+    product of the row and column indicators of all finer patches.
+    """
+    mx, my = patch.num_cells
+    if len(finer_patches) == 0:
+        return np.ones((mx, my), dtype=bool)
+    lower = np.array([fine.lower for fine in finer_patches])
+    upper = np.array([fine.upper for fine in finer_patches])
+    # Ranges of coarse cells whose centers are inside each finer patch
+    centers = patch.centers
+    rows = (centers[0] > lower[:, 0:1]) & (centers[0] < upper[:, 0:1])
+    columns = (centers[1] > lower[:, 1:2]) & (centers[1] < upper[:, 1:2])
+    covered = rows.T.astype(np.int32) @ columns.astype(np.int32)
+    return covered == 0
+
+
+class Geometry(object):
+    r"""Flattened cell centers, areas and coverage of the patches of a frame
+
+    ``x``, ``y`` and ``area`` hold one entry per uncovered cell, in patch
+    order with the cells of a patch in the order of ``patch.q[n].ravel()``,
+    and ``masks`` the uncovered cells of each patch.  If *capa_index*
+    (1-based as in setrun) is positive the area of a cell is scaled by that
+    aux field of the patches, which must have been read, and ``capacity`` is
+    set.
+    """
+
+    def __init__(self, patches, capa_index=0):
+        self.capacity = capa_index > 0
+        self.masks = []
+        x, y, area = [], [], []
+        for patch in patches:
+            finer = [other for other in patches
+                           if other.level == patch.level + 1]
+            mask = uncovered_mask(patch, finer)
+            centers = np.meshgrid(*patch.centers, indexing="ij")
+            x.append(centers[0][mask])
+            y.append(centers[1][mask])
+            cell_area = patch.delta[0] * patch.delta[1]
+            if capa_index > 0:
+                area.append(cell_area * patch.aux[capa_index - 1][mask])
+            else:
+                area.append(np.full(np.count_nonzero(mask), cell_area))
+            self.masks.append(mask)
+        self.x = np.concatenate(x)
+        self.y = np.concatenate(y)
+        self.area = np.concatenate(area)
+
+    @staticmethod
+    def layout(patches):
+        r"""Key identifying the geometry of *patches*"""
+        return tuple((patch.level, tuple(patch.num_cells), tuple(patch.lower),
+                      tuple(patch.delta)) for patch in patches)
+
+    def gather(self, patches, field):
+        r"""Values of *field* in the uncovered cells of *patches*"""
+        return np.concatenate([patch.q[field][mask]
+                               for (patch, mask) in zip(patches, self.masks)])
+
+
+def weighted_norms(values, area):
+    r"""Area-weighted mean absolute value, RMS value and max of *values*"""
+    total_area = np.sum(area)
+    if values.size == 0 or total_area <= 0.0:
+        return {"l1": 0.0, "l2": 0.0, "linf": 0.0}
+    return {"l1": float(np.sum(np.abs(values) * area) / total_area),
+            "l2": float(np.sqrt(np.sum(values**2 * area) / total_area)),
+            "linf": float(np.max(np.abs(values)))}
+
+
+class WellBalanceMetric(object):
+    r"""Deviation of frames from a reference state
+
+    *reference*, if given, is a function of the cell centers ``(x, y)``
+    returning the reference eta, hu and hv (arrays or scalars), otherwise the
+    reference is the lake at rest at *sea_level*.  Cells with a depth below
+    *dry_tolerance* are not counted in the eta deviation.  Pass the run's
+    ``clawdata.capa_index`` as *capa_index* for lat-long grids; the capacity
+    function is then read from the aux output of the frames, and the cell
+    areas of frames without a matching aux file are ``dx * dy``.
+    """
+
+    def __init__(self, sea_level=0.0, reference=None, dry_tolerance=1e-3,
+                       capa_index=0):
+        self.sea_level = sea_level
+        self.reference = reference
+        self.dry_tolerance = dry_tolerance
+        self.capa_index = capa_index
+        self._layout = None
+        self._geometry = None
+        self._reference_values = None
+
+    def geometry(self, frame):
+        r"""Geometry of the patches of *frame*, reused while the layout is
+        unchanged"""
+        layout = Geometry.layout(frame.patches)
+        if layout != self._layout:
+            capa_index = self.capa_index
+            if capa_index > 0:
+                try:
+                    frame.read_aux()
+                except (IOError, ValueError):
+                    capa_index = 0
+            self._layout = layout
+            self._geometry = Geometry(frame.patches, capa_index)
+            if self.reference is None:
+                self._reference_values = (self.sea_level, 0.0, 0.0)
+            else:
+                self._reference_values = self.reference(self._geometry.x,
+                                                        self._geometry.y)
+        return self._geometry
+
+    def score(self, frame):
+        r"""Norms of the eta and momentum deviation of the :class:`frames.Frame`
+
+        Returns a dictionary with the time, the total uncovered area, whether
+        the areas include the ``capacity`` function and the ``eta`` and
+        ``momentum`` norms (see :func:`weighted_norms`).
+        """
+        if frame.num_eqn < 4:
+            raise ValueError(f"Frame {frame.frame} has no eta field.")
+        geometry = self.geometry(frame)
+        eta_reference, hu_reference, hv_reference = self._reference_values
+
+        h = geometry.gather(frame.patches, 0)
+        wet = h >= self.dry_tolerance
+        eta = geometry.gather(frame.patches, 3) - eta_reference
+        hu = geometry.gather(frame.patches, 1) - hu_reference
+        hv = geometry.gather(frame.patches, 2) - hv_reference
+        momentum = np.sqrt(hu**2 + hv**2)
+
+        return {"t": frame.t,
+                "area": float(np.sum(geometry.area)),
+                "capacity": geometry.capacity,
+                "eta": weighted_norms(eta[wet], geometry.area[wet]),
+                "momentum": weighted_norms(momentum, geometry.area)}
+
+    def score_output(self, path, frame_numbers=None):
+        r"""Score every frame (or *frame_numbers*) of the output in *path*
+
+        Returns a dictionary of arrays with one entry per frame: ``frame``,
+        ``t``, ``area``, ``capacity`` and ``<eta|momentum>_<norm>``.
+        """
+        if frame_numbers is None:
+            frame_numbers = frames.list_frames(path)
+        scores = [self.score(frames.Frame(path, frame))
+                  for frame in frame_numbers]
+        results = {"frame": np.array(frame_numbers, dtype=np.int32),
+                   "t": np.array([score["t"] for score in scores]),
+                   "area": np.array([score["area"] for score in scores]),
+                   "capacity": np.array([score["capacity"]
+                                         for score in scores])}
+        for quantity in ["eta", "momentum"]:
+            for norm in norms:
+                results[f"{quantity}_{norm}"] = np.array(
+                                [score[quantity][norm] for score in scores])
+        return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    metric = WellBalanceMetric()
+    for path in sys.argv[1:]:
+        results = metric.score_output(path)
+        print(path)
+        print(f"  {'frame':>5s} {'t':>12s}"
+              + "".join(f" {'eta ' + norm:>12s}" for norm in norms)
+              + "".join(f" {'mom ' + norm:>12s}" for norm in norms))
+        for n in range(results["frame"].shape[0]):
+            print(f"  {results['frame'][n]:5d} {results['t'][n]:12.4e}"
+                  + "".join(f" {results['eta_' + norm][n]:12.4e}"
+                            for norm in norms)
+                  + "".join(f" {results['momentum_' + norm][n]:12.4e}"
+                            for norm in norms))